@@ -0,0 +1,89 @@
+# SPDX-License-Identifier: MIT
+"""bench commands for Variant Bulk Creation."""
+
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("vbc-explain-indexes")
+@pass_context
+def explain_indexes(context):
+    """Print EXPLAIN plans for the report and hook queries and the index each one uses."""
+    import frappe
+
+    from variant_bulk_creation.variant_bulk_creation.indexes import explain_access_paths
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+
+    try:
+        for result in explain_access_paths():
+            if result["uses_index"] is None:
+                status = "no data"
+            else:
+                status = "OK" if result["uses_index"] else "NOT USED"
+
+            click.secho(
+                "{0} [{1}: {2}]".format(result["label"], result["index"], status),
+                fg={"OK": "green", "NOT USED": "red"}.get(status, "yellow"),
+                bold=True,
+            )
+            for row in result["plan"]:
+                click.echo(
+                    "  {table:<12} type={type:<8} key={key} rows={rows} {extra}".format(
+                        table=str(row.get("table")),
+                        type=str(row.get("type")),
+                        key=row.get("key"),
+                        rows=row.get("rows"),
+                        extra=row.get("Extra") or "",
+                    )
+                )
+    finally:
+        frappe.destroy()
+
+
+@click.command("vbc-create-variants")
+@click.argument("file_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--workers", default=1, type=int, help="Number of worker processes")
+@click.option("--commit-every", default=200, type=int, help="Commit after this many created variants per worker")
+@click.option("--output-dir", type=click.Path(file_okay=False), help="Where to write the results and errors files")
+@pass_context
+def create_variants_from_file(context, file_path, workers, commit_every, output_dir=None):
+    """Create the item variants listed in a CSV file using several worker processes."""
+    from variant_bulk_creation.variant_bulk_creation.bulk_variant_import import run_import
+
+    site = get_site(context)
+    summary = run_import(site, file_path, workers=workers, commit_every=commit_every, output_dir=output_dir)
+
+    click.secho(
+        "{created} created, {existing} already existed, {failed} failed using {workers} worker(s)".format(**summary),
+        fg="red" if summary["failed"] else "green",
+    )
+    click.echo("Results: {0}".format(summary["results_file"]))
+    click.echo("Errors: {0}".format(summary["errors_file"]))
+
+
+@click.command("vbc-bench-imports")
+@click.option("--repeat", default=3, type=int, help="Fresh processes per event; the fastest run is reported")
+@pass_context
+def bench_imports(context, repeat):
+    """Print the cold-start import cost of the app's handlers for each hooked doctype event."""
+    from variant_bulk_creation.variant_bulk_creation.import_benchmark import benchmark_hook_imports
+
+    site = get_site(context)
+    for result in benchmark_hook_imports(site, repeat=repeat):
+        lazy_loaded = result["lazy_loaded"]
+        click.secho(
+            "{doctype:<22} {event:<24} {ms:8.1f} ms {modules:5d} modules{lazy}".format(
+                doctype=result["doctype"],
+                event=result["event"],
+                ms=result["seconds"] * 1000,
+                modules=result["modules"],
+                lazy="  loads " + ", ".join(lazy_loaded) if lazy_loaded else "",
+            ),
+            fg="red" if lazy_loaded else None,
+        )
+
+
+commands = [explain_indexes, create_variants_from_file, bench_imports]
@@ -9,8 +9,16 @@ app_license = "MIT"
 
 """Default hook configuration for the Variant Bulk Creation app."""
 
-# After install hook to setup permissions
-after_install = "variant_bulk_creation.variant_bulk_creation.setup_permissions.setup_item_attribute_value_permissions"
+# After install hooks: setup permissions
+after_install = [
+    "variant_bulk_creation.variant_bulk_creation.setup_permissions.setup_item_attribute_value_permissions",
+]
+
+# After migrate: create the app's composite indexes once Custom Field fixtures
+# (e.g. Work Order.department) are synced; after_install runs before that
+after_migrate = [
+    "variant_bulk_creation.variant_bulk_creation.indexes.ensure_indexes",
+]
 
 # Jinja environment: make render_item_image available in print formats
 jenv = {
@@ -19,6 +27,9 @@ jenv = {
     ]
 }
 
+# Shared client helpers (weight factor cache) used by the doctype scripts below
+app_include_js = ["/assets/variant_bulk_creation/js/vbc_common.js"]
+
 doctype_js = {
     "Sales Order": "public/js/sales_order.js",
     "Work Order": "public/js/work_order.js",
@@ -28,7 +39,17 @@ doctype_js = {
     "Stock Reconciliation": "public/js/stock_reconciliation.js",
 }
 
+doctype_list_js = {
+    "Sales Order": "public/js/sales_order_list.js",
+}
+
 doc_events = {
+    "Item": {
+        "on_update": "variant_bulk_creation.variant_bulk_creation.template_events.publish_item_change",
+    },
+    "Item Attribute": {
+        "on_update": "variant_bulk_creation.variant_bulk_creation.template_events.publish_item_attribute_change",
+    },
     "Sales Order": {
         "before_validate": "variant_bulk_creation.variant_bulk_creation.sales_order.stash_total_pcs",
         "validate": "variant_bulk_creation.variant_bulk_creation.sales_order.ensure_sales_order_variants",
@@ -37,21 +58,71 @@ doc_events = {
         "on_submit": "variant_bulk_creation.variant_bulk_creation.sales_order.restore_total_pcs_and_save",
         "on_update_after_submit": "variant_bulk_creation.variant_bulk_creation.sales_order.restore_total_pcs_and_save",
     },
+    "BOM": {
+        "validate": "variant_bulk_creation.variant_bulk_creation.bom.set_bom_total_pcs",
+    },
     "Work Order": {
         "before_save": "variant_bulk_creation.variant_bulk_creation.work_order.populate_total_pcs_from_sales_order",
+        "on_update": [
+            "variant_bulk_creation.variant_bulk_creation.production_rollup.update_work_order_rollup",
+            "variant_bulk_creation.variant_bulk_creation.report_cache.invalidate_for_work_order",
+        ],
+        "on_submit": [
+            "variant_bulk_creation.variant_bulk_creation.production_rollup.update_work_order_rollup",
+            "variant_bulk_creation.variant_bulk_creation.report_cache.invalidate_for_work_order",
+        ],
+        "on_cancel": [
+            "variant_bulk_creation.variant_bulk_creation.production_rollup.update_work_order_rollup",
+            "variant_bulk_creation.variant_bulk_creation.report_cache.invalidate_for_work_order",
+        ],
+        "on_update_after_submit": [
+            "variant_bulk_creation.variant_bulk_creation.production_rollup.update_work_order_rollup",
+            "variant_bulk_creation.variant_bulk_creation.report_cache.invalidate_for_work_order",
+        ],
+        "after_delete": [
+            "variant_bulk_creation.variant_bulk_creation.production_rollup.update_work_order_rollup",
+            "variant_bulk_creation.variant_bulk_creation.report_cache.invalidate_for_work_order",
+        ],
     },
     "Stock Entry": {
         "before_save": "variant_bulk_creation.variant_bulk_creation.work_order.populate_total_pcs_in_stock_entry",
-        "on_submit": "variant_bulk_creation.variant_bulk_creation.stock_entry.populate_total_pcs_in_stock_ledger",
+        "on_submit": [
+            "variant_bulk_creation.variant_bulk_creation.stock_ledger.populate_total_pcs_in_stock_ledger",
+            "variant_bulk_creation.variant_bulk_creation.stock_ledger.update_pieces_balance",
+            "variant_bulk_creation.variant_bulk_creation.work_order.update_total_pcs_produced",
+            "variant_bulk_creation.variant_bulk_creation.production_rollup.update_work_order_rollup_from_stock_entry",
+            "variant_bulk_creation.variant_bulk_creation.report_cache.invalidate_for_stock_entry",
+        ],
+        "on_cancel": [
+            "variant_bulk_creation.variant_bulk_creation.stock_ledger.update_pieces_balance",
+            "variant_bulk_creation.variant_bulk_creation.work_order.update_total_pcs_produced",
+            "variant_bulk_creation.variant_bulk_creation.production_rollup.update_work_order_rollup_from_stock_entry",
+            "variant_bulk_creation.variant_bulk_creation.report_cache.invalidate_for_stock_entry",
+        ],
     },
     "Delivery Note": {
-        "on_submit": "variant_bulk_creation.variant_bulk_creation.delivery_note.populate_total_pcs_in_stock_ledger",
+        "before_validate": "variant_bulk_creation.variant_bulk_creation.delivery_note.populate_total_pcs_from_sales_order",
+        "on_submit": [
+            "variant_bulk_creation.variant_bulk_creation.stock_ledger.populate_total_pcs_in_stock_ledger",
+            "variant_bulk_creation.variant_bulk_creation.stock_ledger.update_pieces_balance",
+        ],
+        "on_cancel": "variant_bulk_creation.variant_bulk_creation.stock_ledger.update_pieces_balance",
     },
     "Stock Reconciliation": {
-        "on_submit": "variant_bulk_creation.variant_bulk_creation.stock_reconciliation.populate_total_pcs_in_stock_ledger",
+        "on_submit": [
+            "variant_bulk_creation.variant_bulk_creation.stock_ledger.populate_total_pcs_in_stock_ledger",
+            "variant_bulk_creation.variant_bulk_creation.stock_ledger.update_pieces_balance",
+        ],
+        "on_cancel": "variant_bulk_creation.variant_bulk_creation.stock_ledger.update_pieces_balance",
     }
 }
 
+scheduler_events = {
+    "hourly": [
+        "variant_bulk_creation.variant_bulk_creation.production_rollup.sync_work_order_rollup",
+    ],
+}
+
 fixtures = [
     {
         "dt": "Custom Field",
@@ -82,6 +153,9 @@ fixtures = [
             "Stock Reconciliation Item-length",
             "Stock Reconciliation Item-powder_code",
             "Stock Reconciliation Item-total_pcs",
+            "Stock Ledger Entry-pcs_after_transaction",
+            "Sales Order Item-vbc_variant_hash",
+            "Delivery Note Item-vbc_total_pcs_auto",
         ]]],
     },
     {
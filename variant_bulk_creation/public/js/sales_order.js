@@ -2,6 +2,8 @@
 
 const VBC_FETCH_TEMPLATE_METHOD =
     'variant_bulk_creation.variant_bulk_creation.doctype.variant_creation_tool.variant_creation_tool.fetch_template_details';
+const VBC_FETCH_TEMPLATES_METHOD =
+    'variant_bulk_creation.variant_bulk_creation.doctype.variant_creation_tool.variant_creation_tool.fetch_templates_details';
 const VBC_RESOLVE_VARIANT_METHOD =
     'variant_bulk_creation.variant_bulk_creation.sales_order.resolve_sales_order_variant';
 const VBC_ATTRIBUTE_QUERY =
@@ -30,7 +32,7 @@ function vbcGetStoredPcs(frm, cdn) {
 
 /**
  * Restore all stored total_pcs values after ERPNext recalculation.
- * Called after calculate_taxes_and_totals overwrites total_weight.
+ * Returns true when any row had been overwritten.
  */
 function vbcRestoreAllPcs(frm) {
     vbcEnsurePcsStore(frm);
@@ -48,13 +50,57 @@ function vbcRestoreAllPcs(frm) {
 
     if (any_restored) {
         frm.doc.total_net_weight = net_weight_sum;
-        frm.refresh_fields();
     }
+    return any_restored;
+}
+
+/* ---------- pcs → qty calculation pass ---------- */
+
+/**
+ * Rows whose total_weight (pcs) was edited since the last calculation pass.
+ * Their qty is derived in one batch inside calculate_taxes_and_totals, so a
+ * bulk paste costs one pass and one grid render instead of one per row.
+ */
+function vbcMarkPcsDirty(frm, cdn) {
+    frm._vbc_dirty_pcs = frm._vbc_dirty_pcs || new Set();
+    frm._vbc_dirty_pcs.add(cdn);
+
+    // Coalesce every edit made in the same tick into a single pass
+    if (frm._vbc_recalc_queued) return;
+    frm._vbc_recalc_queued = true;
+    Promise.resolve().then(() => {
+        frm._vbc_recalc_queued = false;
+        if (frm._vbc_dirty_pcs && frm._vbc_dirty_pcs.size) {
+            frm.cscript.calculate_taxes_and_totals();
+        }
+    });
+}
+
+/**
+ * Set qty and stock_qty from the stored pcs of every dirty row.
+ * qty (in Kg) = total_pcs * weight_per_piece (kg/piece)
+ */
+function vbcApplyDirtyPcs(frm) {
+    const dirty = frm._vbc_dirty_pcs;
+    if (!dirty || !dirty.size) return;
+    frm._vbc_dirty_pcs = new Set();
+
+    (frm.doc.items || []).forEach((row) => {
+        if (!dirty.has(row.name)) return;
+
+        const total_pcs = vbcGetStoredPcs(frm, row.name);
+        const weight_per_piece = vbcGetWeightPerPiece(row);
+        if (!total_pcs || !weight_per_piece) return;
+
+        row.qty = flt(total_pcs * weight_per_piece, precision('qty', row));
+        row.stock_qty = flt(row.qty * flt(row.conversion_factor || 1), precision('stock_qty', row));
+    });
 }
 
 /**
- * Monkey-patch calculate_taxes_and_totals so we can restore pcs
- * values after ERPNext finishes its recalculation.
+ * Monkey-patch calculate_taxes_and_totals so that pcs-driven quantities are
+ * applied before ERPNext's pass and the user's pcs are restored after it,
+ * with the form refreshed exactly once.
  */
 function vbcPatchCalculation(frm) {
     if (frm._vbc_calc_patched) return;
@@ -62,8 +108,24 @@ function vbcPatchCalculation(frm) {
 
     const orig = frm.cscript.calculate_taxes_and_totals;
     frm.cscript.calculate_taxes_and_totals = function() {
-        if (orig) orig.apply(this, arguments);
-        vbcRestoreAllPcs(frm);
+        vbcApplyDirtyPcs(frm);
+
+        // Hold back the refreshes ERPNext does during the pass
+        const refresh_fields = frm.refresh_fields;
+        let refresh_requested = false;
+        frm.refresh_fields = function() {
+            refresh_requested = true;
+        };
+
+        try {
+            if (orig) orig.apply(this, arguments);
+        } finally {
+            frm.refresh_fields = refresh_fields;
+        }
+
+        if (vbcRestoreAllPcs(frm) || refresh_requested) {
+            frm.refresh_fields();
+        }
     };
 }
 
@@ -94,11 +156,52 @@ function vbcGetTemplateAttributes(frm, template) {
     return frm._vbc_template_cache[template] || null;
 }
 
+variant_bulk_creation.templates.register_cache('Sales Order', (frm, templates) => {
+    vbcEnsureTemplateCache(frm);
+    templates.forEach((template) => delete frm._vbc_template_cache[template]);
+});
+
+/**
+ * Fetch metadata for every template used in the document with a single
+ * request so set_query filters and the resolver never wait on per-template
+ * calls. Rows touched while the prefetch is in flight wait for it instead
+ * of issuing their own request.
+ */
+function vbcPrefetchTemplates(frm) {
+    const templates = [...new Set(
+        (frm.doc.items || [])
+            .map((row) => row.template_item)
+            .filter((template) => template && !vbcGetTemplateAttributes(frm, template))
+    )];
+    if (!templates.length) {
+        return Promise.resolve();
+    }
+
+    frm._vbc_template_prefetch = frappe.call({
+        method: VBC_FETCH_TEMPLATES_METHOD,
+        args: { template_items: templates },
+        freeze: false,
+    }).then((response) => {
+        const details = (response && response.message) || {};
+        Object.keys(details).forEach((template) => {
+            vbcCacheTemplateAttributes(frm, template, details[template].attributes || []);
+        });
+    }).catch(() => null).finally(() => {
+        frm._vbc_template_prefetch = null;
+    });
+
+    return frm._vbc_template_prefetch;
+}
+
 function vbcFetchAndCacheAttributes(frm, template) {
     if (!template) {
         return Promise.resolve(null);
     }
 
+    if (frm._vbc_template_prefetch) {
+        return frm._vbc_template_prefetch.then(() => vbcFetchAndCacheAttributes(frm, template));
+    }
+
     const cached = vbcGetTemplateAttributes(frm, template);
     if (cached) {
         return Promise.resolve(cached);
@@ -180,6 +283,11 @@ function vbcApplyVariantDetails(frm, cdt, cdn, data) {
     const row = locals[cdt][cdn];
     if (row && data.weight_per_piece) {
         row._weight_per_piece = data.weight_per_piece;
+
+        // Pieces entered before the variant was known can be converted now
+        if (vbcGetStoredPcs(frm, cdn)) {
+            vbcMarkPcsDirty(frm, cdn);
+        }
     }
 }
 
@@ -198,38 +306,14 @@ function vbcGetWeightPerPiece(row) {
 
 function vbcRecalcQtyFromTotalWeight(frm, cdt, cdn) {
     const row = locals[cdt][cdn];
-    if (!row || row._vbc_guard) return;
-
-    const total_pcs = row.total_weight;
-    const weight_per_piece = vbcGetWeightPerPiece(row);
-
-    if (!total_pcs || !weight_per_piece) return;
-
-    // Store the exact value the user entered
-    vbcStorePcs(frm, cdn, total_pcs);
-
-    // total_weight = "total pcs" entered by user
-    // qty (in Kg) = total_pcs * weight_per_piece (kg/piece)
-    const qty = total_pcs * weight_per_piece;
-    row._vbc_guard = true;
-
-    frappe.model.set_value(cdt, cdn, 'qty', flt(qty, precision('qty', row)));
-
-    // ERPNext recalculates total_weight asynchronously after qty changes.
-    // Force-restore the user's entered value after ERPNext finishes.
-    setTimeout(() => {
-        const r = locals[cdt] && locals[cdt][cdn];
-        if (r) {
-            const stored = vbcGetStoredPcs(frm, cdn);
-            if (stored != null) {
-                frappe.model.set_value(cdt, cdn, 'total_weight', stored).then(() => {
-                    if (r) r._vbc_guard = false;
-                });
-            } else {
-                r._vbc_guard = false;
-            }
-        }
-    }, 500);
+    if (!row || !row.total_weight) return;
+
+    // total_weight = "total pcs" entered by user; keep the exact value
+    vbcStorePcs(frm, cdn, row.total_weight);
+
+    if (vbcGetWeightPerPiece(row)) {
+        vbcMarkPcsDirty(frm, cdn);
+    }
 }
 
 function vbcMaybeResolveVariant(frm, cdt, cdn) {
@@ -303,10 +387,15 @@ frappe.ui.form.on('Sales Order', {
         });
     },
 
+    onload(frm) {
+        vbcPrefetchTemplates(frm);
+    },
+
     refresh(frm) {
         vbcSetupGridColumns(frm);
         vbcInitPcsStoreFromDoc(frm);
         vbcPatchCalculation(frm);
+        vbcPrefetchTemplates(frm);
     },
 });
 
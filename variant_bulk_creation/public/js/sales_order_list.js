@@ -0,0 +1,63 @@
+// SPDX-License-Identifier: MIT
+
+const VBC_BULK_WORK_ORDERS_METHOD =
+    'variant_bulk_creation.variant_bulk_creation.bulk_work_order.enqueue_work_orders_for_sales_orders';
+
+/* Extend ERPNext's Sales Order list settings instead of replacing them. */
+frappe.listview_settings['Sales Order'] = frappe.listview_settings['Sales Order'] || {};
+
+(function (settings) {
+    const erpnextOnload = settings.onload;
+
+    settings.onload = function (listview) {
+        if (erpnextOnload) {
+            erpnextOnload.apply(this, arguments);
+        }
+
+        if (!frappe.model.can_create('Work Order')) {
+            return;
+        }
+
+        listview.page.add_actions_menu_item(__('Create Work Orders (with Pieces)'), () => {
+            const salesOrders = listview
+                .get_checked_items()
+                .filter((row) => row.docstatus === 1)
+                .map((row) => row.name);
+
+            if (!salesOrders.length) {
+                frappe.msgprint(__('Select at least one submitted Sales Order.'));
+                return;
+            }
+
+            frappe.call({
+                method: VBC_BULK_WORK_ORDERS_METHOD,
+                args: { sales_orders: salesOrders },
+            });
+        });
+
+        if (!frappe._vbc_bulk_work_order_listener) {
+            frappe._vbc_bulk_work_order_listener = true;
+            frappe.realtime.on('vbc_bulk_work_orders', (data) => {
+                if (!data || !data.done) {
+                    if (data && data.total) {
+                        frappe.show_progress(__('Creating Work Orders'), data.processed, data.total);
+                    }
+                    return;
+                }
+
+                frappe.hide_progress();
+                const errors = (data.errors || []).map((error) =>
+                    `<li>${frappe.utils.escape_html(error.sales_order)} / ${frappe.utils.escape_html(
+                        error.item_code
+                    )}: ${frappe.utils.escape_html(error.error)}</li>`
+                );
+                frappe.msgprint({
+                    title: __('Work Order Creation'),
+                    message: __('{0} Work Order(s) created.', [(data.created || []).length])
+                        + (errors.length ? `<ul>${errors.join('')}</ul>` : ''),
+                    indicator: errors.length ? 'orange' : 'green',
+                });
+            });
+        }
+    };
+})(frappe.listview_settings['Sales Order']);
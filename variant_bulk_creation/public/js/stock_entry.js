@@ -4,6 +4,8 @@ const STOCK_ENTRY_ATTRIBUTE_QUERY =
     'variant_bulk_creation.variant_bulk_creation.doctype.variant_creation_tool.variant_creation_tool.search_attribute_values';
 const STOCK_ENTRY_TEMPLATE_ATTRIBUTE =
     'variant_bulk_creation.variant_bulk_creation.sales_order.get_template_attribute';
+const STOCK_ENTRY_TEMPLATES_DETAILS =
+    'variant_bulk_creation.variant_bulk_creation.doctype.variant_creation_tool.variant_creation_tool.fetch_templates_details';
 const STOCK_ENTRY_RESOLVE_VARIANT =
     'variant_bulk_creation.variant_bulk_creation.stock_entry.resolve_stock_entry_variant';
 
@@ -12,12 +14,55 @@ function getVariantCache(frm) {
     return frm.stock_entry_variant_cache;
 }
 
+variant_bulk_creation.templates.register_cache('Stock Entry', (frm, templates) => {
+    const cache = getVariantCache(frm);
+    templates.forEach((templateItem) => delete cache[templateItem]);
+});
+
+function prefetchTemplateAttributes(frm) {
+    const cache = getVariantCache(frm);
+    const templates = [...new Set(
+        (frm.doc.items || [])
+            .map((row) => row.template_item)
+            .filter((templateItem) => templateItem && !(cache[templateItem] && cache[templateItem].attribute))
+    )];
+    if (!templates.length) {
+        return Promise.resolve();
+    }
+
+    frm._vbc_template_prefetch = frappe
+        .call({
+            method: STOCK_ENTRY_TEMPLATES_DETAILS,
+            args: { template_items: templates },
+            freeze: false,
+        })
+        .then((response) => {
+            const details = response?.message || {};
+            Object.keys(details).forEach((templateItem) => {
+                cache[templateItem] = {
+                    attribute: details[templateItem].attribute,
+                    all_attributes: details[templateItem].all_attributes,
+                };
+            });
+        })
+        .catch(() => null)
+        .finally(() => {
+            frm._vbc_template_prefetch = null;
+        });
+
+    return frm._vbc_template_prefetch;
+}
+
 function fetchTemplateAttribute(frm, templateItem) {
     const cache = getVariantCache(frm);
     if (!templateItem) {
         return Promise.resolve(null);
     }
 
+    if (frm._vbc_template_prefetch) {
+        return frm._vbc_template_prefetch.then(() => fetchTemplateAttribute(frm, templateItem));
+    }
+
     if (cache[templateItem] && cache[templateItem].attribute) {
         return Promise.resolve(cache[templateItem]);
     }
@@ -143,6 +188,12 @@ frappe.ui.form.on('Stock Entry', {
             };
         });
     },
+    onload(frm) {
+        prefetchTemplateAttributes(frm);
+    },
+    refresh(frm) {
+        prefetchTemplateAttributes(frm);
+    },
 });
 
 frappe.ui.form.on('Stock Entry Detail', {
@@ -215,38 +266,30 @@ function calculateQtyFromTotalPcs(cdt, cdn) {
     }
 
     // Get item details to fetch weight_per_unit
-    frappe.call({
-        method: 'frappe.client.get',
-        args: {
-            doctype: 'Item',
-            name: row.item_code
-        },
-        callback: function(r) {
-            if (r.message) {
-                const item = r.message;
-                const weight_per_unit = parseFloat(item.weight_per_unit);
-                const total_pcs = parseFloat(row.total_pcs);
-
-                if (!weight_per_unit || weight_per_unit <= 0 || isNaN(weight_per_unit) || isNaN(total_pcs)) {
-                    return;
-                }
+    variant_bulk_creation.weight.get_factor(row.item_code).then((item) => {
+        if (item) {
+            const weight_per_unit = parseFloat(item.weight_per_unit);
+            const total_pcs = parseFloat(row.total_pcs);
 
-                // weight_per_unit is in pcs/kg (pieces per kg)
-                // total_pcs is total number of pieces
-                // Calculate weight in base UOM (kg): weight_kg = total_pcs / weight_per_unit
-                const weight_in_kg = total_pcs / weight_per_unit;
+            if (!weight_per_unit || weight_per_unit <= 0 || isNaN(weight_per_unit) || isNaN(total_pcs)) {
+                return;
+            }
 
-                // Get conversion factor (default to 1 if not set)
-                const conversion_factor = parseFloat(row.conversion_factor) || 1;
+            // weight_per_unit is in pcs/kg (pieces per kg)
+            // total_pcs is total number of pieces
+            // Calculate weight in base UOM (kg): weight_kg = total_pcs / weight_per_unit
+            const weight_in_kg = total_pcs / weight_per_unit;
 
-                // Calculate quantity in transaction UOM
-                // stock_qty = qty × conversion_factor
-                // Therefore: qty = stock_qty / conversion_factor
-                const calculated_qty = weight_in_kg / conversion_factor;
+            // Get conversion factor (default to 1 if not set)
+            const conversion_factor = parseFloat(row.conversion_factor) || 1;
 
-                // Set the calculated quantity
-                frappe.model.set_value(cdt, cdn, 'qty', calculated_qty);
-            }
+            // Calculate quantity in transaction UOM
+            // stock_qty = qty × conversion_factor
+            // Therefore: qty = stock_qty / conversion_factor
+            const calculated_qty = weight_in_kg / conversion_factor;
+
+            // Set the calculated quantity
+            frappe.model.set_value(cdt, cdn, 'qty', calculated_qty);
         }
     });
 }
@@ -4,20 +4,67 @@ const STOCK_RECONCILIATION_ATTRIBUTE_QUERY =
     'variant_bulk_creation.variant_bulk_creation.doctype.variant_creation_tool.variant_creation_tool.search_attribute_values';
 const STOCK_RECONCILIATION_TEMPLATE_ATTRIBUTE =
     'variant_bulk_creation.variant_bulk_creation.sales_order.get_template_attribute';
+const STOCK_RECONCILIATION_TEMPLATES_DETAILS =
+    'variant_bulk_creation.variant_bulk_creation.doctype.variant_creation_tool.variant_creation_tool.fetch_templates_details';
 const STOCK_RECONCILIATION_RESOLVE_VARIANT =
     'variant_bulk_creation.variant_bulk_creation.stock_reconciliation.resolve_stock_reconciliation_variant';
+const STOCK_RECONCILIATION_IMPORT_PCS =
+    'variant_bulk_creation.variant_bulk_creation.stock_reconciliation_import.enqueue_stock_reconciliation_import';
 
 function getVariantCache(frm) {
     frm.stock_reconciliation_variant_cache = frm.stock_reconciliation_variant_cache || {};
     return frm.stock_reconciliation_variant_cache;
 }
 
+variant_bulk_creation.templates.register_cache('Stock Reconciliation', (frm, templates) => {
+    const cache = getVariantCache(frm);
+    templates.forEach((templateItem) => delete cache[templateItem]);
+});
+
+function prefetchTemplateAttributes(frm) {
+    const cache = getVariantCache(frm);
+    const templates = [...new Set(
+        (frm.doc.items || [])
+            .map((row) => row.template_item)
+            .filter((templateItem) => templateItem && !(cache[templateItem] && cache[templateItem].attribute))
+    )];
+    if (!templates.length) {
+        return Promise.resolve();
+    }
+
+    frm._vbc_template_prefetch = frappe
+        .call({
+            method: STOCK_RECONCILIATION_TEMPLATES_DETAILS,
+            args: { template_items: templates },
+            freeze: false,
+        })
+        .then((response) => {
+            const details = response?.message || {};
+            Object.keys(details).forEach((templateItem) => {
+                cache[templateItem] = {
+                    attribute: details[templateItem].attribute,
+                    all_attributes: details[templateItem].all_attributes,
+                };
+            });
+        })
+        .catch(() => null)
+        .finally(() => {
+            frm._vbc_template_prefetch = null;
+        });
+
+    return frm._vbc_template_prefetch;
+}
+
 function fetchTemplateAttribute(frm, templateItem) {
     const cache = getVariantCache(frm);
     if (!templateItem) {
         return Promise.resolve(null);
     }
 
+    if (frm._vbc_template_prefetch) {
+        return frm._vbc_template_prefetch.then(() => fetchTemplateAttribute(frm, templateItem));
+    }
+
     if (cache[templateItem] && cache[templateItem].attribute) {
         return Promise.resolve(cache[templateItem]);
     }
@@ -130,8 +177,105 @@ frappe.ui.form.on('Stock Reconciliation', {
             };
         });
     },
+    onload(frm) {
+        prefetchTemplateAttributes(frm);
+    },
+    refresh(frm) {
+        prefetchTemplateAttributes(frm);
+
+        if (frappe.model.can_create('Stock Reconciliation')) {
+            frm.add_custom_button(__('Import Count in Pieces'), () => showPcsImportDialog(frm), __('Tools'));
+        }
+    },
 });
 
+/**
+ * Upload a count sheet (template, powder code, length, sticker, warehouse,
+ * pieces). Variants are resolved and pieces converted on the server, which
+ * creates draft Stock Reconciliations in a background job.
+ */
+function showPcsImportDialog(frm) {
+    const dialog = new frappe.ui.Dialog({
+        title: __('Import Count in Pieces'),
+        fields: [
+            {
+                fieldname: 'file_url',
+                fieldtype: 'Attach',
+                label: __('Count Sheet (CSV)'),
+                reqd: 1,
+                description: __(
+                    'Columns: template_item, powder_code, length, sticker, warehouse, total_pcs and optionally valuation_rate'
+                ),
+            },
+            {
+                fieldname: 'company',
+                fieldtype: 'Link',
+                label: __('Company'),
+                options: 'Company',
+                reqd: 1,
+                default: frm.doc.company || frappe.defaults.get_user_default('Company'),
+            },
+            {
+                fieldname: 'posting_date',
+                fieldtype: 'Date',
+                label: __('Posting Date'),
+                description: __('Leave empty to post at the current date and time'),
+            },
+            {
+                fieldname: 'posting_time',
+                fieldtype: 'Time',
+                label: __('Posting Time'),
+                depends_on: 'posting_date',
+            },
+        ],
+        primary_action_label: __('Import'),
+        primary_action(values) {
+            frappe.call({
+                method: STOCK_RECONCILIATION_IMPORT_PCS,
+                args: values,
+            }).then(() => dialog.hide());
+        },
+    });
+
+    dialog.show();
+}
+
+if (!frappe._vbc_pcs_import_listener) {
+    frappe._vbc_pcs_import_listener = true;
+    frappe.realtime.on('vbc_stock_reconciliation_import', (data) => {
+        if (!data || !data.done) {
+            if (data && data.total) {
+                frappe.show_progress(__('Creating Stock Reconciliations'), data.processed, data.total);
+            }
+            return;
+        }
+
+        frappe.hide_progress();
+        if (data.error) {
+            frappe.msgprint({ title: __('Import Count in Pieces'), message: data.error, indicator: 'red' });
+            return;
+        }
+
+        const links = (data.created || []).map(
+            (name) => `<li>${frappe.utils.get_form_link('Stock Reconciliation', name, true)}</li>`
+        );
+        const errors = (data.errors || []).map((error) =>
+            `<li>${error.row ? __('Row {0}', [error.row]) + ': ' : ''}${frappe.utils.escape_html(error.error)}</li>`
+        );
+        const more = data.error_count > errors.length
+            ? `<p>${__('{0} more errors were logged in the Error Log.', [data.error_count - errors.length])}</p>`
+            : '';
+
+        frappe.msgprint({
+            title: __('Import Count in Pieces'),
+            message: __('{0} draft Stock Reconciliation(s) created.', [links.length])
+                + (links.length ? `<ul>${links.join('')}</ul>` : '')
+                + (errors.length ? `<ul>${errors.join('')}</ul>${more}` : ''),
+            indicator: errors.length ? 'orange' : 'green',
+        });
+    });
+}
+
 frappe.ui.form.on('Stock Reconciliation Item', {
     template_item(frm, cdt, cdn) {
         const row = locals[cdt][cdn] || {};
@@ -202,38 +346,30 @@ function calculateQtyFromTotalPcs(cdt, cdn) {
     }
 
     // Get item details to fetch weight_per_unit
-    frappe.call({
-        method: 'frappe.client.get',
-        args: {
-            doctype: 'Item',
-            name: row.item_code
-        },
-        callback: function(r) {
-            if (r.message) {
-                const item = r.message;
-                const weight_per_unit = parseFloat(item.weight_per_unit);
-                const total_pcs = parseFloat(row.total_pcs);
-
-                if (!weight_per_unit || weight_per_unit <= 0 || isNaN(weight_per_unit) || isNaN(total_pcs)) {
-                    return;
-                }
+    variant_bulk_creation.weight.get_factor(row.item_code).then((item) => {
+        if (item) {
+            const weight_per_unit = parseFloat(item.weight_per_unit);
+            const total_pcs = parseFloat(row.total_pcs);
 
-                // weight_per_unit is in pcs/kg (pieces per kg)
-                // total_pcs is total number of pieces
-                // Calculate weight in base UOM (kg): weight_kg = total_pcs / weight_per_unit
-                const weight_in_kg = total_pcs / weight_per_unit;
+            if (!weight_per_unit || weight_per_unit <= 0 || isNaN(weight_per_unit) || isNaN(total_pcs)) {
+                return;
+            }
 
-                // Get conversion factor (default to 1 if not set)
-                const conversion_factor = parseFloat(row.conversion_factor) || 1;
+            // weight_per_unit is in pcs/kg (pieces per kg)
+            // total_pcs is total number of pieces
+            // Calculate weight in base UOM (kg): weight_kg = total_pcs / weight_per_unit
+            const weight_in_kg = total_pcs / weight_per_unit;
 
-                // Calculate quantity in transaction UOM
-                // stock_qty = qty × conversion_factor
-                // Therefore: qty = stock_qty / conversion_factor
-                const calculated_qty = weight_in_kg / conversion_factor;
+            // Get conversion factor (default to 1 if not set)
+            const conversion_factor = parseFloat(row.conversion_factor) || 1;
 
-                // Set the calculated quantity
-                frappe.model.set_value(cdt, cdn, 'qty', calculated_qty);
-            }
+            // Calculate quantity in transaction UOM
+            // stock_qty = qty × conversion_factor
+            // Therefore: qty = stock_qty / conversion_factor
+            const calculated_qty = weight_in_kg / conversion_factor;
+
+            // Set the calculated quantity
+            frappe.model.set_value(cdt, cdn, 'qty', calculated_qty);
         }
     });
 }
@@ -0,0 +1,165 @@
+// SPDX-License-Identifier: MIT
+
+frappe.provide('variant_bulk_creation.weight');
+
+/**
+ * Short-lived client cache for Item weight factors (weight_per_unit in pcs/kg).
+ *
+ * Lookups requested in the same tick are coalesced into one call to
+ * get_weight_factors, so editing or loading many rows costs one lean request
+ * instead of one full Item document per row.
+ */
+(function () {
+    const WEIGHT_FACTORS_METHOD =
+        'variant_bulk_creation.variant_bulk_creation.item_weight.get_weight_factors';
+
+    const weight = variant_bulk_creation.weight;
+    const cache = {};
+    let queued = null;
+
+    // Entries are dropped on vbc_template_changed, so the TTL only bounds
+    // staleness from changes made outside the app's hooks
+    weight.TTL_MS = 15 * 60 * 1000;
+
+    function isFresh(entry) {
+        return entry && Date.now() - entry.fetched_at < weight.TTL_MS;
+    }
+
+    function requestFactors(itemCodes) {
+        if (!queued) {
+            const batch = { itemCodes: new Set() };
+            batch.promise = Promise.resolve().then(() => {
+                queued = null;
+                const codes = [...batch.itemCodes];
+                return frappe.call({
+                    method: WEIGHT_FACTORS_METHOD,
+                    args: { item_codes: codes },
+                    freeze: false,
+                }).then((response) => {
+                    const factors = (response && response.message) || {};
+                    const now = Date.now();
+                    codes.forEach((itemCode) => {
+                        cache[itemCode] = { data: factors[itemCode] || null, fetched_at: now };
+                    });
+                }).catch(() => null);
+            });
+            queued = batch;
+        }
+
+        itemCodes.forEach((itemCode) => queued.itemCodes.add(itemCode));
+        return queued.promise;
+    }
+
+    weight.get_factors = function (itemCodes) {
+        const codes = [...new Set((itemCodes || []).filter(Boolean))];
+        const missing = codes.filter((itemCode) => !isFresh(cache[itemCode]));
+        const ready = missing.length ? requestFactors(missing) : Promise.resolve();
+
+        return ready.then(() => {
+            const factors = {};
+            codes.forEach((itemCode) => {
+                if (cache[itemCode] && cache[itemCode].data) {
+                    factors[itemCode] = cache[itemCode].data;
+                }
+            });
+            return factors;
+        });
+    };
+
+    weight.get_factor = function (itemCode) {
+        if (!itemCode) {
+            return Promise.resolve(null);
+        }
+        return weight.get_factors([itemCode]).then((factors) => factors[itemCode] || null);
+    };
+
+    weight.invalidate = function (itemCodes) {
+        if (!itemCodes) {
+            Object.keys(cache).forEach((itemCode) => delete cache[itemCode]);
+            return;
+        }
+        itemCodes.forEach((itemCode) => delete cache[itemCode]);
+    };
+
+    weight.invalidate_templates = function (templates) {
+        const affected = new Set(templates || []);
+        Object.keys(cache).forEach((itemCode) => {
+            const data = cache[itemCode].data;
+            // Misses are dropped too: the item may be one of the variants just created
+            if (!data || affected.has(itemCode) || affected.has(data.variant_of)) {
+                delete cache[itemCode];
+            }
+        });
+    };
+})();
+
+frappe.provide('variant_bulk_creation.templates');
+
+/**
+ * Template change notices. The server publishes vbc_template_changed with the
+ * templates (and items) whose attributes or weights changed; each form script
+ * registers how to drop those templates from its own cache.
+ */
+(function () {
+    const templates = variant_bulk_creation.templates;
+    const invalidators = {};
+
+    templates.register_cache = function (doctype, invalidate) {
+        invalidators[doctype] = invalidate;
+    };
+
+    frappe.realtime.on('vbc_template_changed', (data) => {
+        if (!data) {
+            return;
+        }
+
+        variant_bulk_creation.weight.invalidate_templates(data.templates);
+        variant_bulk_creation.weight.invalidate(data.items || []);
+
+        if (!(data.templates || []).length) {
+            return;
+        }
+        Object.keys(invalidators).forEach((doctype) => {
+            const frm = frappe.views.formview[doctype] && frappe.views.formview[doctype].frm;
+            if (frm) {
+                invalidators[doctype](frm, data.templates, data.version);
+            }
+        });
+    });
+})();
+
+frappe.provide('variant_bulk_creation.reports');
+
+/**
+ * Streaming CSV export for the app's large reports. The server writes the
+ * file in a background job and announces it over realtime when ready.
+ */
+(function () {
+    const reports = variant_bulk_creation.reports;
+
+    reports.add_export_button = function (report, method) {
+        report.page.add_inner_button(__('Export CSV (Background)'), () => {
+            frappe.call({
+                method: method,
+                args: { filters: report.get_values() },
+            });
+        });
+    };
+
+    frappe.realtime.on('vbc_report_export', (data) => {
+        if (!data) {
+            return;
+        }
+        if (data.error) {
+            frappe.msgprint({ title: __(data.report_name), message: data.error, indicator: 'red' });
+            return;
+        }
+        frappe.msgprint({
+            title: __(data.report_name),
+            message: __('Your export is ready: {0}', [
+                `<a href="${encodeURI(data.file_url)}" target="_blank">${__('Download CSV')}</a>`,
+            ]),
+            indicator: 'green',
+        });
+    });
+})();
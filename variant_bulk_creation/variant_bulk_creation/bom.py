@@ -0,0 +1,183 @@
+"""BOM helpers for calculating pieces across multi-level BOMs."""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import frappe
+from frappe.utils import flt
+
+from .item_weight import _get_weight_factors
+
+
+class BomPcsCalculator:
+    """Explode a BOM tree once and answer pieces questions from memory.
+
+    Headers and items of every BOM reachable from the roots are loaded level
+    by level (one query per table per level) and weight factors for all items
+    in a single query. Results are memoised per ``(bom, qty)`` so shared
+    sub-assemblies are only computed once.
+    """
+
+    def __init__(self, root_boms: Iterable[str], item_codes: Iterable[str] = ()):
+        self.headers: Dict[str, frappe._dict] = {}
+        self.items: Dict[str, List[frappe._dict]] = {}
+        self._pcs_memo: Dict[Tuple[str, float], float] = {}
+        self._explosion_memo: Dict[Tuple[str, float], Dict[str, List[float]]] = {}
+        self._load(root_boms)
+
+        all_items = set(item_codes)
+        all_items.update(header.item for header in self.headers.values())
+        all_items.update(row.item_code for rows in self.items.values() for row in rows)
+        self.weights = _get_weight_factors(all_items)
+
+    def _load(self, root_boms: Iterable[str]) -> None:
+        level = {bom for bom in root_boms if bom}
+        while level:
+            for header in frappe.get_all(
+                "BOM",
+                filters={"name": ["in", list(level)]},
+                fields=["name", "item", "quantity", "total_pcs"],
+            ):
+                self.headers[header.name] = header
+                self.items.setdefault(header.name, [])
+
+            for row in frappe.get_all(
+                "BOM Item",
+                filters={"parent": ["in", list(level)], "parenttype": "BOM"},
+                fields=["parent", "item_code", "stock_qty", "bom_no"],
+                order_by="parent asc, idx asc",
+            ):
+                self.items.setdefault(row.parent, []).append(row)
+
+            level = {
+                row.bom_no
+                for bom in level
+                for row in self.items.get(bom, [])
+                if row.bom_no and row.bom_no not in self.headers
+            }
+
+    def weight_per_unit(self, item_code: str) -> float:
+        factor = self.weights.get(item_code)
+        return factor.weight_per_unit if factor else 0.0
+
+    def pcs_for(self, item_code: str, stock_qty: float, bom_no: Optional[str] = None) -> float:
+        """Pieces in ``stock_qty`` of the item, from its weight or its own BOM."""
+
+        weight_per_unit = self.weight_per_unit(item_code)
+        if weight_per_unit:
+            return flt(stock_qty) * weight_per_unit
+        if bom_no:
+            return self.bom_pcs(bom_no, stock_qty)
+        return 0.0
+
+    def bom_pcs(self, bom_no: str, qty: float, _path: frozenset = frozenset()) -> float:
+        """Pieces produced by ``qty`` of the BOM.
+
+        Uses the finished good's weight, then the BOM's own total_pcs, and
+        otherwise rolls up the pieces of its components.
+        """
+
+        key = (bom_no, flt(qty, 6))
+        if key in self._pcs_memo:
+            return self._pcs_memo[key]
+
+        header = self.headers.get(bom_no)
+        if not header or bom_no in _path:
+            return 0.0
+
+        weight_per_unit = self.weight_per_unit(header.item)
+        if weight_per_unit:
+            pcs = flt(qty) * weight_per_unit
+        elif header.total_pcs and header.quantity:
+            pcs = flt(header.total_pcs) * flt(qty) / flt(header.quantity)
+        else:
+            ratio = flt(qty) / flt(header.quantity or 1)
+            path = _path | {bom_no}
+            pcs = 0.0
+            for row in self.items.get(bom_no, []):
+                row_qty = flt(row.stock_qty) * ratio
+                if self.weight_per_unit(row.item_code):
+                    pcs += self.pcs_for(row.item_code, row_qty)
+                elif row.bom_no:
+                    pcs += self.bom_pcs(row.bom_no, row_qty, path)
+
+        self._pcs_memo[key] = pcs
+        return pcs
+
+    def explode(self, bom_no: str, qty: float, _path: frozenset = frozenset()) -> Dict[str, List[float]]:
+        """Return ``{item_code: [stock_qty, pcs]}`` of the leaf items for ``qty`` of the BOM."""
+
+        key = (bom_no, flt(qty, 6))
+        if key in self._explosion_memo:
+            return self._explosion_memo[key]
+
+        header = self.headers.get(bom_no)
+        leaves: Dict[str, List[float]] = {}
+        if not header or bom_no in _path:
+            return leaves
+
+        ratio = flt(qty) / flt(header.quantity or 1)
+        path = _path | {bom_no}
+        for row in self.items.get(bom_no, []):
+            row_qty = flt(row.stock_qty) * ratio
+            if row.bom_no and row.bom_no in self.headers:
+                children = self.explode(row.bom_no, row_qty, path)
+            else:
+                children = {row.item_code: [row_qty, self.pcs_for(row.item_code, row_qty)]}
+
+            for item_code, (child_qty, child_pcs) in children.items():
+                totals = leaves.setdefault(item_code, [0.0, 0.0])
+                totals[0] += child_qty
+                totals[1] += child_pcs
+
+        self._explosion_memo[key] = leaves
+        return leaves
+
+
+def set_bom_total_pcs(doc, _event: Optional[str] = None) -> None:
+    """Set BOM.total_pcs and every BOM Item.total_pcs on validate.
+
+    Sub-assembly rows without a weight of their own get the pieces of their
+    nested BOM, calculated once for the whole tree.
+    """
+
+    if doc.doctype != "BOM":
+        return
+
+    calculator = BomPcsCalculator(
+        [row.bom_no for row in doc.get("items", []) if row.get("bom_no")],
+        [doc.item] + [row.item_code for row in doc.get("items", [])],
+    )
+
+    rows_pcs = 0.0
+    for row in doc.get("items", []):
+        stock_qty = row.get("stock_qty") or flt(row.qty) * flt(row.conversion_factor or 1)
+        pcs = calculator.pcs_for(row.item_code, stock_qty, row.get("bom_no"))
+        if pcs:
+            row.total_pcs = flt(pcs, 3)
+        rows_pcs += flt(row.get("total_pcs"))
+
+    weight_per_unit = calculator.weight_per_unit(doc.item)
+    if weight_per_unit and doc.quantity:
+        doc.total_pcs = flt(flt(doc.quantity) * weight_per_unit, 3)
+    elif not doc.get("total_pcs") and rows_pcs:
+        doc.total_pcs = flt(rows_pcs, 3)
+
+
+@frappe.whitelist()
+def get_bom_pcs_explosion(bom_no: str, qty: Optional[float] = None) -> List[frappe._dict]:
+    """Return the leaf items of a multi-level BOM with quantities and pieces."""
+
+    frappe.has_permission("BOM", "read", bom_no, throw=True)
+
+    calculator = BomPcsCalculator([bom_no])
+    header = calculator.headers.get(bom_no)
+    if not header:
+        return []
+
+    exploded = calculator.explode(bom_no, flt(qty) or flt(header.quantity) or 1)
+    return [
+        frappe._dict({"item_code": item_code, "stock_qty": flt(stock_qty, 6), "total_pcs": flt(pcs, 3)})
+        for item_code, (stock_qty, pcs) in exploded.items()
+    ]
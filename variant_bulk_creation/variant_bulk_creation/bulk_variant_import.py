@@ -0,0 +1,257 @@
+"""Multi-process variant creation from a CSV file, driven by ``bench vbc-create-variants``.
+
+The CSV uses the Variant Creation Tool row columns: ``template_item``,
+``attribute_value``, ``attribute_value_2``, ``attribute_value_3`` or
+``attribute_values`` (JSON list for templates with more attributes) and the
+optional ``item_code``, ``item_name``, ``variant_sku`` and ``description``.
+
+The file is split into one partition per worker with every template wholly
+inside one partition, balanced by row count. Variant names derive from the
+template, so two workers never race for the same names or lock the same
+template rows. Each worker is a separate process with its own site connection;
+it writes a results and an errors CSV, and the parent merges them back into
+input line order when all workers are done.
+"""
+
+from __future__ import annotations
+
+import csv
+import heapq
+import os
+import shutil
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, Iterator, List, Optional
+
+RESULT_COLUMNS = ["line", "template_item", "item_code", "status"]
+ERROR_COLUMNS = ["line", "template_item", "error"]
+LINE_COLUMN = "_line"
+
+
+def _iter_rows(path: str) -> Iterator[Dict[str, str]]:
+    """Yield the CSV rows with their line number in the file."""
+
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        reader = csv.DictReader(handle)
+        reader.fieldnames = [(name or "").strip().lower().replace(" ", "_") for name in reader.fieldnames or []]
+        for row in reader:
+            row[LINE_COLUMN] = str(reader.line_num)
+            yield row
+
+
+def partition_file(path: str, workers: int, work_dir: str) -> List[str]:
+    """Split ``path`` into up to ``workers`` CSV files, keeping each template in one file."""
+
+    # First pass counts rows per template, second pass writes the partitions
+    sizes = Counter(row.get("template_item") or "" for row in _iter_rows(path))
+
+    loads = [(0, worker) for worker in range(max(1, min(workers, len(sizes))))]
+    assignment: Dict[str, int] = {}
+    # Largest templates first onto the least loaded worker
+    for template_item, size in sizes.most_common():
+        load, worker = heapq.heappop(loads)
+        assignment[template_item] = worker
+        heapq.heappush(loads, (load + size, worker))
+
+    paths = [os.path.join(work_dir, f"partition-{worker}.csv") for worker in range(len(loads))]
+    handles = [open(partition, "w", newline="", encoding="utf-8") for partition in paths]
+    try:
+        writers: List[Optional[csv.DictWriter]] = [None] * len(handles)
+        for row in _iter_rows(path):
+            worker = assignment[row.get("template_item") or ""]
+            if writers[worker] is None:
+                writers[worker] = csv.DictWriter(handles[worker], fieldnames=list(row))
+                writers[worker].writeheader()
+            writers[worker].writerow(row)
+    finally:
+        for handle in handles:
+            handle.close()
+
+    return paths
+
+
+def process_partition(
+    site: str, sites_path: str, partition_path: str, result_path: str, error_path: str, commit_every: int
+) -> Dict[str, int]:
+    """Worker entry point: create the variants of one partition on a fresh connection."""
+
+    import frappe
+
+    frappe.init(site=site, sites_path=sites_path)
+    frappe.connect()
+    frappe.set_user("Administrator")
+    frappe.flags.mute_emails = True
+
+    counts = {"created": 0, "existing": 0, "failed": 0}
+    try:
+        with open(result_path, "w", newline="", encoding="utf-8") as results_handle, open(
+            error_path, "w", newline="", encoding="utf-8"
+        ) as errors_handle:
+            results = csv.writer(results_handle)
+            errors = csv.writer(errors_handle)
+            if os.path.getsize(partition_path):
+                _create_partition_variants(partition_path, results, errors, counts, commit_every)
+        frappe.db.commit()
+    finally:
+        frappe.destroy()
+
+    return counts
+
+
+def _create_partition_variants(partition_path: str, results, errors, counts: Dict[str, int], commit_every: int) -> None:
+    import frappe
+    from frappe.utils import strip_html
+
+    from .doctype.variant_creation_tool.variant_creation_tool import (
+        _create_variant,
+        _get_allowed_values,
+        _get_row_values,
+        _get_template_context,
+        _get_template_weights,
+    )
+    from .template_events import publish_templates_changed
+    from .variant_index import VariantIndex
+
+    templates = {row.get("template_item") for row in _iter_rows(partition_path)} - {""}
+    index = VariantIndex(templates)
+    weights = _get_template_weights(list(templates)) if templates else {}
+    contexts: Dict[str, frappe._dict] = {}
+    template_errors: Dict[str, str] = {}
+    touched_templates = set()
+    frappe.flags.vbc_bulk_variants = True
+
+    def commit():
+        # One template change notice per commit instead of one per variant
+        publish_templates_changed(touched_templates)
+        touched_templates.clear()
+        frappe.db.commit()
+
+    def fail(line, template_item, message):
+        counts["failed"] += 1
+        errors.writerow([line, template_item, strip_html(str(message))])
+
+    with open(partition_path, newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            row = frappe._dict(row)
+            line, template_item = row.pop(LINE_COLUMN), row.template_item
+            if not template_item:
+                fail(line, template_item, "Template Item is required")
+                continue
+
+            if template_item not in contexts and template_item not in template_errors:
+                try:
+                    contexts[template_item] = _get_template_context(template_item)
+                except Exception as exc:
+                    frappe.clear_last_message()
+                    template_errors[template_item] = str(exc)
+            if template_item in template_errors:
+                fail(line, template_item, template_errors[template_item])
+                continue
+
+            context = contexts[template_item]
+            attributes = context.get("attributes") or []
+            try:
+                values = _get_row_values(row, len(attributes))
+            except Exception as exc:
+                frappe.clear_last_message()
+                fail(line, template_item, exc)
+                continue
+
+            invalid = [
+                f"{attribute.get('name')}: {value or '-'}"
+                for attribute, allowed, value in zip(attributes, _get_allowed_values(context), values)
+                if value not in allowed
+            ]
+            if invalid:
+                fail(line, template_item, "Missing or invalid attribute values ({0})".format(", ".join(invalid)))
+                continue
+
+            args = {attribute.get("name"): value for attribute, value in zip(attributes, values)}
+            item_code = index.find(template_item, args)
+            if item_code:
+                counts["existing"] += 1
+                results.writerow([line, template_item, item_code, "existing"])
+                continue
+
+            frappe.db.savepoint("vbc_cli_variant")
+            try:
+                item_code = _create_variant(template_item, args, weights.get(template_item), row)
+            except Exception as exc:
+                frappe.db.rollback(save_point="vbc_cli_variant")
+                frappe.clear_last_message()
+                fail(line, template_item, exc)
+                continue
+
+            index.add(template_item, args, item_code)
+            counts["created"] += 1
+            touched_templates.add(template_item)
+            results.writerow([line, template_item, item_code, "created"])
+
+            if counts["created"] % commit_every == 0:
+                commit()
+
+    commit()
+
+
+def merge_outputs(paths: List[str], columns: List[str], output_path: str) -> None:
+    """Merge per-worker CSVs (each in line order) into one file in line order."""
+
+    handles = [open(path, newline="", encoding="utf-8") for path in paths]
+    try:
+        readers = [((int(row[0]), row) for row in csv.reader(handle)) for handle in handles]
+        with open(output_path, "w", newline="", encoding="utf-8") as output:
+            writer = csv.writer(output)
+            writer.writerow(columns)
+            for _line, row in heapq.merge(*readers, key=lambda item: item[0]):
+                writer.writerow(row)
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+def run_import(
+    site: str,
+    path: str,
+    workers: int = 1,
+    commit_every: int = 200,
+    output_dir: Optional[str] = None,
+) -> Dict[str, object]:
+    """Create the variants listed in ``path`` using ``workers`` processes.
+
+    Returns the summed counts and the paths of the merged results and errors files.
+    """
+
+    sites_path = os.getcwd()
+    base_name = os.path.splitext(os.path.basename(path))[0]
+    output_dir = output_dir or os.path.dirname(os.path.abspath(path))
+    result_file = os.path.join(output_dir, f"{base_name}.results.csv")
+    error_file = os.path.join(output_dir, f"{base_name}.errors.csv")
+
+    work_dir = tempfile.mkdtemp(prefix="vbc-create-variants-")
+    try:
+        partitions = partition_file(path, workers, work_dir)
+        result_parts = [f"{partition}.results" for partition in partitions]
+        error_parts = [f"{partition}.errors" for partition in partitions]
+
+        # spawn, not fork: every worker opens its own connection from a clean interpreter
+        with ProcessPoolExecutor(max_workers=len(partitions), mp_context=get_context("spawn")) as pool:
+            futures = [
+                pool.submit(
+                    process_partition, site, sites_path, partition, result_part, error_part, max(1, commit_every)
+                )
+                for partition, result_part, error_part in zip(partitions, result_parts, error_parts)
+            ]
+            worker_counts = [future.result() for future in futures]
+
+        merge_outputs(result_parts, RESULT_COLUMNS, result_file)
+        merge_outputs(error_parts, ERROR_COLUMNS, error_file)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    totals: Dict[str, object] = {
+        key: sum(counts[key] for counts in worker_counts) for key in ("created", "existing", "failed")
+    }
+    totals.update({"workers": len(partitions), "results_file": result_file, "errors_file": error_file})
+    return totals
@@ -0,0 +1,308 @@
+"""Bulk variant materialisation for external integrations.
+
+Configurators and shops that need many variants post one JSON-lines body to
+``bulk_create_variants`` instead of calling ``create_variant_for_sales_attributes``
+once per variant. Every line is a spec::
+
+    {"template_item": "PROFILE-40", "attributes": {"vbc_length": 6, "vbc_powder_code": "RAL 9016", "vbc_sticker": "No Sticker"}, "ref": "cart-17"}
+
+``attributes`` uses the same keys as ``create_variant_for_sales_attributes``
+and ``ref`` is echoed back untouched. Each line yields one result::
+
+    {"line": 1, "ref": "cart-17", "template_item": "PROFILE-40", "item_code": "PROFILE-40-6-RAL9016", "status": "created", "error": null}
+
+with ``status`` one of ``created``, ``existing`` or ``error``.
+
+Specs are read in batches of ``BATCH_SIZE`` lines; each batch loads template
+metadata and the existing variants of its templates in a handful of queries
+and is processed template by template, so memory is bounded by the batch
+rather than the body. Small bodies are answered inline. Larger ones are saved
+to a file and processed by a background job which appends results to a
+private JSON-lines file as it goes; clients tail it with
+``get_bulk_variant_results`` until the final ``{"done": true, ...}`` summary.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import frappe
+from frappe import _
+from frappe.utils import cint, strip_html
+
+from .doctype.variant_creation_tool.variant_creation_tool import (
+    _create_variant,
+    _get_sales_attribute_args,
+    _get_template_context,
+    _get_template_contexts,
+)
+from .template_events import publish_templates_changed
+from .variant_index import VariantIndex
+
+BATCH_SIZE = 500
+SYNC_LINE_LIMIT = 100
+MAX_TAIL_BYTES = 1024 * 1024
+FOLDER = "vbc_bulk_variants"
+REALTIME_EVENT = "vbc_bulk_variants"
+
+Spec = Tuple[int, Optional[dict], Optional[str]]
+
+
+def iter_specs(lines: Iterable[str]) -> Iterator[Spec]:
+    """Yield ``(line number, spec, error)`` for every non-blank line."""
+
+    for line_no, text in enumerate(lines, start=1):
+        text = text.strip()
+        if not text:
+            continue
+
+        try:
+            spec = json.loads(text)
+        except ValueError as exc:
+            yield line_no, None, _("Invalid JSON: {0}").format(exc)
+            continue
+
+        if not isinstance(spec, dict) or not spec.get("template_item"):
+            yield line_no, spec if isinstance(spec, dict) else None, _("template_item is required")
+            continue
+
+        yield line_no, spec, None
+
+
+def _make_result(line_no: int, spec: Optional[dict], status: str, item_code=None, error=None) -> dict:
+    spec = spec or {}
+    return {
+        "line": line_no,
+        "ref": spec.get("ref"),
+        "template_item": spec.get("template_item"),
+        "item_code": item_code,
+        "status": status,
+        "error": strip_html(str(error)) if error else None,
+    }
+
+
+def _process_batch(batch: List[Spec]) -> List[dict]:
+    contexts = _get_template_contexts([spec["template_item"] for _line, spec, error in batch if not error])
+    index = VariantIndex(contexts)
+
+    results: Dict[int, dict] = {}
+    groups: Dict[str, List[Tuple[int, dict]]] = {}
+    for line_no, spec, error in batch:
+        if error:
+            results[line_no] = _make_result(line_no, spec, "error", error=error)
+        else:
+            groups.setdefault(spec["template_item"], []).append((line_no, spec))
+
+    for template_item, specs in groups.items():
+        context = contexts.get(template_item)
+        if not context:
+            # The batched loader skips unusable templates; the single loader explains why
+            try:
+                context = _get_template_context(template_item)
+            except Exception as exc:
+                frappe.clear_last_message()
+                for line_no, spec in specs:
+                    results[line_no] = _make_result(line_no, spec, "error", error=exc)
+                continue
+
+        for line_no, spec in specs:
+            try:
+                args = _get_sales_attribute_args(context, spec.get("attributes") or {})
+            except Exception as exc:
+                frappe.clear_last_message()
+                results[line_no] = _make_result(line_no, spec, "error", error=exc)
+                continue
+
+            item_code = index.find(template_item, args)
+            if item_code:
+                results[line_no] = _make_result(line_no, spec, "existing", item_code)
+                continue
+
+            frappe.db.savepoint("vbc_bulk_variant")
+            try:
+                item_code = _create_variant(template_item, args, None)
+            except Exception as exc:
+                frappe.db.rollback(save_point="vbc_bulk_variant")
+                frappe.clear_last_message()
+                results[line_no] = _make_result(line_no, spec, "error", error=exc)
+                continue
+
+            index.add(template_item, args, item_code)
+            results[line_no] = _make_result(line_no, spec, "created", item_code)
+
+    return [results[line_no] for line_no, _spec, _error in batch]
+
+
+def materialise_specs(lines: Iterable[str], batch_size: int = BATCH_SIZE) -> Iterator[dict]:
+    """Yield one result per spec line, in input order, batch by batch.
+
+    Each batch announces one template change for the templates it created
+    variants of, published when the caller commits.
+    """
+
+    frappe.flags.vbc_bulk_variants = True
+    specs = iter_specs(lines)
+    while True:
+        batch = list(itertools.islice(specs, batch_size))
+        if not batch:
+            return
+        results = _process_batch(batch)
+        publish_templates_changed(row["template_item"] for row in results if row["status"] == "created")
+        yield from results
+
+
+def _get_job_paths(job_id: str) -> Tuple[str, str, str]:
+    """Return the input path, result path and result file URL of a job."""
+
+    if not re.fullmatch(r"[a-z0-9]+", job_id or ""):
+        frappe.throw(_("Invalid job id."))
+
+    folder = frappe.get_site_path("private", "files", FOLDER)
+    return (
+        os.path.join(folder, f"{job_id}.input.jsonl"),
+        os.path.join(folder, f"{job_id}.jsonl"),
+        f"/private/files/{FOLDER}/{job_id}.jsonl",
+    )
+
+
+def run_bulk_variant_job(job_id: str, user: str) -> None:
+    """Background job: materialise the saved specs, appending results as each batch commits."""
+
+    frappe.set_user(user)
+    input_path, result_path, _file_url = _get_job_paths(job_id)
+
+    counts = {"created": 0, "existing": 0, "error": 0}
+    summary: dict = {"done": True}
+    try:
+        with open(input_path, encoding="utf-8") as source, open(result_path, "a", encoding="utf-8") as target:
+
+            def flush(rows: List[dict]) -> None:
+                # Results only become visible once the variants they report are committed
+                frappe.db.commit()
+                for row in rows:
+                    counts[row["status"]] += 1
+                    target.write(json.dumps(row) + "\n")
+                target.flush()
+
+            pending: List[dict] = []
+            for result in materialise_specs(source):
+                pending.append(result)
+                if len(pending) >= BATCH_SIZE:
+                    flush(pending)
+                    pending = []
+            flush(pending)
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(title="Variant Bulk Creation - Bulk Variants", message=frappe.get_traceback())
+        summary["error"] = _("The job failed, see Error Log for details.")
+    finally:
+        summary.update(counts)
+        with open(result_path, "a", encoding="utf-8") as target:
+            target.write(json.dumps(summary) + "\n")
+        if os.path.exists(input_path):
+            os.remove(input_path)
+
+    frappe.publish_realtime(REALTIME_EVENT, dict(summary, job_id=job_id), user=user)
+
+
+def _read_body(specs) -> List[str]:
+    if specs is None:
+        specs = frappe.request.get_data(as_text=True) if frappe.request else ""
+    if isinstance(specs, str):
+        return specs.splitlines()
+    return [json.dumps(spec) for spec in specs]
+
+
+@frappe.whitelist()
+def bulk_create_variants(specs=None) -> frappe._dict:
+    """Create or find variants for a JSON-lines body of specs.
+
+    ``specs`` may be passed as a parameter (JSON-lines text or a list of
+    spec objects); otherwise the raw request body is read. Bodies of up to
+    ``SYNC_LINE_LIMIT`` specs return ``results`` directly. Larger bodies
+    return a ``job_id`` and the ``results_url`` of the file the job writes.
+    """
+
+    frappe.has_permission("Item", "create", throw=True)
+
+    lines = _read_body(specs)
+    spec_count = sum(1 for line in lines if line.strip())
+    if not spec_count:
+        frappe.throw(_("No variant specs were provided."))
+
+    sync_limit = cint(frappe.conf.get("vbc_bulk_variants_sync_limit")) or SYNC_LINE_LIMIT
+    if spec_count <= sync_limit:
+        return frappe._dict({"results": list(materialise_specs(lines))})
+
+    job_id = frappe.generate_hash(length=16).lower()
+    input_path, result_path, file_url = _get_job_paths(job_id)
+    os.makedirs(os.path.dirname(input_path), exist_ok=True)
+    with open(input_path, "w", encoding="utf-8") as handle:
+        handle.writelines(line + "\n" for line in lines)
+    open(result_path, "w").close()
+
+    # Register the result file so the usual private file permissions apply to it
+    frappe.get_doc(
+        {
+            "doctype": "File",
+            "file_name": f"{job_id}.jsonl",
+            "file_url": file_url,
+            "is_private": 1,
+        }
+    ).insert(ignore_permissions=True)
+
+    frappe.enqueue(
+        "variant_bulk_creation.variant_bulk_creation.bulk_variants.run_bulk_variant_job",
+        queue="long",
+        timeout=6 * 3600,
+        enqueue_after_commit=True,
+        job_id=job_id,
+        user=frappe.session.user,
+    )
+
+    return frappe._dict({"job_id": job_id, "results_url": file_url, "specs": spec_count})
+
+
+@frappe.whitelist()
+def get_bulk_variant_results(job_id: str, offset: int = 0) -> frappe._dict:
+    """Return the results written since byte ``offset`` of a bulk job.
+
+    Pass the returned ``offset`` back on the next call. ``done`` is set once
+    the job has written its summary, which is returned as ``summary``.
+    """
+
+    _input_path, result_path, file_url = _get_job_paths(job_id)
+    file_name = frappe.db.get_value("File", {"file_url": file_url}, "name")
+    if not file_name:
+        frappe.throw(_("Bulk variant job {0} was not found.").format(job_id), frappe.DoesNotExistError)
+    frappe.has_permission("File", "read", doc=frappe.get_doc("File", file_name), throw=True)
+
+    offset = cint(offset)
+    with open(result_path, "rb") as handle:
+        handle.seek(offset)
+        chunk = handle.read(MAX_TAIL_BYTES)
+
+    # Only hand out complete lines; a partial last line is read next time
+    complete = chunk[: chunk.rfind(b"\n") + 1]
+
+    results: List[dict] = []
+    summary = None
+    for text in complete.decode("utf-8").splitlines():
+        row = json.loads(text)
+        if row.get("done"):
+            summary = row
+        else:
+            results.append(row)
+
+    return frappe._dict(
+        {
+            "results": results,
+            "offset": offset + len(complete),
+            "done": summary is not None,
+            "summary": summary,
+        }
+    )
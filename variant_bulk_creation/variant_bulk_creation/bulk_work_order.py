@@ -0,0 +1,160 @@
+"""Bulk Work Order creation from Sales Orders with pieces carried over."""
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+import frappe
+from frappe import _
+from frappe.utils import flt
+
+from .work_order import _prorate_pcs
+
+BATCH_SIZE = 50
+REALTIME_EVENT = "vbc_bulk_work_orders"
+
+
+def _get_sales_order_snapshot(sales_orders: List[str]) -> list:
+    """Return every Sales Order row still needing a Work Order, with BOM and department.
+
+    One query for all selected orders; quantities already covered by
+    non-cancelled Work Orders (including drafts) are reported as ``ordered_qty``.
+    """
+
+    return frappe.db.sql(
+        """
+        SELECT
+            so.name AS sales_order,
+            so.company,
+            so.project,
+            soi.name AS sales_order_item,
+            soi.item_code,
+            soi.description,
+            soi.stock_qty,
+            soi.total_weight,
+            soi.warehouse,
+            bom.name AS bom_no,
+            bom.department,
+            (
+                SELECT IFNULL(SUM(wo.qty), 0)
+                FROM `tabWork Order` wo
+                WHERE wo.sales_order_item = soi.name
+                    AND wo.docstatus < 2
+            ) AS ordered_qty
+        FROM `tabSales Order` so
+        INNER JOIN `tabSales Order Item` soi
+            ON soi.parent = so.name
+            AND soi.parenttype = 'Sales Order'
+        INNER JOIN `tabItem` item ON item.name = soi.item_code
+        LEFT JOIN `tabBOM` bom
+            ON bom.name = COALESCE(NULLIF(soi.bom_no, ''), item.default_bom)
+        WHERE so.name IN %(sales_orders)s
+            AND so.docstatus = 1
+        ORDER BY so.name, soi.idx
+        """,
+        {"sales_orders": tuple(sales_orders)},
+        as_dict=True,
+    )
+
+
+def _build_work_order(row: frappe._dict, qty: float):
+    work_order = frappe.new_doc("Work Order")
+    work_order.update(
+        {
+            "production_item": row.item_code,
+            "bom_no": row.bom_no,
+            "qty": qty,
+            "company": row.company,
+            "sales_order": row.sales_order,
+            "sales_order_item": row.sales_order_item,
+            "project": row.project,
+            "fg_warehouse": row.warehouse,
+            "wip_warehouse": frappe.db.get_single_value("Manufacturing Settings", "default_wip_warehouse"),
+            "description": row.description,
+            "department": row.department,
+            "total_pcs": _prorate_pcs(row.total_weight, qty, row.stock_qty) if row.total_weight else 0,
+        }
+    )
+    # total_pcs comes from the snapshot; skip the per-document Sales Order lookup
+    work_order.flags.vbc_total_pcs_set = True
+    work_order.set_work_order_operations()
+    return work_order
+
+
+def make_work_orders_for_sales_orders(sales_orders: List[str], user: Optional[str] = None) -> frappe._dict:
+    """Background job: create the missing Work Orders for the given Sales Orders.
+
+    Rows are inserted in batches committed together; a failing row is rolled
+    back to its savepoint and reported without affecting the rest.
+    """
+
+    created: List[str] = []
+    errors: List[dict] = []
+    pending = []
+
+    for row in _get_sales_order_snapshot(sales_orders):
+        qty = flt(row.stock_qty) - flt(row.ordered_qty)
+        if qty <= 0:
+            continue
+        if not row.bom_no:
+            errors.append(
+                {
+                    "sales_order": row.sales_order,
+                    "item_code": row.item_code,
+                    "error": _("No default BOM found for Item {0}").format(row.item_code),
+                }
+            )
+            continue
+        pending.append((row, qty))
+
+    for start in range(0, len(pending), BATCH_SIZE):
+        for row, qty in pending[start : start + BATCH_SIZE]:
+            frappe.db.savepoint("vbc_work_order")
+            try:
+                work_order = _build_work_order(row, qty)
+                work_order.insert()
+                created.append(work_order.name)
+            except Exception as exc:
+                frappe.db.rollback(save_point="vbc_work_order")
+                frappe.clear_last_message()
+                errors.append({"sales_order": row.sales_order, "item_code": row.item_code, "error": str(exc)})
+
+        frappe.db.commit()
+        frappe.publish_realtime(
+            REALTIME_EVENT,
+            {"processed": min(start + BATCH_SIZE, len(pending)), "total": len(pending)},
+            user=user,
+        )
+
+    if errors:
+        frappe.log_error(
+            title="Variant Bulk Creation - Bulk Work Orders",
+            message=frappe.as_json(errors),
+        )
+
+    result = frappe._dict({"created": created, "errors": errors, "done": True})
+    frappe.publish_realtime(REALTIME_EVENT, result, user=user)
+    return result
+
+
+@frappe.whitelist()
+def enqueue_work_orders_for_sales_orders(sales_orders) -> None:
+    """Queue Work Order creation for the selected submitted Sales Orders."""
+
+    frappe.has_permission("Work Order", "create", throw=True)
+
+    parsed = frappe.parse_json(sales_orders) if isinstance(sales_orders, str) else sales_orders
+    if not parsed:
+        frappe.throw(_("Select at least one Sales Order."))
+
+    frappe.enqueue(
+        "variant_bulk_creation.variant_bulk_creation.bulk_work_order.make_work_orders_for_sales_orders",
+        queue="long",
+        timeout=3600,
+        sales_orders=list(parsed),
+        user=frappe.session.user,
+    )
+    frappe.msgprint(
+        _("Work Order creation has been queued for {0} Sales Order(s).").format(len(parsed)),
+        alert=True,
+    )
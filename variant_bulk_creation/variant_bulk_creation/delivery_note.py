@@ -1,45 +1,94 @@
-"""Delivery Note helpers for populating total_pcs in Stock Ledger Entry."""
+"""Delivery Note helpers for populating total_pcs from the Sales Order."""
 
 from __future__ import annotations
 
 from typing import Optional
 
 import frappe
+from frappe.utils import flt
 
+from .work_order import _prorate_pcs
 
-def populate_total_pcs_in_stock_ledger(doc, _event: Optional[str] = None) -> None:
-    """Populate total_pcs in Stock Ledger Entry from Delivery Note Item.
 
-    This function is called when a Delivery Note is submitted and Stock Ledger Entries
-    are created. It copies the total_pcs value from Delivery Note Item to the
-    corresponding Stock Ledger Entry.
+def _get_pcs_sources(item_codes, so_details) -> tuple[dict, dict]:
+    """Return ``({item_code: weight_per_unit}, {so_detail: (total_weight, stock_qty)})``.
+
+    One query driven by the items, with the Sales Order rows joined on, so the
+    cost does not grow with the number of Delivery Note rows.
+    """
+
+    rows = frappe.db.sql(
+        """
+        SELECT
+            item.name AS item_code,
+            item.weight_per_unit,
+            soi.name AS so_detail,
+            soi.total_weight,
+            soi.stock_qty
+        FROM `tabItem` item
+        LEFT JOIN `tabSales Order Item` soi
+            ON soi.item_code = item.name
+            AND soi.name IN %(so_details)s
+        WHERE item.name IN %(item_codes)s
+        """,
+        {
+            "item_codes": tuple(item_codes),
+            # IN () is invalid SQL; an empty string never matches a row name
+            "so_details": tuple(so_details) or ("",),
+        },
+        as_dict=True,
+    )
+
+    weights = {}
+    sales_order_pcs = {}
+    for row in rows:
+        weights[row.item_code] = flt(row.weight_per_unit)
+        if row.so_detail and row.total_weight:
+            sales_order_pcs[row.so_detail] = (flt(row.total_weight), flt(row.stock_qty))
+
+    return weights, sales_order_pcs
+
+
+def _is_auto_filled(row) -> bool:
+    """True when total_pcs is empty or still the value this hook computed last time."""
+
+    if not row.get("total_pcs"):
+        return True
+    return bool(row.get("vbc_total_pcs_auto")) and flt(row.total_pcs, 3) == flt(row.vbc_total_pcs_auto, 3)
+
+
+def populate_total_pcs_from_sales_order(doc, _event: Optional[str] = None) -> None:
+    """Fill Delivery Note Item.total_pcs before validation.
+
+    Rows delivered against a Sales Order get the pieces of their Sales Order
+    row (total_weight) pro-rated by stock quantity; other rows fall back to
+    ``stock_qty x weight_per_unit``. The computed value is remembered in
+    ``vbc_total_pcs_auto`` so it is recomputed when the quantity changes,
+    while values entered by the user are kept.
     """
 
-    # Only process Delivery Note documents
     if doc.doctype != "Delivery Note":
         return
 
-    # Get all Delivery Note Item rows
-    for item_row in doc.get("items", []):
-        total_pcs = item_row.get("total_pcs")
+    rows = [row for row in doc.get("items", []) if row.item_code and _is_auto_filled(row)]
+    if not rows:
+        return
+
+    weights, sales_order_pcs = _get_pcs_sources(
+        {row.item_code for row in rows},
+        {row.so_detail for row in rows if row.get("so_detail")},
+    )
+
+    for row in rows:
+        stock_qty = row.get("stock_qty") or flt(row.qty) * flt(row.conversion_factor or 1)
 
-        # Skip if no total_pcs value
-        if not total_pcs:
+        if row.get("so_detail") in sales_order_pcs:
+            pcs, so_stock_qty = sales_order_pcs[row.so_detail]
+            total_pcs = _prorate_pcs(pcs, stock_qty, so_stock_qty)
+        elif weights.get(row.item_code):
+            total_pcs = flt(flt(stock_qty) * weights[row.item_code], 3)
+        else:
             continue
 
-        # Find corresponding Stock Ledger Entries for this item
-        # Stock Ledger Entries are created with voucher_type="Delivery Note" and voucher_no=doc.name
-        sle_list = frappe.get_all(
-            "Stock Ledger Entry",
-            filters={
-                "voucher_type": "Delivery Note",
-                "voucher_no": doc.name,
-                "item_code": item_row.item_code,
-                "voucher_detail_no": item_row.name,
-            },
-            pluck="name"
-        )
-
-        # Update each Stock Ledger Entry with total_pcs
-        for sle_name in sle_list:
-            frappe.db.set_value("Stock Ledger Entry", sle_name, "total_pcs", total_pcs, update_modified=False)
+        row.total_pcs = total_pcs
+        row.vbc_total_pcs_auto = total_pcs
@@ -0,0 +1,12 @@
+# SPDX-License-Identifier: MIT
+
+import frappe
+from frappe.model.document import Document
+
+
+class PiecesBin(Document):
+    """Running balance in pieces per item and warehouse, maintained by the ledger hooks."""
+
+
+def on_doctype_update():
+    frappe.db.add_unique("Pieces Bin", ["item_code", "warehouse"], constraint_name="unique_item_warehouse")
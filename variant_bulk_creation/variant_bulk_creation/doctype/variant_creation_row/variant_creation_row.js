@@ -9,9 +9,27 @@ frappe.ui.form.on('Variant Creation Row', {
 
 	attribute_value_3: function(frm, cdt, cdn) {
 		calculate_weight_preview(frm, cdt, cdn);
+	},
+
+	attribute_values: function(frm, cdt, cdn) {
+		calculate_weight_preview(frm, cdt, cdn);
 	}
 });
 
+function get_row_attribute_values(row) {
+	// attribute_values holds the full tuple (JSON list) for templates with more than three attributes
+	if (row.attribute_values) {
+		try {
+			let values = JSON.parse(row.attribute_values);
+			if (Array.isArray(values)) return values;
+		} catch (e) {
+			// Invalid JSON is reported by the server on Create Variants
+		}
+	}
+
+	return [row.attribute_value, row.attribute_value_2, row.attribute_value_3];
+}
+
 function calculate_weight_preview(frm, cdt, cdn) {
 	let row = locals[cdt][cdn];
 
@@ -61,7 +79,7 @@ function calculate_weight_preview(frm, cdt, cdn) {
 
 function extract_length_from_attributes(row) {
 	// Try to extract length from any attribute value
-	let attributes = [row.attribute_value, row.attribute_value_2, row.attribute_value_3];
+	let attributes = get_row_attribute_values(row);
 
 	for (let attr of attributes) {
 		if (!attr) continue;
@@ -75,12 +93,12 @@ function extract_length_from_attributes(row) {
 
 function check_sticker_from_attributes(row) {
 	// Check if any attribute indicates "with sticker"
-	let attributes = [row.attribute_value, row.attribute_value_2, row.attribute_value_3];
+	let attributes = get_row_attribute_values(row);
 
 	for (let attr of attributes) {
 		if (!attr) continue;
 
-		let attr_lower = attr.toLowerCase();
+		let attr_lower = attr.toString().toLowerCase();
 		if (attr_lower.includes('sticker') && !attr_lower.includes('no')) {
 			return true;
 		} else if (attr_lower.includes('no') && attr_lower.includes('sticker')) {
@@ -105,6 +123,9 @@ function extract_numeric_value(attribute_value) {
 		return parseFloat(match[1]);
 	}
 
+	return null;
+}
+
 function detect_sticker_from_attribute(attribute_value) {
 	if (!attribute_value) return false;
 
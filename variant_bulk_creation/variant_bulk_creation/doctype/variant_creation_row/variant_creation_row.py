@@ -8,6 +8,6 @@ class VariantCreationRow(Document):
     """Child table row used when preparing item variants."""
 
     def validate(self):
-        """Ensure the attribute value is provided."""
-        if not self.attribute_value:
+        """Ensure the attribute values are provided."""
+        if not (self.attribute_value or self.attribute_values):
             frappe.throw(frappe._("Attribute Value is required."))
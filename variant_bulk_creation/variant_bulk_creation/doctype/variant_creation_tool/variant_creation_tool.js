@@ -2,6 +2,8 @@
 
 const FETCH_TEMPLATE_METHOD =
     'variant_bulk_creation.variant_bulk_creation.doctype.variant_creation_tool.variant_creation_tool.fetch_template_details';
+const ENQUEUE_COMBINATIONS_METHOD =
+    'variant_bulk_creation.variant_bulk_creation.doctype.variant_creation_tool.variant_creation_tool.enqueue_variant_combinations';
 
 function ensureAttributeCache(frm) {
     frm._variant_attribute_map = frm._variant_attribute_map || {};
@@ -17,6 +19,25 @@ function getTemplateAttribute(frm, template) {
     return frm._variant_attribute_map[template] || null;
 }
 
+variant_bulk_creation.templates.register_cache('Variant Creation Tool', (frm, templates) => {
+    ensureAttributeCache(frm);
+    templates.forEach((template) => delete frm._variant_attribute_map[template]);
+
+    // The selected template drives the weight preview and the combinations dialog; reload it
+    const template = frm.doc.template_item;
+    if (template && templates.includes(template)) {
+        frappe.call({
+            method: FETCH_TEMPLATE_METHOD,
+            args: { template_item: template },
+        }).then((response) => {
+            if (response.message) {
+                cacheTemplateAttribute(frm, template, response.message.attributes);
+            }
+        });
+        fetchTemplateWeightConfig(frm, template);
+    }
+});
+
 function getAttributeForField(attributes, fieldname) {
     const fieldOrder = ['attribute_value', 'attribute_value_2', 'attribute_value_3'];
     const index = fieldOrder.indexOf(fieldname);
@@ -24,7 +45,7 @@ function getAttributeForField(attributes, fieldname) {
 }
 
 function clearRowAttributeValues(row) {
-    ['attribute_value', 'attribute_value_2', 'attribute_value_3'].forEach((field) => {
+    ['attribute_value', 'attribute_value_2', 'attribute_value_3', 'attribute_values'].forEach((field) => {
         frappe.model.set_value(row.doctype, row.name, field, null);
     });
 }
@@ -94,6 +115,8 @@ frappe.ui.form.on('Variant Creation Tool', {
                 }
             });
         }, __('Actions'));
+
+        frm.add_custom_button(__('Create All Combinations'), () => showCombinationsDialog(frm), __('Actions'));
     },
 
     template_item(frm) {
@@ -167,6 +190,83 @@ frappe.ui.form.on('Variant Creation Tool', {
     }
 });
 
+/**
+ * Pick values per attribute of the template and create every combination in a
+ * background job. Leaving an attribute unticked uses all of its values.
+ */
+function showCombinationsDialog(frm) {
+    const template = frm.doc.template_item;
+    const attributes = template && getTemplateAttribute(frm, template);
+    if (!attributes || !attributes.length) {
+        frappe.msgprint(__('Select a Template Item first.'));
+        return;
+    }
+
+    const fields = attributes.map((attr, index) => ({
+        fieldname: `attribute_${index}`,
+        fieldtype: 'MultiCheck',
+        label: attr.name,
+        columns: 4,
+        options: (attr.values || []).map((value) => ({
+            label: value.attribute_value,
+            value: value.attribute_value,
+        })),
+    }));
+
+    const dialog = new frappe.ui.Dialog({
+        title: __('Create All Combinations of {0}', [template]),
+        fields,
+        primary_action_label: __('Create'),
+        primary_action(values) {
+            const selected = {};
+            attributes.forEach((attr, index) => {
+                selected[attr.name] = values[`attribute_${index}`] || [];
+            });
+
+            frappe.call({
+                method: ENQUEUE_COMBINATIONS_METHOD,
+                args: { template_item: template, attribute_values: selected },
+                freeze: true,
+            }).then((response) => {
+                dialog.hide();
+                frappe.show_alert({
+                    message: __('Creating {0} combinations in the background.', [response.message.total]),
+                    indicator: 'blue',
+                });
+            });
+        },
+    });
+
+    dialog.show();
+}
+
+if (!frappe._vbc_combinations_listener) {
+    frappe._vbc_combinations_listener = true;
+    frappe.realtime.on('vbc_variant_combinations', (data) => {
+        if (!data || !data.done) {
+            if (data && data.total) {
+                frappe.show_progress(__('Creating Item Variants'), data.processed, data.total);
+            }
+            return;
+        }
+
+        frappe.hide_progress();
+        const errors = (data.errors || []).map(
+            (error) => `<li>${frappe.utils.escape_html(error.error)}</li>`
+        );
+        frappe.msgprint({
+            title: __('Variant Creation Summary'),
+            message: __('{0} created, {1} already existed, {2} failed for template {3}.', [
+                data.created,
+                data.existing,
+                data.failed,
+                frappe.utils.escape_html(data.template_item),
+            ]) + (errors.length ? `<ul>${errors.join('')}</ul>` : ''),
+            indicator: data.failed ? 'orange' : 'green',
+        });
+    });
+}
+
 function fetchTemplateWeightConfig(frm, template_item) {
     if (!template_item) {
         return;
@@ -188,7 +288,7 @@ function fetchTemplateWeightConfig(frm, template_item) {
 function recalculate_all_weights(frm) {
     // Trigger recalculation for all variant rows
     (frm.doc.variants || []).forEach((row) => {
-        if (row.attribute_value || row.attribute_value_2 || row.attribute_value_3) {
+        if (row.attribute_value || row.attribute_value_2 || row.attribute_value_3 || row.attribute_values) {
             frappe.run_serially([
                 () => frappe.model.trigger('attribute_value', row.doctype, row.name)
             ]);
@@ -3,20 +3,26 @@
 
 from __future__ import annotations
 
+import itertools
+import math
 from decimal import Decimal, InvalidOperation
-from typing import Any, Dict, List, Optional, Sequence
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import frappe
 from frappe import _
 from frappe.model.document import Document
 from frappe.model.rename_doc import rename_doc
+from frappe.utils import cint
 
-try:
-    from erpnext.controllers.item_variant import create_variant, get_variant
-except ImportError as exc:  # pragma: no cover - ERPNext not available in tests
-    raise ImportError(
-        "Variant Creation Tool requires ERPNext to be installed to create item variants."
-    ) from exc
+from variant_bulk_creation.variant_bulk_creation.template_events import publish_templates_changed
+from variant_bulk_creation.variant_bulk_creation.variant_index import VariantIndex
+
+# Row columns holding the first three attribute values; ``attribute_values``
+# holds the whole tuple as a JSON list for templates with more attributes.
+ROW_ATTRIBUTE_FIELDS = ("attribute_value", "attribute_value_2", "attribute_value_3")
+COMBINATIONS_REALTIME_EVENT = "vbc_variant_combinations"
+COMBINATIONS_COMMIT_EVERY = 200
+MAX_REPORTED_ERRORS = 100
 
 
 def _generate_numeric_values(attribute_doc) -> List[str]:
@@ -70,13 +76,6 @@ def _get_template_context(template_item: str) -> frappe._dict:
             )
         )
 
-    if len(attributes) > 3:
-        frappe.throw(
-            _(
-                "Template {0} has more than three attributes. This tool currently supports up to three attributes per template."
-            ).format(frappe.bold(item.name))
-        )
-
     attribute_contexts: List[Dict[str, Any]] = []
     for attribute in attributes:
         attribute_name = attribute.attribute
@@ -115,24 +114,103 @@ def _get_template_context(template_item: str) -> frappe._dict:
     )
 
 
-class VariantCreationTool(Document):
-    """Client side orchestrates the tool; server logic lives in helpers below."""
+def _get_template_contexts(template_items: Sequence[str]) -> Dict[str, frappe._dict]:
+    """Return variant attribute metadata for many templates using batched queries.
 
-    @frappe.whitelist()
-    def create_variants(self):
-        """DocType method invoked from the client button to create variants."""
+    Mirrors ``_get_template_context`` but issues one query per table instead of
+    one document load per template. Templates that cannot be used to create
+    variants are left out so callers can fall back to the single-template path,
+    which raises the descriptive error.
+    """
 
-        result = create_variants(self.as_dict())
-        if result:
-            self.creation_log = result.get("log") or ""
-        return result
+    templates = sorted({template for template in template_items or [] if template})
+    if not templates:
+        return {}
 
+    items = frappe.get_all(
+        "Item",
+        filters={"name": ["in", templates], "has_variants": 1},
+        fields=["name", "item_name"],
+    )
+    if not items:
+        return {}
+
+    template_attributes: Dict[str, List[str]] = {}
+    for row in frappe.get_all(
+        "Item Variant Attribute",
+        filters={"parent": ["in", [item.name for item in items]], "parenttype": "Item"},
+        fields=["parent", "attribute"],
+        order_by="parent asc, idx asc",
+    ):
+        if row.attribute:
+            template_attributes.setdefault(row.parent, []).append(row.attribute)
+
+    attribute_names = sorted({name for names in template_attributes.values() for name in names})
+    if not attribute_names:
+        return {}
+
+    attribute_docs = {
+        row.name: row
+        for row in frappe.get_all(
+            "Item Attribute",
+            filters={"name": ["in", attribute_names]},
+            fields=["name", "attribute_name", "numeric_values", "from_range", "to_range", "increment"],
+        )
+    }
 
-@frappe.whitelist()
-def fetch_template_details(template_item: str) -> frappe._dict:
-    """Return attribute metadata and helper text for the selected template item."""
+    allowed_values: Dict[str, List[Dict[str, Any]]] = {}
+    list_attributes = [name for name, doc in attribute_docs.items() if not doc.numeric_values]
+    if list_attributes:
+        for row in frappe.get_all(
+            "Item Attribute Value",
+            filters={"parent": ["in", list_attributes]},
+            fields=["parent", "attribute_value", "abbr"],
+            order_by="parent asc, idx asc",
+        ):
+            allowed_values.setdefault(row.parent, []).append(
+                {"attribute_value": row.attribute_value, "abbr": row.abbr}
+            )
+
+    for name, attribute_doc in attribute_docs.items():
+        if not attribute_doc.numeric_values:
+            continue
+        try:
+            generated_values = _generate_numeric_values(attribute_doc)
+        except frappe.ValidationError:
+            frappe.clear_last_message()
+            continue
+        allowed_values[name] = [
+            {"attribute_value": value, "abbr": value} for value in generated_values
+        ]
+
+    contexts: Dict[str, frappe._dict] = {}
+    for item in items:
+        names = template_attributes.get(item.name) or []
+        if not names:
+            continue
+        if any(not allowed_values.get(name) for name in names):
+            continue
+
+        contexts[item.name] = frappe._dict(
+            {
+                "attributes": [
+                    {
+                        "name": name,
+                        "values": allowed_values[name],
+                        "numeric": bool(attribute_docs[name].numeric_values),
+                    }
+                    for name in names
+                ],
+                "template_name": item.item_name or item.name,
+            }
+        )
+
+    return contexts
+
+
+def _format_template_details(context: frappe._dict) -> frappe._dict:
+    """Shape a template context into the payload consumed by the desk forms."""
 
-    context = _get_template_context(template_item)
     attributes = context.get("attributes") or []
     attribute_names = [attr.get("name") for attr in attributes if attr.get("name")]
     value_labels = {
@@ -154,6 +232,49 @@ def fetch_template_details(template_item: str) -> frappe._dict:
     )
 
 
+class VariantCreationTool(Document):
+    """Client side orchestrates the tool; server logic lives in helpers below."""
+
+    @frappe.whitelist()
+    def create_variants(self):
+        """DocType method invoked from the client button to create variants."""
+
+        result = create_variants(self.as_dict())
+        if result:
+            self.creation_log = result.get("log") or ""
+        return result
+
+
+@frappe.whitelist()
+def fetch_template_details(template_item: str) -> frappe._dict:
+    """Return attribute metadata and helper text for the selected template item."""
+
+    return _format_template_details(_get_template_context(template_item))
+
+
+@frappe.whitelist()
+def fetch_templates_details(template_items) -> Dict[str, frappe._dict]:
+    """Return attribute metadata for every template referenced by a document.
+
+    Called once on form load so row-level queries and the variant resolver find
+    the template metadata already cached instead of fetching it per template.
+    ``attribute``/``all_attributes`` mirror ``get_template_attribute`` for the
+    stock forms that cache that shape.
+    """
+
+    parsed = frappe.parse_json(template_items) if isinstance(template_items, str) else template_items
+
+    details: Dict[str, frappe._dict] = {}
+    for template_item, context in _get_template_contexts(parsed or []).items():
+        payload = _format_template_details(context)
+        attribute_names = [attr.get("name") for attr in payload.attributes]
+        payload.attribute = attribute_names[0] if attribute_names else None
+        payload.all_attributes = attribute_names
+        details[template_item] = payload
+
+    return details
+
+
 @frappe.whitelist()
 @frappe.validate_and_sanitize_search_inputs
 def search_attribute_values(
@@ -219,6 +340,36 @@ def search_attribute_values(
     ]
 
 
+def _get_row_values(row: Dict, attribute_count: int) -> Tuple[Optional[str], ...]:
+    """Return the attribute values of a row in template attribute order."""
+
+    encoded = row.get("attribute_values")
+    if encoded:
+        values = frappe.parse_json(encoded) if isinstance(encoded, str) else encoded
+        if not isinstance(values, list):
+            frappe.throw(_("Attribute Values must be a JSON list of values in template attribute order."))
+    else:
+        values = [row.get(fieldname) for fieldname in ROW_ATTRIBUTE_FIELDS]
+
+    values = [str(value) if value not in (None, "") else None for value in values[:attribute_count]]
+    return tuple(values + [None] * (attribute_count - len(values)))
+
+
+def _get_allowed_values(context: frappe._dict) -> List[set]:
+    """Return the allowed values of every template attribute, in attribute order."""
+
+    if context.get("allowed") is None:
+        context.allowed = [
+            {
+                str(value.get("attribute_value"))
+                for value in attribute.get("values") or []
+                if value.get("attribute_value")
+            }
+            for attribute in context.get("attributes") or []
+        ]
+    return context.allowed
+
+
 def _validate_rows(
     rows: Sequence[Dict], default_template: Optional[str]
 ) -> Dict[str, frappe._dict]:
@@ -239,22 +390,13 @@ def _validate_rows(
             contexts[template_item] = _get_template_context(template_item)
 
         attributes = contexts[template_item].get("attributes") or []
-        for attr_index, attribute in enumerate(attributes):
-            allowed_values = attribute.get("values") or []
-            allowed = {
-                str(value.get("attribute_value"))
-                for value in allowed_values
-                if value.get("attribute_value")
-            }
-
-            fieldnames = ["attribute_value", "attribute_value_2", "attribute_value_3"]
-            attribute_value = row.get(fieldnames[attr_index]) if attr_index < len(fieldnames) else None
-
+        values = _get_row_values(row, len(attributes))
+        for attribute, allowed, attribute_value in zip(
+            attributes, _get_allowed_values(contexts[template_item]), values
+        ):
             if not attribute_value:
                 missing_attribute_rows.append(f"{idx + 1} ({attribute.get('name')})")
-                continue
-
-            if str(attribute_value) not in allowed:
+            elif attribute_value not in allowed:
                 invalid_values.append(
                     (idx + 1, attribute_value, template_item, attribute.get("name") or _("Unknown"))
                 )
@@ -309,6 +451,12 @@ def _detect_sticker_from_attribute(attribute_value: str) -> bool:
     attr_lower = str(attribute_value).strip().lower()
     return attr_lower != 'no sticker'
 
+
+def _calculate_weight_from_attributes(
+    variant_doc, weight_per_meter_with_sticker, weight_per_meter_no_sticker
+) -> Optional[float]:
+    """Return length × kg/meter for the variant, picking kg/meter by its sticker attribute."""
+
     # Extract length from attributes
     length = None
     sticker_value = None
@@ -354,30 +502,25 @@ def _format_attribute_summary(attributes: Sequence[Dict[str, Any]]) -> str:
     )
 
 
-@frappe.whitelist()
-def create_variant_for_sales_attributes(template_item: str, attributes: Dict[str, Any]):
-    """Create (or fetch) an item variant from Sales Order row attribute selections."""
+SALES_ATTRIBUTE_FIELDS = {
+    "powder": "vbc_powder_code",
+    "sticker": "vbc_sticker",
+    "length": "vbc_length",
+}
 
-    parsed_attributes = (
-        frappe.parse_json(attributes) if isinstance(attributes, str) else attributes or {}
-    )
-    context = _get_template_context(template_item)
-    attribute_defs = context.get("attributes") or []
-    field_map = {
-        "powder": "vbc_powder_code",
-        "sticker": "vbc_sticker",
-        "length": "vbc_length",
-    }
+
+def _get_sales_attribute_args(context: frappe._dict, attributes: Dict[str, Any]) -> Dict[str, Any]:
+    """Map Sales Order style attribute selections onto the template attributes."""
 
     args: Dict[str, Any] = {}
     missing: List[str] = []
-    for idx, attribute in enumerate(attribute_defs):
+    for attribute in context.get("attributes") or []:
         attr_name = attribute.get("name") or ""
         attr_key = attr_name.lower()
-        matched_field = next((field for key, field in field_map.items() if key in attr_key), None)
+        matched_field = next((field for key, field in SALES_ATTRIBUTE_FIELDS.items() if key in attr_key), None)
         fieldname = matched_field or attr_name
 
-        value = parsed_attributes.get(fieldname)
+        value = attributes.get(fieldname)
         if not value:
             missing.append(attribute.get("name"))
             continue
@@ -395,6 +538,20 @@ def create_variant_for_sales_attributes(template_item: str, attributes: Dict[str
     if missing:
         frappe.throw(_("Attribute values are required for: {0}").format(", ".join(missing)))
 
+    return args
+
+
+@frappe.whitelist()
+def create_variant_for_sales_attributes(template_item: str, attributes: Dict[str, Any]):
+    """Create (or fetch) an item variant from Sales Order row attribute selections."""
+
+    parsed_attributes = (
+        frappe.parse_json(attributes) if isinstance(attributes, str) else attributes or {}
+    )
+    args = _get_sales_attribute_args(_get_template_context(template_item), parsed_attributes)
+
+    from erpnext.controllers.item_variant import create_variant, get_variant
+
     existing = get_variant(template_item, args)
     if existing:
         item_doc = frappe.get_doc("Item", existing)
@@ -424,6 +581,85 @@ def create_variant_for_sales_attributes(template_item: str, attributes: Dict[str
     )
 
 
+def _get_template_weights(template_items: Sequence[str]) -> Dict[str, frappe._dict]:
+    """Return the kg/meter configuration of the templates in one query."""
+
+    return {
+        row.name: row
+        for row in frappe.get_all(
+            "Item",
+            filters={"name": ["in", sorted(set(template_items))]},
+            fields=["name", "weight_per_meter_with_sticker", "weight_per_meter_no_sticker"],
+        )
+    }
+
+
+def _create_variant(
+    template_item: str,
+    args: Dict[str, Any],
+    weights: Optional[frappe._dict],
+    row: Optional[frappe._dict] = None,
+) -> str:
+    """Create the variant for ``args`` and return its item code.
+
+    ``row`` carries the optional item code, name, SKU and description typed
+    into the tool.
+    """
+
+    # ERPNext's variant controller is only loaded once a variant is actually created
+    from erpnext.controllers.item_variant import create_variant, get_variant
+
+    row = row or frappe._dict()
+
+    variant_doc = create_variant(template_item, args)
+    if isinstance(variant_doc, str):
+        variant_doc = frappe.get_doc("Item", variant_doc)
+
+    # Rename variant if a custom code is provided
+    if row.item_code and row.item_code != variant_doc.name:
+        rename_doc("Item", variant_doc.name, row.item_code, force=True)
+        variant_doc = frappe.get_doc("Item", row.item_code)
+
+    # ``create_variant`` should insert the record, but if a custom app or
+    # hook short-circuited the insertion the returned document might not
+    # exist yet. Guard against that so the user actually gets the item.
+    if not frappe.db.exists("Item", variant_doc.name):
+        variant_doc.flags.ignore_permissions = True
+        variant_doc.insert()
+        variant_doc.reload()
+
+    updates = {}
+    if row.item_name:
+        updates["item_name"] = row.item_name
+    if row.variant_sku:
+        updates["sku"] = row.variant_sku
+    if row.description:
+        updates["description"] = row.description
+
+    # Calculate and set weight based on variant attributes and kg/meter from template
+    if weights:
+        calculated_weight = _calculate_weight_from_attributes(
+            variant_doc,
+            weights.weight_per_meter_with_sticker,
+            weights.weight_per_meter_no_sticker,
+        )
+        if calculated_weight:
+            updates["weight_per_unit"] = calculated_weight
+            updates["weight_uom"] = "pcs"
+
+    if updates:
+        variant_doc.update(updates)
+        variant_doc.flags.ignore_permissions = True
+        variant_doc.save()
+
+    return (
+        variant_doc.name
+        or variant_doc.get("name")
+        or variant_doc.get("item_code")
+        or get_variant(template_item, args)
+    )
+
+
 @frappe.whitelist()
 def create_variants(doc: Dict) -> frappe._dict:
     """Create item variants for the rows included in the form."""
@@ -436,9 +672,15 @@ def create_variants(doc: Dict) -> frappe._dict:
         frappe.throw(_("Add at least one variant row."))
 
     contexts = _validate_rows(rows, default_template)
+    # One query for all existing variants instead of a get_variant lookup per row
+    index = VariantIndex(contexts)
+    weights = _get_template_weights(list(contexts))
 
     log: List[str] = []
     created: List[str] = []
+    touched_templates = set()
+    # One template change notice for the whole run instead of one per variant
+    frappe.flags.vbc_bulk_variants = True
 
     for row in rows:
         row_dict = frappe._dict(row)
@@ -449,20 +691,14 @@ def create_variants(doc: Dict) -> frappe._dict:
 
         context = contexts[template_item]
         template_label = context.template_name or template_item
-        attribute_values: Dict[str, Any] = {}
-        attribute_log_context: List[Dict[str, Any]] = []
         attributes = context.get("attributes") or []
-        fieldnames = ["attribute_value", "attribute_value_2", "attribute_value_3"]
-        for attr_index, attribute in enumerate(attributes):
-            fieldname = fieldnames[attr_index]
-            value = row_dict.get(fieldname)
-            attribute_values[attribute.get("name")] = value
-            attribute_log_context.append({"name": attribute.get("name"), "value": value})
-
-        args = attribute_values
-        attribute_summary = _format_attribute_summary(attribute_log_context) or row_dict.attribute_value
+        values = _get_row_values(row_dict, len(attributes))
+        args = {attribute.get("name"): value for attribute, value in zip(attributes, values)}
+        attribute_summary = _format_attribute_summary(
+            [{"name": name, "value": value} for name, value in args.items()]
+        ) or row_dict.attribute_value
 
-        existing = get_variant(template_item, args)
+        existing = index.find(template_item, args)
         if existing:
             log.append(
                 _format_result(
@@ -476,57 +712,7 @@ def create_variants(doc: Dict) -> frappe._dict:
             continue
 
         try:
-            variant_doc = create_variant(template_item, args)
-            if isinstance(variant_doc, str):
-                variant_doc = frappe.get_doc("Item", variant_doc)
-
-            # Rename variant if a custom code is provided
-            if row_dict.item_code and row_dict.item_code != variant_doc.name:
-                rename_doc("Item", variant_doc.name, row_dict.item_code, force=True)
-                variant_doc = frappe.get_doc("Item", row_dict.item_code)
-
-            # ``create_variant`` should insert the record, but if a custom app or
-            # hook short-circuited the insertion the returned document might not
-            # exist yet. Guard against that so the user actually gets the item.
-            if not frappe.db.exists("Item", variant_doc.name):
-                variant_doc.flags.ignore_permissions = True
-                variant_doc.insert()
-                variant_doc.reload()
-
-            updates = {}
-            if row_dict.item_name:
-                updates["item_name"] = row_dict.item_name
-            if row_dict.variant_sku:
-                updates["sku"] = row_dict.variant_sku
-            if row_dict.description:
-                updates["description"] = row_dict.description
-
-            # Get kg/meter values from the template Item
-            template_doc = frappe.get_doc("Item", template_item)
-            weight_per_meter_with_sticker = template_doc.get("weight_per_meter_with_sticker")
-            weight_per_meter_no_sticker = template_doc.get("weight_per_meter_no_sticker")
-
-            # Calculate and set weight based on variant attributes and kg/meter from template
-            calculated_weight = _calculate_weight_from_attributes(
-                variant_doc,
-                weight_per_meter_with_sticker,
-                weight_per_meter_no_sticker
-            )
-            if calculated_weight:
-                updates["weight_per_unit"] = calculated_weight
-                updates["weight_uom"] = "pcs"
-
-            if updates:
-                variant_doc.update(updates)
-                variant_doc.flags.ignore_permissions = True
-                variant_doc.save()
-
-            created_name = (
-                variant_doc.name
-                or variant_doc.get("name")
-                or variant_doc.get("item_code")
-                or get_variant(template_item, args)
-            )
+            created_name = _create_variant(template_item, args, weights.get(template_item), row_dict)
 
             if not created_name:
                 log.append(
@@ -541,7 +727,9 @@ def create_variants(doc: Dict) -> frappe._dict:
                 )
                 continue
 
+            index.add(template_item, args, created_name)
             created.append(created_name)
+            touched_templates.add(template_item)
             log.append(
                 _format_result(
                     _("Created variant {0} for {1} on template {2}.").format(
@@ -566,8 +754,126 @@ def create_variants(doc: Dict) -> frappe._dict:
                 )
             )
 
+    frappe.flags.vbc_bulk_variants = False
+    publish_templates_changed(touched_templates)
+
     message = "\n".join(log)
     if message:
         frappe.msgprint(message, title=_("Variant Creation Summary"))
 
     return frappe._dict({"log": message, "created": created})
+
+
+def _iter_combinations(
+    context: frappe._dict, selected_values: Dict[str, List[str]]
+) -> Tuple[Iterator[Tuple[str, ...]], int]:
+    """Return a lazy iterator over the selected value combinations and its length.
+
+    Attributes without a selection contribute all their allowed values.
+    """
+
+    value_lists: List[List[str]] = []
+    for attribute, allowed in zip(context.get("attributes") or [], _get_allowed_values(context)):
+        name = attribute.get("name")
+        chosen = [str(value) for value in selected_values.get(name) or [] if value not in (None, "")]
+        invalid = [value for value in chosen if value not in allowed]
+        if invalid:
+            frappe.throw(
+                _("Values {0} are not allowed for attribute {1}.").format(
+                    ", ".join(invalid), frappe.bold(name)
+                )
+            )
+        value_lists.append(
+            list(dict.fromkeys(chosen))
+            or [str(value.get("attribute_value")) for value in attribute.get("values") or []]
+        )
+
+    return itertools.product(*value_lists), math.prod(len(values) for values in value_lists)
+
+
+def run_variant_combinations(template_item: str, attribute_values, user: Optional[str] = None) -> frappe._dict:
+    """Background job: create every combination of the selected attribute values.
+
+    Combinations are generated lazily and committed in batches, so memory
+    stays flat however large the product is; only the index of variants that
+    already existed is held.
+    """
+
+    if user:
+        frappe.set_user(user)
+
+    selected = frappe.parse_json(attribute_values) if isinstance(attribute_values, str) else attribute_values
+    context = _get_template_context(template_item)
+    combinations, total = _iter_combinations(context, selected or {})
+    names = [attribute.get("name") for attribute in context.get("attributes") or []]
+
+    index = VariantIndex([template_item])
+    weights = _get_template_weights([template_item]).get(template_item)
+    counts = {"created": 0, "existing": 0, "failed": 0}
+    errors: List[dict] = []
+    created_since_commit = False
+    frappe.flags.vbc_bulk_variants = True
+
+    for position, values in enumerate(combinations, start=1):
+        args = dict(zip(names, values))
+        if index.find(template_item, args):
+            counts["existing"] += 1
+        else:
+            frappe.db.savepoint("vbc_variant_combination")
+            try:
+                _create_variant(template_item, args, weights)
+                counts["created"] += 1
+                created_since_commit = True
+            except Exception as exc:
+                frappe.db.rollback(save_point="vbc_variant_combination")
+                frappe.clear_last_message()
+                counts["failed"] += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"attributes": args, "error": str(exc)})
+
+        if position % COMBINATIONS_COMMIT_EVERY == 0:
+            if created_since_commit:
+                publish_templates_changed([template_item])
+                created_since_commit = False
+            frappe.db.commit()
+            frappe.publish_realtime(
+                COMBINATIONS_REALTIME_EVENT, {"processed": position, "total": total}, user=user
+            )
+
+    if created_since_commit:
+        publish_templates_changed([template_item])
+    frappe.db.commit()
+
+    if errors:
+        frappe.log_error(title="Variant Creation Tool - Combinations", message=frappe.as_json(errors))
+
+    result = frappe._dict({"template_item": template_item, "total": total, "errors": errors, "done": True, **counts})
+    frappe.publish_realtime(COMBINATIONS_REALTIME_EVENT, result, user=user)
+    return result
+
+
+@frappe.whitelist()
+def enqueue_variant_combinations(template_item: str, attribute_values) -> frappe._dict:
+    """Queue creation of all combinations of the selected attribute values of a template."""
+
+    frappe.has_permission("Item", "create", throw=True)
+
+    selected = frappe.parse_json(attribute_values) if isinstance(attribute_values, str) else attribute_values
+    # Validate the selection up front so mistakes surface in the dialog
+    _combinations, total = _iter_combinations(_get_template_context(template_item), selected or {})
+
+    limit = cint(frappe.conf.get("vbc_max_variant_combinations"))
+    if limit and total > limit:
+        frappe.throw(
+            _("{0} combinations selected; the limit for this site is {1}.").format(total, limit)
+        )
+
+    frappe.enqueue(
+        "variant_bulk_creation.variant_bulk_creation.doctype.variant_creation_tool.variant_creation_tool.run_variant_combinations",
+        queue="long",
+        timeout=6 * 3600,
+        template_item=template_item,
+        attribute_values=selected or {},
+        user=frappe.session.user,
+    )
+    return frappe._dict({"total": total})
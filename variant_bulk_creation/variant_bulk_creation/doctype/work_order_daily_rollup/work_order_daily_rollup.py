@@ -0,0 +1,17 @@
+# SPDX-License-Identifier: MIT
+
+import frappe
+from frappe.model.document import Document
+
+
+class WorkOrderDailyRollup(Document):
+    """Work Order totals per day, company, department, item and status, maintained by production_rollup."""
+
+
+def on_doctype_update():
+    frappe.db.add_unique(
+        "Work Order Daily Rollup",
+        ["posting_date", "company", "department", "production_item", "status"],
+        constraint_name="unique_rollup_bucket",
+    )
+    frappe.db.add_index("Work Order Daily Rollup", ["company", "posting_date"])
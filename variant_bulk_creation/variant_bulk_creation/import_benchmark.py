@@ -0,0 +1,77 @@
+"""Cold-start import cost of the app's document event handlers.
+
+Every (doctype, event) in ``hooks.doc_events`` is measured in a fresh Python
+process: frappe is imported and the site initialised first, then the
+handler modules are imported and timed. The result shows what a cold worker
+pays the first time it dispatches that event and whether any of the modules
+expected to load lazily, such as ERPNext's variant controller, came in with it.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Modules the hook entry points should only import when a variant is resolved
+LAZY_MODULES = ("erpnext.controllers.item_variant",)
+
+_PROBE = """
+import json, sys, time
+import frappe
+frappe.init(site=sys.argv[1], sites_path=sys.argv[2])
+lazy = json.loads(sys.argv[3])
+before = set(sys.modules)
+start = time.perf_counter()
+for name in sys.argv[4:]:
+    __import__(name)
+elapsed = time.perf_counter() - start
+loaded = set(sys.modules) - before
+print(json.dumps({"seconds": elapsed, "modules": len(loaded), "lazy_loaded": sorted(loaded & set(lazy))}))
+"""
+
+
+def get_hooked_modules() -> Dict[Tuple[str, str], List[str]]:
+    """Return ``{(doctype, event): [handler modules]}`` from the app's doc_events."""
+
+    from variant_bulk_creation import hooks
+
+    events: Dict[Tuple[str, str], List[str]] = {}
+    for doctype, doctype_events in hooks.doc_events.items():
+        for event, handlers in doctype_events.items():
+            if isinstance(handlers, str):
+                handlers = [handlers]
+            modules = [handler.rsplit(".", 1)[0] for handler in handlers]
+            events[(doctype, event)] = list(dict.fromkeys(modules))
+    return events
+
+
+def measure_import(site: str, modules: List[str], sites_path: str = ".", repeat: int = 3) -> Dict[str, object]:
+    """Import ``modules`` in ``repeat`` fresh processes and return the best time."""
+
+    runs = []
+    for _run in range(max(1, repeat)):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE, site, sites_path, json.dumps(LAZY_MODULES), *modules],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    return min(runs, key=lambda run: run["seconds"])
+
+
+def benchmark_hook_imports(site: str, repeat: int = 3) -> List[Dict[str, object]]:
+    """Return the cold import cost of every hooked doctype event, slowest first."""
+
+    sites_path = os.getcwd()
+    results = []
+    for (doctype, event), modules in get_hooked_modules().items():
+        result = measure_import(site, modules, sites_path=sites_path, repeat=repeat)
+        result.update({"doctype": doctype, "event": event, "handler_modules": modules})
+        results.append(result)
+
+    return sorted(results, key=lambda result: result["seconds"], reverse=True)
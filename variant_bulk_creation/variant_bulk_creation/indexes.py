@@ -0,0 +1,139 @@
+"""Composite indexes for the access paths of the app's reports and hooks.
+
+``INDEXES`` is the single registry: the ``add_vbc_indexes`` patch and
+``after_migrate`` create whatever is missing, and ``bench vbc-explain-indexes``
+runs EXPLAIN on the matching queries in ``ACCESS_PATHS`` so you can confirm
+MariaDB actually picks them.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List
+
+import frappe
+
+# (doctype, index name, columns) - column order follows the equality
+# filters first, then ranges and sort columns of the queries they serve
+INDEXES = [
+    (
+        "Work Order",
+        "vbc_company_department_start_status",
+        ["company", "department", "planned_start_date", "status", "creation"],
+    ),
+    (
+        "Stock Ledger Entry",
+        "vbc_voucher_item_detail",
+        ["voucher_type", "voucher_no", "item_code", "voucher_detail_no"],
+    ),
+    (
+        "Stock Ledger Entry",
+        "vbc_item_warehouse_posting",
+        ["item_code", "warehouse", "is_cancelled", "posting_date", "posting_time", "creation"],
+    ),
+    (
+        "Item Attribute Value",
+        "vbc_parent_idx",
+        ["parent", "idx"],
+    ),
+]
+
+# Representative queries per access path. ``sample`` picks real values to
+# plug in, so the optimizer sees the data distribution of this site.
+ACCESS_PATHS = [
+    {
+        "label": "Work Order reports and rollup refresh (company, department, dates)",
+        "index": "vbc_company_department_start_status",
+        "sample": """
+            SELECT company, department, DATE(planned_start_date) AS from_date
+            FROM `tabWork Order` WHERE department IS NOT NULL ORDER BY modified DESC LIMIT 1
+        """,
+        "query": """
+            SELECT wo.name, wo.status, wo.planned_start_date
+            FROM `tabWork Order` wo
+            WHERE wo.company = %(company)s
+                AND wo.department = %(department)s
+                AND wo.planned_start_date >= %(from_date)s
+                AND wo.docstatus < 2
+            ORDER BY wo.planned_start_date DESC, wo.creation DESC
+        """,
+    },
+    {
+        "label": "Ledger hooks: SLEs of a voucher",
+        "index": "vbc_voucher_item_detail",
+        "sample": """
+            SELECT voucher_type, voucher_no, item_code
+            FROM `tabStock Ledger Entry` ORDER BY creation DESC LIMIT 1
+        """,
+        "query": """
+            SELECT item_code, warehouse, actual_qty, total_pcs, voucher_detail_no
+            FROM `tabStock Ledger Entry`
+            WHERE voucher_type = %(voucher_type)s
+                AND voucher_no = %(voucher_no)s
+                AND item_code = %(item_code)s
+        """,
+    },
+    {
+        "label": "Pieces balance as of a date",
+        "index": "vbc_item_warehouse_posting",
+        "sample": """
+            SELECT item_code, warehouse, posting_date
+            FROM `tabStock Ledger Entry` ORDER BY creation DESC LIMIT 1
+        """,
+        "query": """
+            SELECT pcs_after_transaction
+            FROM `tabStock Ledger Entry`
+            WHERE item_code = %(item_code)s
+                AND warehouse = %(warehouse)s
+                AND is_cancelled = 0
+                AND posting_date <= %(posting_date)s
+            ORDER BY posting_date DESC, posting_time DESC, creation DESC
+            LIMIT 1
+        """,
+    },
+    {
+        "label": "Attribute values of an Item Attribute in order",
+        "index": "vbc_parent_idx",
+        "sample": "SELECT parent FROM `tabItem Attribute Value` LIMIT 1",
+        "query": """
+            SELECT attribute_value, abbr
+            FROM `tabItem Attribute Value`
+            WHERE parent = %(parent)s
+            ORDER BY idx ASC
+        """,
+    },
+]
+
+
+def ensure_indexes() -> None:
+    """Create every index in ``INDEXES`` that does not exist yet.
+
+    An index is skipped while one of its columns is missing, e.g. a Custom
+    Field whose fixture has not been synced yet; the next migrate adds it.
+    """
+
+    for doctype, index_name, columns in INDEXES:
+        if not all(frappe.db.has_column(doctype, column) for column in columns):
+            continue
+        frappe.db.add_index(doctype, columns, index_name=index_name)
+
+
+def explain_access_paths() -> List[Dict]:
+    """Run EXPLAIN for every access path and report the index MariaDB chose."""
+
+    results = []
+    for path in ACCESS_PATHS:
+        sample = frappe.db.sql(path["sample"], as_dict=True)
+        if not sample:
+            results.append({"label": path["label"], "index": path["index"], "plan": [], "uses_index": None})
+            continue
+
+        plan = frappe.db.sql(f"EXPLAIN {path['query']}", sample[0], as_dict=True)
+        results.append(
+            {
+                "label": path["label"],
+                "index": path["index"],
+                "plan": plan,
+                "uses_index": any(row.get("key") == path["index"] for row in plan),
+            }
+        )
+    return results
@@ -0,0 +1,51 @@
+"""Lean Item weight lookups shared by the transaction forms and server hooks."""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+import frappe
+from frappe.utils import flt
+
+
+def _get_weight_factors(item_codes: Iterable[str], ignore_permissions: bool = True) -> dict[str, frappe._dict]:
+    """Return weight_per_unit (pcs/kg) and related columns for many items.
+
+    A single primary-key lookup on ``tabItem`` that reads only the columns
+    needed for pcs <-> qty conversion, instead of loading whole Item documents.
+    Pass ``ignore_permissions=False`` to only return items the user may read.
+    """
+
+    codes = sorted({code for code in item_codes or [] if code})
+    if not codes:
+        return {}
+
+    rows = frappe.get_list(
+        "Item",
+        filters={"name": ["in", codes]},
+        fields=["name", "weight_per_unit", "weight_uom", "variant_of"],
+        ignore_permissions=ignore_permissions,
+        limit_page_length=0,
+    )
+
+    return {
+        row.name: frappe._dict(
+            {
+                "weight_per_unit": flt(row.weight_per_unit),
+                "weight_uom": row.weight_uom,
+                "variant_of": row.variant_of,
+            }
+        )
+        for row in rows
+    }
+
+
+@frappe.whitelist()
+def get_weight_factors(item_codes) -> dict[str, frappe._dict]:
+    """Return ``{item_code: {weight_per_unit, weight_uom, variant_of}}`` for the given items."""
+
+    parsed = frappe.parse_json(item_codes) if isinstance(item_codes, str) else item_codes
+    if isinstance(parsed, str):
+        parsed = [parsed]
+
+    return _get_weight_factors(parsed or [], ignore_permissions=False)
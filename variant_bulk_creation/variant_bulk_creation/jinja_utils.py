@@ -2,12 +2,17 @@
 
 from __future__ import annotations
 
-from markupsafe import Markup
+from markupsafe import Markup, escape
 
+from .thumbnails import get_thumbnail
 
-def render_item_image(image_path, max_height="80px", max_width="120px"):
+
+def render_item_image(image_path, max_height="80px", max_width="120px", inline=None):
     """Convert an image file path to an <img> tag for use in print formats.
 
+    The tag points at a thumbnail sized for the print instead of the
+    full-resolution image; pass ``inline=True`` to embed it as base64.
+
     Usage in Jinja print format::
 
         {{ render_item_image(row.image) }}
@@ -21,6 +26,8 @@ def render_item_image(image_path, max_height="80px", max_width="120px"):
 
     return Markup(
         '<img src="{path}" style="max-height:{h}; max-width:{w};">'.format(
-            path=image_path, h=max_height, w=max_width
+            path=escape(get_thumbnail(str(image_path), max_height, max_width, inline)),
+            h=max_height,
+            w=max_width,
         )
     )
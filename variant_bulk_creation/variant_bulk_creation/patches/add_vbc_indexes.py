@@ -0,0 +1,10 @@
+# SPDX-License-Identifier: MIT
+"""Add composite indexes for the report and ledger hook access paths."""
+
+from __future__ import annotations
+
+from variant_bulk_creation.variant_bulk_creation.indexes import ensure_indexes
+
+
+def execute():
+    ensure_indexes()
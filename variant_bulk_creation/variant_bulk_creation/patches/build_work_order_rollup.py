@@ -0,0 +1,32 @@
+# SPDX-License-Identifier: MIT
+"""Fill the Work Order Daily Rollup on upgrade.
+
+The rollup starts empty and the production analytics report would show
+nothing until the first hourly sync, so build it from every Work Order now.
+"""
+
+from __future__ import annotations
+
+import frappe
+from frappe.utils import now
+
+from variant_bulk_creation.variant_bulk_creation.production_rollup import (
+    SYNC_WATERMARK_KEY,
+    rebuild_work_order_rollup,
+)
+
+
+def execute():
+    frappe.reload_doc("variant_bulk_creation", "doctype", "work_order_daily_rollup")
+    if not all(
+        frappe.db.has_column("Work Order", column) for column in ("department", "total_pcs", "total_pcs_produced")
+    ):
+        # Patches run before fixtures are synced; create the Custom Fields first
+        from frappe.utils.fixtures import sync_fixtures
+
+        sync_fixtures("variant_bulk_creation")
+
+    # The hourly sync only needs to catch up from here
+    started_at = now()
+    rebuild_work_order_rollup()
+    frappe.db.set_global(SYNC_WATERMARK_KEY, started_at)
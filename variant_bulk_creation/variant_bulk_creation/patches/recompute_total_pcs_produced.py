@@ -0,0 +1,49 @@
+# SPDX-License-Identifier: MIT
+"""Recompute Work Order.total_pcs_produced from its submitted Manufacture entries.
+
+The counter is maintained incrementally on submit and cancel, so Work Orders
+manufactured before the field existed start from zero. This sets it from the
+finished-good rows of every submitted Manufacture Stock Entry, using the same
+rule as ``work_order.update_total_pcs_produced``: the row's total_pcs, or
+stock qty x weight_per_unit when total_pcs is empty.
+"""
+
+from __future__ import annotations
+
+import frappe
+
+
+def execute():
+    if not frappe.db.has_column("Work Order", "total_pcs_produced"):
+        # Patches run before fixtures are synced; create the field first
+        from frappe.utils.fixtures import sync_fixtures
+
+        sync_fixtures("variant_bulk_creation")
+
+    frappe.db.sql(
+        """
+        UPDATE `tabWork Order` wo
+        LEFT JOIN (
+            SELECT se.work_order, SUM(
+                IF(
+                    IFNULL(sed.total_pcs, 0) != 0,
+                    sed.total_pcs,
+                    IFNULL(sed.transfer_qty, 0) * IFNULL(item.weight_per_unit, 0)
+                )
+            ) AS pcs
+            FROM `tabStock Entry` se
+            INNER JOIN `tabStock Entry Detail` sed ON sed.parent = se.name
+            INNER JOIN `tabWork Order` production ON production.name = se.work_order
+            LEFT JOIN `tabItem` item ON item.name = sed.item_code
+            WHERE se.docstatus = 1
+                AND se.purpose = 'Manufacture'
+                AND sed.parenttype = 'Stock Entry'
+                AND (
+                    sed.is_finished_item = 1
+                    OR (IFNULL(sed.t_warehouse, '') != '' AND sed.item_code = production.production_item)
+                )
+            GROUP BY se.work_order
+        ) produced ON produced.work_order = wo.name
+        SET wo.total_pcs_produced = GREATEST(ROUND(IFNULL(produced.pcs, 0), 3), 0)
+        """
+    )
@@ -0,0 +1,242 @@
+"""Incremental daily rollup of Work Orders for the production analytics report.
+
+``tabWork Order Daily Rollup`` holds one row per (planned start date, company,
+department, production item, status) with the counts and quantity sums the
+report needs. Hooks on Work Order and on Stock Entries made against a Work
+Order recompute only the buckets a document touches; everything else is read
+straight from the rollup.
+
+A bucket is refreshed across all statuses at once, so status changes written
+with ``db_set`` (stop/close, material transfer, manufacture) land in the
+right row. The hourly sync picks up any Work Order modified without a hook
+firing, and the whole table can be rebuilt with::
+
+    bench --site your-site execute variant_bulk_creation.variant_bulk_creation.production_rollup.rebuild_work_order_rollup
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Optional, Tuple
+
+import frappe
+from frappe.utils import add_days, add_months, get_first_day, getdate, now
+
+from .report_cache import invalidate_reports
+
+ROLLUP_DOCTYPE = "Work Order Daily Rollup"
+SYNC_WATERMARK_KEY = "vbc_work_order_rollup_watermark"
+
+# (posting_date, company, department, production_item); status is refreshed as a whole
+BucketKey = Tuple[str, str, str, str]
+
+_ROLLUP_COLUMNS = """(name, posting_date, company, department, production_item, status,
+         work_orders, planned_qty, planned_pcs, produced_qty, produced_pcs,
+         creation, modified, owner, modified_by, docstatus, idx)"""
+
+_SELECT_ROLLUP = """
+    SELECT
+        MD5(CONCAT_WS('|', DATE(wo.planned_start_date), wo.company, IFNULL(wo.department, ''),
+            wo.production_item, IFNULL(wo.status, ''))),
+        DATE(wo.planned_start_date),
+        wo.company,
+        IFNULL(wo.department, ''),
+        wo.production_item,
+        IFNULL(wo.status, ''),
+        COUNT(*),
+        SUM(IFNULL(wo.qty, 0)),
+        SUM(IFNULL(wo.total_pcs, 0)),
+        SUM(IFNULL(wo.produced_qty, 0)),
+        SUM(IFNULL(wo.total_pcs_produced, 0)),
+        %(timestamp)s, %(timestamp)s, %(user)s, %(user)s, 0, 0
+    FROM `tabWork Order` wo
+    WHERE wo.docstatus < 2
+        AND wo.planned_start_date IS NOT NULL
+        AND {conditions}
+    GROUP BY DATE(wo.planned_start_date), wo.company, IFNULL(wo.department, ''),
+        wo.production_item, IFNULL(wo.status, '')
+"""
+
+_INSERT_ROLLUP = f"INSERT INTO `tabWork Order Daily Rollup` {_ROLLUP_COLUMNS} {_SELECT_ROLLUP}"
+
+_BUCKET_CONDITIONS = """wo.planned_start_date >= %(posting_date)s
+                AND wo.planned_start_date < %(next_date)s
+                AND wo.company = %(company)s
+                AND (wo.department = %(department)s OR (%(department)s = '' AND wo.department IS NULL))
+                AND wo.production_item = %(production_item)s"""
+
+
+def _bucket_key(row) -> Optional[BucketKey]:
+    if not row or not row.get("planned_start_date") or not row.get("company") or not row.get("production_item"):
+        return None
+    return (
+        str(getdate(row.planned_start_date)),
+        row.company,
+        row.get("department") or "",
+        row.production_item,
+    )
+
+
+def refresh_rollup_buckets(keys: Iterable[Optional[BucketKey]]) -> None:
+    """Recompute the given buckets from ``tabWork Order``.
+
+    Runs inside Work Order and Stock Entry transactions, so it only takes row
+    locks on the bucket's own rollup rows: the bucket is read with plain
+    (non-locking) selects, upserted by primary key and rows of statuses that
+    no longer occur are deleted by primary key. A range DELETE followed by an
+    INSERT ... SELECT would take gap locks that deadlock concurrent submits.
+    A bucket written from a snapshot that missed a concurrent commit is put
+    right by the hourly sync, since both Work Orders were modified.
+    """
+
+    base = {"timestamp": now(), "user": frappe.session.user}
+    for posting_date, company, department, production_item in sorted({key for key in keys if key}):
+        values = dict(
+            base,
+            posting_date=posting_date,
+            next_date=add_days(posting_date, 1),
+            company=company,
+            department=department,
+            production_item=production_item,
+        )
+        rows = frappe.db.sql(_SELECT_ROLLUP.format(conditions=_BUCKET_CONDITIONS), values)
+        existing = frappe.db.sql_list(
+            """
+            SELECT name FROM `tabWork Order Daily Rollup`
+            WHERE posting_date = %(posting_date)s
+                AND company = %(company)s
+                AND department = %(department)s
+                AND production_item = %(production_item)s
+            """,
+            values,
+        )
+
+        if rows:
+            rows = sorted(rows)
+            placeholders = ", ".join(["(" + ", ".join(["%s"] * len(rows[0])) + ")"] * len(rows))
+            frappe.db.sql(
+                f"""
+                INSERT INTO `tabWork Order Daily Rollup` {_ROLLUP_COLUMNS}
+                VALUES {placeholders}
+                ON DUPLICATE KEY UPDATE
+                    work_orders = VALUES(work_orders),
+                    planned_qty = VALUES(planned_qty),
+                    planned_pcs = VALUES(planned_pcs),
+                    produced_qty = VALUES(produced_qty),
+                    produced_pcs = VALUES(produced_pcs),
+                    modified = VALUES(modified),
+                    modified_by = VALUES(modified_by)
+                """,
+                [value for row in rows for value in row],
+            )
+
+        stale = sorted(set(existing) - {row[0] for row in rows})
+        if stale:
+            frappe.db.sql(
+                f"DELETE FROM `tabWork Order Daily Rollup` WHERE name IN ({', '.join(['%s'] * len(stale))})",
+                stale,
+            )
+
+
+def update_work_order_rollup(doc, _event: Optional[str] = None) -> None:
+    """Refresh the rollup bucket of a Work Order, and its previous bucket if it moved."""
+
+    if doc.doctype != "Work Order":
+        return
+
+    keys = [_bucket_key(doc)]
+    before = doc.get_doc_before_save()
+    if before:
+        keys.append(_bucket_key(before))
+
+    refresh_rollup_buckets(keys)
+
+
+def update_work_order_rollup_from_stock_entry(doc, _event: Optional[str] = None) -> None:
+    """Refresh the bucket of the Work Order behind a Stock Entry.
+
+    Transfers and Manufacture entries change the Work Order's status, produced
+    quantity and produced pieces without saving the Work Order itself.
+    """
+
+    if doc.doctype != "Stock Entry" or not doc.get("work_order"):
+        return
+
+    work_order = frappe.db.get_value(
+        "Work Order",
+        doc.work_order,
+        ["planned_start_date", "company", "department", "production_item"],
+        as_dict=True,
+    )
+    refresh_rollup_buckets([_bucket_key(work_order)])
+
+
+def sync_work_order_rollup() -> None:
+    """Scheduled: refresh buckets of Work Orders modified since the last sync."""
+
+    watermark = frappe.db.get_global(SYNC_WATERMARK_KEY)
+    started_at = now()
+
+    if not watermark:
+        # First run: nothing to catch up on incrementally
+        rebuild_work_order_rollup()
+    else:
+        changed = frappe.db.sql(
+            """
+            SELECT DISTINCT planned_start_date, company, department, production_item
+            FROM `tabWork Order`
+            WHERE modified >= %s
+            """,
+            (watermark,),
+            as_dict=True,
+        )
+        refresh_rollup_buckets(_bucket_key(row) for row in changed)
+
+    frappe.db.set_global(SYNC_WATERMARK_KEY, started_at)
+    frappe.db.commit()
+
+    if watermark and changed:
+        invalidate_reports()
+
+
+def rebuild_work_order_rollup(from_date: Optional[str] = None, to_date: Optional[str] = None) -> None:
+    """Rebuild the rollup from scratch, one month per transaction.
+
+    Without dates every Work Order is rolled up again.
+    """
+
+    if not from_date or not to_date:
+        bounds = frappe.db.sql(
+            "SELECT MIN(planned_start_date), MAX(planned_start_date) FROM `tabWork Order`"
+        )[0]
+        if not bounds[0]:
+            return
+        from_date = from_date or bounds[0]
+        to_date = to_date or bounds[1]
+
+    month_start = get_first_day(from_date)
+    end = add_days(getdate(to_date), 1)
+    base = {"timestamp": now(), "user": frappe.session.user}
+
+    while month_start < end:
+        values = dict(
+            base,
+            start=max(month_start, getdate(from_date)),
+            end=min(add_months(month_start, 1), end),
+        )
+        frappe.db.sql(
+            """
+            DELETE FROM `tabWork Order Daily Rollup`
+            WHERE posting_date >= %(start)s AND posting_date < %(end)s
+            """,
+            values,
+        )
+        frappe.db.sql(
+            _INSERT_ROLLUP.format(
+                conditions="wo.planned_start_date >= %(start)s AND wo.planned_start_date < %(end)s"
+            ),
+            values,
+        )
+        frappe.db.commit()
+        month_start = add_months(month_start, 1)
+
+    invalidate_reports()
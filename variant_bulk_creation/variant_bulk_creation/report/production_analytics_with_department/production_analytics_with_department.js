@@ -43,6 +43,13 @@ frappe.query_reports["Production Analytics with Department"] = {
 			"fieldtype": "Select",
 			"options": "Department\nProduction Item\nStatus",
 			"default": "Department"
+		},
+		{
+			"fieldname": "periodicity",
+			"label": __("Periodicity"),
+			"fieldtype": "Select",
+			"options": "\nDaily\nWeekly\nMonthly",
+			"default": ""
 		}
 	],
 	"formatter": function(value, row, column, data, default_formatter) {
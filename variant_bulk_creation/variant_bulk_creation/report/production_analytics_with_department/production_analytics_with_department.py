@@ -4,23 +4,41 @@
 import frappe
 from frappe import _
 
+from variant_bulk_creation.variant_bulk_creation.report_cache import get_cached_chart, get_cached_result
+
+REPORT_NAME = "Production Analytics with Department"
+CHART_METHOD = "variant_bulk_creation.variant_bulk_creation.report.production_analytics_with_department.production_analytics_with_department.get_chart"
+
 
 def execute(filters=None):
 	if not filters:
 		filters = {}
 
 	columns = get_columns(filters)
-	data = get_data(filters)
-	chart = get_chart_data(data, filters)
+	data = get_cached_result(REPORT_NAME, filters, lambda: get_data(filters))
+	chart = get_cached_chart(REPORT_NAME, filters, CHART_METHOD)
 
 	return columns, data, None, chart
 
 
+def get_chart(filters):
+	"""Chart payload on its own, for the stale-while-revalidate chart cache."""
+	return get_chart_data(get_data(filters), filters)
+
+
 def get_columns(filters):
 	group_by = filters.get("group_by", "Department")
 
 	columns = []
 
+	if filters.get("periodicity") in PERIOD_EXPRESSIONS:
+		columns.append({
+			"fieldname": "period",
+			"label": _("Period"),
+			"fieldtype": "Date",
+			"width": 110
+		})
+
 	if group_by == "Department":
 		columns.append({
 			"fieldname": "department",
@@ -125,52 +143,67 @@ def get_columns(filters):
 	return columns
 
 
+PERIOD_EXPRESSIONS = {
+	"Daily": "r.posting_date",
+	"Weekly": "DATE_SUB(r.posting_date, INTERVAL WEEKDAY(r.posting_date) DAY)",
+	"Monthly": "DATE_FORMAT(r.posting_date, '%%Y-%%m-01')",
+}
+
+
 def get_data(filters):
+	"""Aggregate the Work Order Daily Rollup instead of scanning every Work Order."""
 	group_by = filters.get("group_by", "Department")
 	conditions = get_conditions(filters)
 
 	# Determine the grouping field
-	if group_by == "Department":
-		group_field = "wo.department"
-		select_field = "wo.department"
-	elif group_by == "Production Item":
-		group_field = "wo.production_item"
-		select_field = "wo.production_item, item.item_name"
+	if group_by == "Production Item":
+		group_field = "r.production_item"
+		select_field = "r.production_item, item.item_name"
+		item_join = "LEFT JOIN `tabItem` item ON r.production_item = item.name"
 	elif group_by == "Status":
-		group_field = "wo.status"
-		select_field = "wo.status"
+		group_field = "r.status"
+		select_field = "r.status"
+		item_join = ""
+	else:
+		group_field = "r.department"
+		select_field = "NULLIF(r.department, '') as department"
+		item_join = ""
+
+	period_expression = PERIOD_EXPRESSIONS.get(filters.get("periodicity"))
+	if period_expression:
+		select_field = f"{period_expression} as period, {select_field}"
+		group_field = f"period, {group_field}"
+		order_by = "period, planned_qty DESC"
 	else:
-		group_field = "wo.department"
-		select_field = "wo.department"
+		order_by = "planned_qty DESC"
 
 	data = frappe.db.sql(f"""
 		SELECT
 			{select_field},
-			COUNT(*) as total_work_orders,
-			SUM(wo.qty) as planned_qty,
-			SUM(COALESCE(wo.total_pcs, 0)) as planned_pcs,
-			SUM(wo.produced_qty) as produced_qty,
-			SUM(COALESCE(wo.total_pcs_produced, 0)) as produced_pcs,
-			SUM(wo.qty - wo.produced_qty) as qty_variance,
-			SUM(COALESCE(wo.total_pcs, 0) - COALESCE(wo.total_pcs_produced, 0)) as pcs_variance,
+			SUM(r.work_orders) as total_work_orders,
+			SUM(r.planned_qty) as planned_qty,
+			SUM(r.planned_pcs) as planned_pcs,
+			SUM(r.produced_qty) as produced_qty,
+			SUM(r.produced_pcs) as produced_pcs,
+			SUM(r.planned_qty - r.produced_qty) as qty_variance,
+			SUM(r.planned_pcs - r.produced_pcs) as pcs_variance,
 			CASE
-				WHEN SUM(wo.qty) > 0 THEN (SUM(wo.produced_qty) / SUM(wo.qty)) * 100
+				WHEN SUM(r.planned_qty) > 0 THEN (SUM(r.produced_qty) / SUM(r.planned_qty)) * 100
 				ELSE 0
 			END as efficiency,
-			SUM(CASE WHEN wo.status = 'Completed' THEN 1 ELSE 0 END) as completed_orders,
-			SUM(CASE WHEN wo.status = 'In Process' THEN 1 ELSE 0 END) as in_process_orders,
-			SUM(CASE WHEN wo.status = 'Not Started' THEN 1 ELSE 0 END) as not_started_orders
+			SUM(CASE WHEN r.status = 'Completed' THEN r.work_orders ELSE 0 END) as completed_orders,
+			SUM(CASE WHEN r.status = 'In Process' THEN r.work_orders ELSE 0 END) as in_process_orders,
+			SUM(CASE WHEN r.status = 'Not Started' THEN r.work_orders ELSE 0 END) as not_started_orders
 		FROM
-			`tabWork Order` wo
-		LEFT JOIN
-			`tabItem` item ON wo.production_item = item.name
+			`tabWork Order Daily Rollup` r
+		{item_join}
 		WHERE
-			wo.docstatus < 2
+			1 = 1
 			{conditions}
 		GROUP BY
 			{group_field}
 		ORDER BY
-			planned_qty DESC
+			{order_by}
 	""", filters, as_dict=1)
 
 	return data
@@ -180,19 +213,19 @@ def get_conditions(filters):
 	conditions = []
 
 	if filters.get("company"):
-		conditions.append("wo.company = %(company)s")
+		conditions.append("r.company = %(company)s")
 
 	if filters.get("from_date"):
-		conditions.append("wo.planned_start_date >= %(from_date)s")
+		conditions.append("r.posting_date >= %(from_date)s")
 
 	if filters.get("to_date"):
-		conditions.append("wo.planned_start_date <= %(to_date)s")
+		conditions.append("r.posting_date <= %(to_date)s")
 
 	if filters.get("department"):
-		conditions.append("wo.department = %(department)s")
+		conditions.append("r.department = %(department)s")
 
 	if filters.get("production_item"):
-		conditions.append("wo.production_item = %(production_item)s")
+		conditions.append("r.production_item = %(production_item)s")
 
 	return " AND " + " AND ".join(conditions) if conditions else ""
 
@@ -201,6 +234,9 @@ def get_chart_data(data, filters):
 	if not data:
 		return None
 
+	if filters.get("periodicity") in PERIOD_EXPRESSIONS:
+		return get_period_chart_data(data)
+
 	group_by = filters.get("group_by", "Department")
 
 	labels = []
@@ -237,3 +273,32 @@ def get_chart_data(data, filters):
 	}
 
 	return chart
+
+
+def get_period_chart_data(data):
+	"""Planned against produced quantity over time, summed across groups."""
+	totals = {}
+	for row in data:
+		period = totals.setdefault(str(row.get("period")), [0, 0])
+		period[0] += row.get("planned_qty") or 0
+		period[1] += row.get("produced_qty") or 0
+
+	labels = sorted(totals)
+
+	return {
+		"data": {
+			"labels": labels,
+			"datasets": [
+				{
+					"name": "Planned Qty",
+					"values": [totals[label][0] for label in labels]
+				},
+				{
+					"name": "Produced Qty",
+					"values": [totals[label][1] for label in labels]
+				}
+			]
+		},
+		"type": "line",
+		"colors": ["#7cd6fd", "#5e64ff"]
+	}
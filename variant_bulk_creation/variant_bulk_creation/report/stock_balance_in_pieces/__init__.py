@@ -0,0 +1 @@
+# __init__.py file for stock balance in pieces report
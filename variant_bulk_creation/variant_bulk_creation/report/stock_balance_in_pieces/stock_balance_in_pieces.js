@@ -0,0 +1,66 @@
+// Copyright (c) 2024, Custom and contributors
+// For license information, please see license.txt
+
+frappe.query_reports["Stock Balance in Pieces"] = {
+	"filters": [
+		{
+			"fieldname": "company",
+			"label": __("Company"),
+			"fieldtype": "Link",
+			"options": "Company",
+			"default": frappe.defaults.get_user_default("Company")
+		},
+		{
+			"fieldname": "to_date",
+			"label": __("As On Date"),
+			"fieldtype": "Date",
+			"default": frappe.datetime.get_today(),
+			"reqd": 1
+		},
+		{
+			"fieldname": "warehouse",
+			"label": __("Warehouse"),
+			"fieldtype": "Link",
+			"options": "Warehouse"
+		},
+		{
+			"fieldname": "item_code",
+			"label": __("Item"),
+			"fieldtype": "Link",
+			"options": "Item"
+		},
+		{
+			"fieldname": "template_item",
+			"label": __("Template Item"),
+			"fieldtype": "Link",
+			"options": "Item",
+			"get_query": function() {
+				return {
+					filters: { has_variants: 1 }
+				};
+			}
+		},
+		{
+			"fieldname": "powder_code",
+			"label": __("Powder Code"),
+			"fieldtype": "Data"
+		},
+		{
+			"fieldname": "length",
+			"label": __("Length (m)"),
+			"fieldtype": "Float"
+		},
+		{
+			"fieldname": "include_zero",
+			"label": __("Show Zero Balances"),
+			"fieldtype": "Check",
+			"default": 0
+		}
+	],
+	"onload": function(report) {
+		variant_bulk_creation.reports.add_export_button(
+			report,
+			"variant_bulk_creation.variant_bulk_creation.report.stock_balance_in_pieces.stock_balance_in_pieces.export_csv"
+		);
+	}
+};
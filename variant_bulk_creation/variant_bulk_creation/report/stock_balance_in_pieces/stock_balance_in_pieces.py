@@ -0,0 +1,208 @@
+# Copyright (c) 2024, Custom and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.utils import flt, getdate, today
+
+from variant_bulk_creation.variant_bulk_creation.report_export import enqueue_csv_export
+
+REPORT_NAME = "Stock Balance in Pieces"
+PAGE_LENGTH = 1000
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+
+	columns = get_columns()
+	data = [row for page in iter_pages(filters) for row in page]
+
+	return columns, data
+
+
+def get_columns():
+	return [
+		{
+			"fieldname": "item_code",
+			"label": _("Item Code"),
+			"fieldtype": "Link",
+			"options": "Item",
+			"width": 180
+		},
+		{
+			"fieldname": "item_name",
+			"label": _("Item Name"),
+			"fieldtype": "Data",
+			"width": 180
+		},
+		{
+			"fieldname": "template_item",
+			"label": _("Template Item"),
+			"fieldtype": "Link",
+			"options": "Item",
+			"width": 150
+		},
+		{
+			"fieldname": "warehouse",
+			"label": _("Warehouse"),
+			"fieldtype": "Link",
+			"options": "Warehouse",
+			"width": 150
+		},
+		{
+			"fieldname": "balance_pcs",
+			"label": _("Balance Pieces"),
+			"fieldtype": "Float",
+			"width": 130
+		},
+		{
+			"fieldname": "balance_qty",
+			"label": _("Balance Qty"),
+			"fieldtype": "Float",
+			"width": 120
+		},
+		{
+			"fieldname": "stock_uom",
+			"label": _("UOM"),
+			"fieldtype": "Link",
+			"options": "UOM",
+			"width": 80
+		}
+	]
+
+
+def iter_pages(filters, page_length=PAGE_LENGTH):
+	"""Yield pages of row lists, keyset-paginated on (item_code, warehouse)."""
+	after_item, after_warehouse = "", ""
+
+	while True:
+		rows = get_page(filters, after_item, after_warehouse, page_length)
+		if not rows:
+			return
+
+		yield rows
+
+		if len(rows) < page_length:
+			return
+
+		after_item, after_warehouse = rows[-1][0], rows[-1][3]
+
+
+def get_page(filters, after_item, after_warehouse, page_length):
+	conditions = get_conditions(filters)
+	values = dict(filters, after_item=after_item, after_warehouse=after_warehouse, page_length=page_length)
+
+	if not filters.get("to_date") or getdate(filters.to_date) >= getdate(today()):
+		balance_fields = """
+			pcs_bin.pcs_qty as balance_pcs,
+			IFNULL(stock_bin.actual_qty, 0) as balance_qty"""
+		stock_bin_join = """
+		LEFT JOIN
+			`tabBin` stock_bin ON stock_bin.item_code = pcs_bin.item_code
+				AND stock_bin.warehouse = pcs_bin.warehouse"""
+	else:
+		balance_fields = """
+			{pcs} as balance_pcs,
+			{qty} as balance_qty""".format(
+			pcs=get_as_of_subquery("pcs_after_transaction"),
+			qty=get_as_of_subquery("qty_after_transaction"),
+		)
+		stock_bin_join = ""
+
+	having = "" if filters.get("include_zero") else "HAVING balance_pcs != 0"
+
+	return frappe.db.sql(f"""
+		SELECT
+			pcs_bin.item_code,
+			item.item_name,
+			item.variant_of as template_item,
+			pcs_bin.warehouse,
+			{balance_fields},
+			item.stock_uom
+		FROM
+			`tabPieces Bin` pcs_bin
+		INNER JOIN
+			`tabItem` item ON item.name = pcs_bin.item_code
+		INNER JOIN
+			`tabWarehouse` wh ON wh.name = pcs_bin.warehouse
+		{stock_bin_join}
+		WHERE
+			(pcs_bin.item_code > %(after_item)s
+				OR (pcs_bin.item_code = %(after_item)s AND pcs_bin.warehouse > %(after_warehouse)s))
+			{conditions}
+		{having}
+		ORDER BY
+			pcs_bin.item_code, pcs_bin.warehouse
+		LIMIT %(page_length)s
+	""", values, as_list=1)
+
+
+def get_as_of_subquery(column):
+	"""Balance column of the last ledger entry on or before the As On Date.
+
+	Entries without pieces are never stamped with pcs_after_transaction, so
+	only entries that carry the column are considered.
+	"""
+	return f"""IFNULL((
+				SELECT sle.{column}
+				FROM `tabStock Ledger Entry` sle
+				WHERE sle.item_code = pcs_bin.item_code
+					AND sle.warehouse = pcs_bin.warehouse
+					AND sle.is_cancelled = 0
+					AND sle.{column} IS NOT NULL
+					AND sle.posting_date <= %(to_date)s
+				ORDER BY sle.posting_date DESC, sle.posting_time DESC, sle.creation DESC
+				LIMIT 1
+			), 0)"""
+
+
+def get_conditions(filters):
+	conditions = []
+
+	if filters.get("company"):
+		conditions.append("wh.company = %(company)s")
+
+	if filters.get("warehouse"):
+		lft, rgt = frappe.db.get_value("Warehouse", filters.warehouse, ["lft", "rgt"]) or (0, 0)
+		filters.warehouse_lft, filters.warehouse_rgt = lft, rgt
+		conditions.append("wh.lft >= %(warehouse_lft)s AND wh.rgt <= %(warehouse_rgt)s")
+
+	if filters.get("item_code"):
+		conditions.append("pcs_bin.item_code = %(item_code)s")
+
+	if filters.get("template_item"):
+		conditions.append("item.variant_of = %(template_item)s")
+
+	if filters.get("powder_code"):
+		conditions.append("""EXISTS (
+			SELECT 1 FROM `tabItem Variant Attribute` iva
+			WHERE iva.parent = item.name
+				AND iva.parenttype = 'Item'
+				AND iva.attribute LIKE '%%powder%%'
+				AND iva.attribute_value = %(powder_code)s)""")
+
+	if filters.get("length"):
+		filters.length = flt(filters.length)
+		conditions.append("""EXISTS (
+			SELECT 1 FROM `tabItem Variant Attribute` iva
+			WHERE iva.parent = item.name
+				AND iva.parenttype = 'Item'
+				AND iva.attribute LIKE '%%length%%'
+				AND CAST(iva.attribute_value AS DECIMAL(18, 6)) = %(length)s)""")
+
+	return " AND " + " AND ".join(conditions) if conditions else ""
+
+
+def get_export(filters):
+	"""Columns and a row iterator for the background CSV export."""
+	rows = (row for page in iter_pages(filters) for row in page)
+	return get_columns(), rows
+
+
+@frappe.whitelist()
+def export_csv(filters=None):
+	enqueue_csv_export(
+		REPORT_NAME,
+		"variant_bulk_creation.variant_bulk_creation.report.stock_balance_in_pieces.stock_balance_in_pieces.get_export",
+		filters,
+	)
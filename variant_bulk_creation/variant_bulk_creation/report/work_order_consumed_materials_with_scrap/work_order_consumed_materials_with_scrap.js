@@ -38,5 +38,11 @@ frappe.query_reports["Work Order Consumed Materials with Scrap"] = {
 			"fieldtype": "Link",
 			"options": "Department"
 		}
-	]
+	],
+	"onload": function(report) {
+		variant_bulk_creation.reports.add_export_button(
+			report,
+			"variant_bulk_creation.variant_bulk_creation.report.work_order_consumed_materials_with_scrap.work_order_consumed_materials_with_scrap.export_csv"
+		);
+	}
 };
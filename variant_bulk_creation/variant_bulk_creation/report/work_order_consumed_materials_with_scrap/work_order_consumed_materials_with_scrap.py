@@ -4,10 +4,18 @@
 import frappe
 from frappe import _
 
+from variant_bulk_creation.variant_bulk_creation.report_export import enqueue_csv_export
+
+REPORT_NAME = "Work Order Consumed Materials with Scrap"
+# Work Orders per page; each contributes its required, consumed and scrap rows
+PAGE_LENGTH = 500
+
 
 def execute(filters=None):
+    filters = frappe._dict(filters or {})
+
     columns = get_columns()
-    data = get_data(filters)
+    data = [row for page in iter_pages(filters) for row in page]
     return columns, data
 
 
@@ -81,92 +89,141 @@ def get_columns():
     ]
 
 
-def get_data(filters):
+def iter_pages(filters, page_length=PAGE_LENGTH):
+    """Yield pages of row lists, each covering up to ``page_length`` Work Orders.
+
+    Pages are keyset-paginated on the Work Order name, so every Work Order's
+    rows arrive together and memory stays bounded for long date ranges.
+    """
+    after_work_order = ""
+
+    while True:
+        work_orders = get_work_order_page(filters, after_work_order, page_length)
+        if not work_orders:
+            return
+
+        rows = get_page(work_orders)
+        if rows:
+            yield rows
+
+        if len(work_orders) < page_length:
+            return
+
+        after_work_order = work_orders[-1]
+
+
+def get_work_order_page(filters, after_work_order, page_length):
     conditions = get_conditions(filters)
+    values = dict(filters, after_work_order=after_work_order, page_length=page_length)
 
-    # Get required items from Work Orders
-    required_items = frappe.db.sql("""
-        SELECT
-            wo.name as work_order,
-            wo.department,
-            wo.production_item,
-            woi.item_code,
-            woi.item_name,
-            'Required' as type,
-            woi.required_qty,
-            0 as consumed_qty,
-            0 as variance,
-            woi.stock_uom
+    return frappe.db.sql_list("""
+        SELECT wo.name
         FROM `tabWork Order` wo
-        INNER JOIN `tabWork Order Item` woi ON woi.parent = wo.name
-        WHERE wo.docstatus = 1 {conditions}
-    """.format(conditions=conditions), filters, as_dict=1)
-
-    # Get consumed items from Stock Entries
-    consumed_items = frappe.db.sql("""
-        SELECT
-            se.work_order,
-            wo.department,
-            wo.production_item,
-            sed.item_code,
-            sed.item_name,
-            'Consumed' as type,
-            0 as required_qty,
-            SUM(sed.qty) as consumed_qty,
-            0 as variance,
-            sed.stock_uom
-        FROM `tabStock Entry` se
-        INNER JOIN `tabStock Entry Detail` sed ON sed.parent = se.name
-        INNER JOIN `tabWork Order` wo ON wo.name = se.work_order
-        WHERE se.docstatus = 1
-            AND se.purpose = 'Manufacture'
-            AND se.work_order IS NOT NULL
-            AND sed.s_warehouse IS NOT NULL
+        WHERE wo.docstatus = 1
+            AND wo.name > %(after_work_order)s
             {conditions}
-        GROUP BY se.work_order, sed.item_code
-    """.format(conditions=conditions.replace('wo.', 'wo.')), filters, as_dict=1)
+        ORDER BY wo.name
+        LIMIT %(page_length)s
+    """.format(conditions=conditions), values)
 
-    # Get scrap items from Work Orders
-    scrap_items = frappe.db.sql("""
-        SELECT
-            wo.name as work_order,
-            wo.department,
-            wo.production_item,
-            wos.item_code,
-            wos.item_name,
-            'Scrap' as type,
-            0 as required_qty,
-            wos.stock_qty as consumed_qty,
-            0 as variance,
-            wos.stock_uom
-        FROM `tabWork Order` wo
-        INNER JOIN `tabWork Order Scrap Item` wos ON wos.parent = wo.name
-        WHERE wo.docstatus = 1 {conditions}
-    """.format(conditions=conditions), filters, as_dict=1)
 
-    # Combine and calculate variance
-    data = []
-    item_map = {}
+def get_page(work_orders):
+    """Required, consumed and scrap rows of a page of Work Orders in a single query.
+
+    Consumption is aggregated only for the Work Orders of the page, and the
+    variance is worked out in the database: Required rows carry what was
+    consumed against them, consumption of items not in the Work Order shows up
+    as separate Consumed rows.
+    """
+    return frappe.db.sql("""
+        WITH work_orders AS (
+            SELECT wo.name, wo.department, wo.production_item
+            FROM `tabWork Order` wo
+            WHERE wo.name IN %(work_orders)s
+        ),
+        consumed AS (
+            SELECT
+                se.work_order,
+                sed.item_code,
+                MAX(sed.item_name) as item_name,
+                MAX(sed.stock_uom) as stock_uom,
+                SUM(sed.qty) as consumed_qty
+            FROM work_orders page
+            INNER JOIN `tabStock Entry` se ON se.work_order = page.name
+            INNER JOIN `tabStock Entry Detail` sed ON sed.parent = se.name
+            WHERE se.docstatus = 1
+                AND se.purpose = 'Manufacture'
+                AND sed.s_warehouse IS NOT NULL
+            GROUP BY se.work_order, sed.item_code
+        )
+        SELECT
+            work_order, department, production_item, item_code, item_name,
+            type, required_qty, consumed_qty, variance, stock_uom
+        FROM (
+            SELECT
+                wo.name as work_order,
+                wo.department,
+                wo.production_item,
+                woi.item_code,
+                woi.item_name,
+                'Required' as type,
+                woi.required_qty,
+                IFNULL(c.consumed_qty, 0) as consumed_qty,
+                IFNULL(c.consumed_qty - woi.required_qty, 0) as variance,
+                woi.stock_uom,
+                0 as type_order,
+                woi.idx as row_order
+            FROM work_orders wo
+            INNER JOIN `tabWork Order Item` woi
+                ON woi.parent = wo.name AND woi.parenttype = 'Work Order'
+            LEFT JOIN consumed c
+                ON c.work_order = wo.name AND c.item_code = woi.item_code
 
-    # Process required items
-    for item in required_items:
-        key = (item.work_order, item.item_code)
-        item_map[key] = item
-        data.append(item)
+            UNION ALL
 
-    # Process consumed items
-    for item in consumed_items:
-        key = (item.work_order, item.item_code)
-        if key in item_map:
-            item_map[key]['consumed_qty'] = item.consumed_qty
-            item_map[key]['variance'] = item.consumed_qty - item_map[key]['required_qty']
-        else:
-            data.append(item)
+            SELECT
+                c.work_order,
+                wo.department,
+                wo.production_item,
+                c.item_code,
+                c.item_name,
+                'Consumed',
+                0,
+                c.consumed_qty,
+                0,
+                c.stock_uom,
+                1,
+                0
+            FROM consumed c
+            INNER JOIN work_orders wo ON wo.name = c.work_order
+            WHERE NOT EXISTS (
+                SELECT 1 FROM `tabWork Order Item` woi
+                WHERE woi.parent = c.work_order
+                    AND woi.parenttype = 'Work Order'
+                    AND woi.item_code = c.item_code
+            )
 
-    # Add scrap items
-    data.extend(scrap_items)
+            UNION ALL
 
-    return data
+            SELECT
+                wo.name,
+                wo.department,
+                wo.production_item,
+                wos.item_code,
+                wos.item_name,
+                'Scrap',
+                0,
+                wos.stock_qty,
+                0,
+                wos.stock_uom,
+                2,
+                wos.idx
+            FROM work_orders wo
+            INNER JOIN `tabWork Order Scrap Item` wos
+                ON wos.parent = wo.name AND wos.parenttype = 'Work Order'
+        ) material_rows
+        ORDER BY work_order, type_order, row_order, item_code
+    """, {"work_orders": tuple(work_orders)}, as_list=1)
 
 
 def get_conditions(filters):
@@ -188,3 +245,18 @@ def get_conditions(filters):
         conditions.append("wo.department = %(department)s")
 
     return " AND " + " AND ".join(conditions) if conditions else ""
+
+
+def get_export(filters):
+    """Columns and a row iterator for the background CSV export."""
+    rows = (row for page in iter_pages(filters) for row in page)
+    return get_columns(), rows
+
+
+@frappe.whitelist()
+def export_csv(filters=None):
+    enqueue_csv_export(
+        REPORT_NAME,
+        "variant_bulk_creation.variant_bulk_creation.report.work_order_consumed_materials_with_scrap.work_order_consumed_materials_with_scrap.get_export",
+        filters,
+    )
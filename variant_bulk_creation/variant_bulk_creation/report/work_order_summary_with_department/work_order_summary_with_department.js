@@ -44,5 +44,75 @@ frappe.query_reports["Work Order Summary with Department"] = {
 			"fieldtype": "Link",
 			"options": "Item"
 		}
-	]
+	],
+	"after_datatable_render": function(datatable) {
+		vbcSetupPageLoader(frappe.query_report, datatable);
+	}
 };
+
+// Keep in sync with PAGE_LENGTH in work_order_summary_with_department.py
+const VBC_WO_SUMMARY_PAGE_LENGTH = 500;
+const VBC_WO_SUMMARY_NEXT_PAGE_METHOD =
+	"variant_bulk_creation.variant_bulk_creation.report.work_order_summary_with_department.work_order_summary_with_department.get_next_page";
+
+function vbcSetupPageLoader(report, datatable) {
+	// A fresh render (new filters or refresh) starts over from the first page
+	const state = {
+		datatable: datatable,
+		loading: false,
+		done: (report.data || []).length < VBC_WO_SUMMARY_PAGE_LENGTH
+	};
+	report._vbc_page_loader = state;
+
+	const scrollable = datatable.bodyScrollable;
+	if (!scrollable || scrollable._vbc_page_loader_bound) {
+		return;
+	}
+	scrollable._vbc_page_loader_bound = true;
+
+	scrollable.addEventListener("scroll", () => {
+		const current = report._vbc_page_loader;
+		if (!current || current.datatable.bodyScrollable !== scrollable) {
+			return;
+		}
+		if (scrollable.scrollTop + scrollable.clientHeight >= scrollable.scrollHeight - 200) {
+			vbcLoadNextPage(report, current);
+		}
+	}, { passive: true });
+}
+
+function vbcLoadNextPage(report, state) {
+	if (state.loading || state.done || !(report.data || []).length) {
+		return;
+	}
+
+	const last = report.data[report.data.length - 1];
+	state.loading = true;
+
+	frappe.call({
+		method: VBC_WO_SUMMARY_NEXT_PAGE_METHOD,
+		args: {
+			filters: report.get_filter_values(),
+			after: {
+				planned_start_date: last.planned_start_date,
+				creation: last.creation,
+				work_order: last.work_order
+			}
+		},
+		freeze: false
+	}).then((r) => {
+		// Ignore pages that arrive after the report was re-run
+		if (report._vbc_page_loader !== state) {
+			return;
+		}
+
+		const rows = r.message || [];
+		state.done = rows.length < VBC_WO_SUMMARY_PAGE_LENGTH;
+		if (rows.length) {
+			report.data.push(...rows);
+			state.datatable.appendRows(rows);
+		}
+	}).always(() => {
+		state.loading = false;
+	});
+}
@@ -4,11 +4,24 @@
 import frappe
 from frappe import _
 
+from variant_bulk_creation.variant_bulk_creation.report_cache import get_cached_result
+
+REPORT_NAME = "Work Order Summary with Department"
+# Keep in sync with PAGE_LENGTH in work_order_summary_with_department.js
+PAGE_LENGTH = 500
+
 
 def execute(filters=None):
+	"""Return the first page and the totals; the report JS loads further pages on scroll."""
+	filters = frappe._dict(filters or {})
+
 	columns = get_columns()
-	data = get_data(filters)
-	return columns, data
+	result = get_cached_result(
+		REPORT_NAME,
+		filters,
+		lambda: {"data": get_data(filters), "summary": get_report_summary(filters)},
+	)
+	return columns, result["data"], None, None, result["summary"]
 
 
 def get_columns():
@@ -123,8 +136,27 @@ def get_columns():
 	]
 
 
-def get_data(filters):
+def get_data(filters, after=None, page_length=PAGE_LENGTH):
+	"""One page of Work Orders, keyset-paginated on (planned_start_date, creation, name) descending.
+
+	``after`` holds those three values of the last row already shown.
+	"""
 	conditions = get_conditions(filters)
+	values = dict(filters, page_length=page_length)
+
+	if after:
+		conditions += """ AND (
+			wo.planned_start_date < %(after_start)s
+			OR (wo.planned_start_date = %(after_start)s AND (
+				wo.creation < %(after_creation)s
+				OR (wo.creation = %(after_creation)s AND wo.name < %(after_name)s)
+			))
+		)"""
+		values.update(
+			after_start=after.get("planned_start_date"),
+			after_creation=after.get("creation"),
+			after_name=after.get("work_order"),
+		)
 
 	data = frappe.db.sql(f"""
 		SELECT
@@ -144,7 +176,8 @@ def get_data(filters):
 			wo.actual_start_date,
 			wo.actual_end_date,
 			wo.bom_no,
-			wo.sales_order
+			wo.sales_order,
+			wo.creation
 		FROM
 			`tabWork Order` wo
 		LEFT JOIN
@@ -153,12 +186,52 @@ def get_data(filters):
 			wo.docstatus < 2
 			{conditions}
 		ORDER BY
-			wo.planned_start_date DESC, wo.creation DESC
-	""", filters, as_dict=1)
+			wo.planned_start_date DESC, wo.creation DESC, wo.name DESC
+		LIMIT %(page_length)s
+	""", values, as_dict=1)
 
 	return data
 
 
+def get_report_summary(filters):
+	"""Totals over every matching Work Order, independent of the pages loaded."""
+	conditions = get_conditions(filters)
+
+	totals = frappe.db.sql(f"""
+		SELECT
+			COUNT(*) as work_orders,
+			IFNULL(SUM(wo.qty), 0) as qty,
+			IFNULL(SUM(wo.total_pcs), 0) as total_pcs,
+			IFNULL(SUM(wo.produced_qty), 0) as produced_qty,
+			IFNULL(SUM(wo.total_pcs_produced), 0) as total_pcs_produced
+		FROM
+			`tabWork Order` wo
+		WHERE
+			wo.docstatus < 2
+			{conditions}
+	""", filters, as_dict=1)[0]
+
+	return [
+		{"label": _("Work Orders"), "value": totals.work_orders, "datatype": "Int", "indicator": "Blue"},
+		{"label": _("Qty to Manufacture"), "value": totals.qty, "datatype": "Float"},
+		{"label": _("Manufactured Qty"), "value": totals.produced_qty, "datatype": "Float", "indicator": "Green"},
+		{"label": _("Total Pieces to Manufacture"), "value": totals.total_pcs, "datatype": "Float"},
+		{"label": _("Total Pieces Produced"), "value": totals.total_pcs_produced, "datatype": "Float", "indicator": "Green"},
+	]
+
+
+@frappe.whitelist()
+def get_next_page(filters=None, after=None):
+	"""Rows following ``after`` for the report's scroll loader."""
+	if not frappe.get_doc("Report", REPORT_NAME).is_permitted():
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	filters = frappe._dict(frappe.parse_json(filters) or {})
+	after = frappe.parse_json(after) or None
+
+	return get_data(filters, after)
+
+
 def get_conditions(filters):
 	conditions = []
 
@@ -0,0 +1,199 @@
+"""Redis result cache for the department reports.
+
+Results are keyed by the report name and its normalised filters (empty values
+dropped, keys sorted), together with two generation counters: a global one,
+bumped only when everything is outdated (rollup rebuilds), and the counter of
+the narrowest scope the filters select - ``(company, department)``,
+``(company, *)``, ``(*, department)`` or ``(*, *)`` for unfiltered results. A
+Work Order or a Stock Entry against one bumps, after commit, every scope
+counter that could include it, so only the cached results that could include
+it stop matching; other departments keep their entries until the TTL runs
+out.
+
+Charts are served stale-while-revalidate: an outdated chart is returned
+immediately and a background job recomputes it for the next request.
+
+The reports use raw SQL without user permission filtering, so one cached
+result can be shared by every user allowed to open the report.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, Optional
+
+import frappe
+
+RESULT_TTL = 10 * 60
+CHART_MAX_AGE = 24 * 60 * 60
+REFRESH_LOCK_TTL = 5 * 60
+
+_ANY = "*"
+
+
+def _normalise_filters(filters: Optional[Dict]) -> Dict:
+    normalised = {}
+    for key, value in (filters or {}).items():
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, "", [], 0, "0"):
+            continue
+        normalised[key] = value
+    return normalised
+
+
+def _generation_key(company: str, department: str) -> str:
+    return frappe.cache().make_key(f"vbc_report_generation|{company}|{department}")
+
+
+def _global_generation_key() -> str:
+    return frappe.cache().make_key("vbc_report_generation|global")
+
+
+def _get_generation(filters: Dict) -> str:
+    """Counters the result depends on: the global one and the scope its filters select."""
+
+    company = filters.get("company") or _ANY
+    department = filters.get("department") or _ANY
+    keys = [_global_generation_key(), _generation_key(company, department)]
+
+    return ".".join(frappe.safe_decode(value or b"0") for value in frappe.cache().mget(keys))
+
+
+def _cache_key(kind: str, report_name: str, filters: Dict) -> str:
+    digest = hashlib.sha1(json.dumps(filters, sort_keys=True, default=str).encode()).hexdigest()
+    return f"vbc_report_{kind}|{report_name}|{digest}"
+
+
+def get_cached_result(report_name: str, filters: Optional[Dict], compute: Callable[[], Any]) -> Any:
+    """Return the cached result for these filters, computing and storing it on a miss."""
+
+    filters = _normalise_filters(filters)
+    key = _cache_key("result", report_name, filters)
+    generation = _get_generation(filters)
+
+    cached = frappe.cache().get_value(key)
+    if cached and cached.get("generation") == generation:
+        return cached["value"]
+
+    value = compute()
+    frappe.cache().set_value(key, {"generation": generation, "value": value}, expires_in_sec=RESULT_TTL)
+    return value
+
+
+def get_cached_chart(report_name: str, filters: Optional[Dict], chart_method: str) -> Any:
+    """Return the chart for these filters, serving a stale one while it is rebuilt.
+
+    ``chart_method`` is the dotted path of a function taking the filters and
+    returning the chart payload; it is also what the background refresh calls.
+    """
+
+    filters = _normalise_filters(filters)
+    key = _cache_key("chart", report_name, filters)
+    generation = _get_generation(filters)
+
+    cached = frappe.cache().get_value(key)
+    if cached is None:
+        return _store_chart(key, generation, chart_method, filters)
+
+    if cached.get("generation") != generation:
+        _enqueue_chart_refresh(key, report_name, chart_method, filters)
+
+    return cached["value"]
+
+
+def _store_chart(key: str, generation: str, chart_method: str, filters: Dict) -> Any:
+    value = frappe.get_attr(chart_method)(frappe._dict(filters))
+    frappe.cache().set_value(
+        key,
+        {"generation": generation, "value": value, "computed_at": time.time()},
+        expires_in_sec=CHART_MAX_AGE,
+    )
+    return value
+
+
+def _enqueue_chart_refresh(key: str, report_name: str, chart_method: str, filters: Dict) -> None:
+    # One refresh per chart at a time, however many supervisors are looking at it
+    lock_key = frappe.cache().make_key(f"{key}|refreshing")
+    if not frappe.cache().set(lock_key, 1, nx=True, ex=REFRESH_LOCK_TTL):
+        return
+
+    frappe.enqueue(
+        "variant_bulk_creation.variant_bulk_creation.report_cache.refresh_cached_chart",
+        queue="short",
+        report_name=report_name,
+        chart_method=chart_method,
+        filters=filters,
+    )
+
+
+def refresh_cached_chart(report_name: str, chart_method: str, filters: Dict) -> None:
+    """Background job: recompute a stale chart."""
+
+    key = _cache_key("chart", report_name, filters)
+    try:
+        _store_chart(key, _get_generation(filters), chart_method, filters)
+    finally:
+        frappe.cache().delete(frappe.cache().make_key(f"{key}|refreshing"))
+
+
+def invalidate_reports(company: Optional[str] = None, department: Optional[str] = None) -> None:
+    """Outdate cached results that could cover ``company``/``department``.
+
+    Without arguments every cached result is outdated.
+    """
+
+    cache = frappe.cache()
+    if not (company or department):
+        cache.incr(_global_generation_key())
+        return
+
+    # Unfiltered results include every change
+    scopes = {(_ANY, _ANY)}
+    if company:
+        scopes.add((company, _ANY))
+    if department:
+        scopes.add((_ANY, department))
+        if company:
+            scopes.add((company, department))
+
+    for scope_company, scope_department in scopes:
+        cache.incr(_generation_key(scope_company, scope_department))
+
+
+def _invalidate_after_commit(scopes) -> None:
+    scopes = {tuple(scope) for scope in scopes if scope and any(scope)}
+    if not scopes:
+        return
+
+    def invalidate():
+        for company, department in scopes:
+            invalidate_reports(company, department)
+
+    frappe.db.after_commit.add(invalidate)
+
+
+def invalidate_for_work_order(doc, _event: Optional[str] = None) -> None:
+    """Work Order hook: outdate reports of its company/department, and the old ones if it moved."""
+
+    if doc.doctype != "Work Order":
+        return
+
+    scopes = [(doc.get("company"), doc.get("department"))]
+    before = doc.get_doc_before_save()
+    if before:
+        scopes.append((before.get("company"), before.get("department")))
+
+    _invalidate_after_commit(scopes)
+
+
+def invalidate_for_stock_entry(doc, _event: Optional[str] = None) -> None:
+    """Stock Entry hook: outdate reports of the Work Order the entry was made against."""
+
+    if doc.doctype != "Stock Entry" or not doc.get("work_order"):
+        return
+
+    scope = frappe.db.get_value("Work Order", doc.work_order, ["company", "department"])
+    _invalidate_after_commit([tuple(scope)] if scope else [])
@@ -0,0 +1,87 @@
+"""Streaming CSV export for the app's large script reports.
+
+Reports expose a ``get_export(filters)`` function returning ``(columns,
+rows)`` where ``rows`` is an iterator of row lists, usually fed page by page
+from a keyset-paginated query. The export runs in a background job and writes
+each row straight to a private file, so memory stays flat however many rows
+the report produces. The requesting user is notified over realtime with the
+file URL when it is ready.
+"""
+
+from __future__ import annotations
+
+import csv
+from typing import Any, Dict, Optional
+
+import frappe
+from frappe import _
+
+REALTIME_EVENT = "vbc_report_export"
+
+
+def enqueue_csv_export(report_name: str, export_method: str, filters: Optional[Any] = None) -> None:
+    """Queue a CSV export of ``report_name`` for the current user."""
+
+    if not frappe.get_doc("Report", report_name).is_permitted():
+        frappe.throw(
+            _("You are not permitted to export {0}.").format(frappe.bold(report_name)),
+            frappe.PermissionError,
+        )
+
+    parsed = frappe.parse_json(filters) if isinstance(filters, str) else filters
+
+    frappe.enqueue(
+        "variant_bulk_creation.variant_bulk_creation.report_export.run_csv_export",
+        queue="long",
+        timeout=3600,
+        report_name=report_name,
+        export_method=export_method,
+        filters=parsed or {},
+        user=frappe.session.user,
+    )
+    frappe.msgprint(
+        _("The export has been queued. You will be notified when the file is ready."),
+        alert=True,
+    )
+
+
+def run_csv_export(report_name: str, export_method: str, filters: Dict, user: str) -> None:
+    """Background job: stream the report rows into a private CSV File."""
+
+    frappe.set_user(user)
+
+    try:
+        columns, rows = frappe.get_attr(export_method)(frappe._dict(filters))
+        file_name = "{0}-{1}.csv".format(frappe.scrub(report_name), frappe.generate_hash(length=8))
+        path = frappe.get_site_path("private", "files", file_name)
+
+        with open(path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow([_(column.get("label")) for column in columns])
+            for row in rows:
+                writer.writerow(row)
+
+        file_doc = frappe.get_doc(
+            {
+                "doctype": "File",
+                "file_name": file_name,
+                "file_url": f"/private/files/{file_name}",
+                "is_private": 1,
+            }
+        )
+        file_doc.insert(ignore_permissions=True)
+        frappe.db.commit()
+    except Exception:
+        frappe.log_error(title=f"Variant Bulk Creation - {report_name} export", message=frappe.get_traceback())
+        frappe.publish_realtime(
+            REALTIME_EVENT,
+            {"report_name": report_name, "error": _("Export failed, see Error Log for details.")},
+            user=user,
+        )
+        return
+
+    frappe.publish_realtime(
+        REALTIME_EVENT,
+        {"report_name": report_name, "file_url": file_doc.file_url},
+        user=user,
+    )
@@ -2,18 +2,13 @@
 
 from __future__ import annotations
 
+import hashlib
 import re
-from typing import Optional
+from typing import Dict, Optional
 
 import frappe
 from frappe import _
-
-try:
-    from erpnext.controllers.item_variant import create_variant, get_variant
-except ImportError as exc:  # pragma: no cover - ERPNext not available during tests
-    raise ImportError(
-        "Variant Bulk Creation requires ERPNext to resolve Sales Order variants."
-    ) from exc
+from frappe.utils import flt
 
 
 def _get_template_attributes(template_item: str) -> dict:
@@ -211,6 +206,10 @@ def _materialise_variant(
             numeric_length = None
     weight_info = _calculate_weight_for_variant(template_item, numeric_length, sticker)
 
+    # Imported here so the Sales Order hooks that never resolve a variant do
+    # not load ERPNext's variant controller in a cold worker
+    from erpnext.controllers.item_variant import create_variant, get_variant
+
     # Try to find existing variant
     variant_name = get_variant(template_item, args)
     if variant_name:
@@ -257,13 +256,61 @@ def _materialise_variant(
     return variant_doc
 
 
+def _get_template_versions(template_items) -> Dict[str, str]:
+    """Return ``{template: modified}`` for the given templates in one query."""
+
+    templates = list({template for template in template_items if template})
+    if not templates:
+        return {}
+
+    return {
+        row.name: str(row.modified)
+        for row in frappe.get_all(
+            "Item", filters={"name": ["in", templates]}, fields=["name", "modified"]
+        )
+    }
+
+
+def _variant_hash(
+    template_item: str,
+    powder_code: Optional[str],
+    length,
+    sticker: Optional[str],
+    template_version: Optional[str],
+    item_code: Optional[str],
+) -> str:
+    """Compact fingerprint of a row's variant inputs and the variant they resolved to.
+
+    The template's ``modified`` stands in for its attributes and kg/m weights,
+    so editing the template re-resolves its rows on the next save; including
+    the item code catches rows whose item was changed by hand.
+    """
+
+    key = "|".join(
+        [
+            template_item or "",
+            powder_code or "",
+            "" if length is None else repr(flt(length)),
+            sticker or "",
+            template_version or "",
+            item_code or "",
+        ]
+    )
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
 def ensure_sales_order_variants(doc, _event: Optional[str] = None) -> None:
     """Populate Sales Order item codes from template and attribute selections.
 
     Reads from non-prefixed custom fields on Sales Order Item:
     template_item, sticker, powder_code, length.
+
+    Rows whose ``vbc_variant_hash`` still matches their template, attributes
+    and template version already point at the right variant and are skipped.
     """
 
+    template_versions = _get_template_versions(row.get("template_item") for row in doc.get("items", []))
+
     for row in doc.get("items", []):
         template_item = row.get("template_item")
         sticker = row.get("sticker")
@@ -276,6 +323,13 @@ def ensure_sales_order_variants(doc, _event: Optional[str] = None) -> None:
         if not all([sticker, powder_code, length is not None]):
             continue
 
+        template_version = template_versions.get(template_item)
+        if row.get("item_code") and row.get("vbc_variant_hash") == _variant_hash(
+            template_item, powder_code, length, sticker, template_version, row.item_code
+        ):
+            _set_qty_from_total_pcs(row)
+            continue
+
         try:
             variant_doc = _materialise_variant(
                 template_item=template_item,
@@ -295,6 +349,9 @@ def ensure_sales_order_variants(doc, _event: Optional[str] = None) -> None:
             )
 
         row.item_code = variant_doc.name
+        row.vbc_variant_hash = _variant_hash(
+            template_item, powder_code, length, sticker, template_version, variant_doc.name
+        )
 
         if hasattr(row, "item_name") and variant_doc.get("item_name"):
             row.item_name = variant_doc.item_name
@@ -314,11 +371,16 @@ def ensure_sales_order_variants(doc, _event: Optional[str] = None) -> None:
             row.weight_per_unit = variant_doc.weight_per_unit
             row.weight_uom = variant_doc.get("weight_uom") or "Kg"
 
-        # If total_weight was entered (as total pcs), recalculate qty
-        total_weight = row.get("total_weight")
-        if total_weight and row.weight_per_unit:
-            weight_per_piece = 1 / row.weight_per_unit
-            row.qty = total_weight * weight_per_piece
+        _set_qty_from_total_pcs(row)
+
+
+def _set_qty_from_total_pcs(row) -> None:
+    """If total_weight was entered (as total pcs), recalculate qty."""
+
+    total_weight = row.get("total_weight")
+    if total_weight and row.get("weight_per_unit"):
+        weight_per_piece = 1 / row.weight_per_unit
+        row.qty = total_weight * weight_per_piece
 
 
 def stash_total_pcs(doc, _event: Optional[str] = None) -> None:
@@ -386,18 +448,13 @@ def restore_total_pcs_and_save(doc, _event: Optional[str] = None) -> None:
 
 
 def _sales_order_before_print(doc, method=None, settings=None):
-    """Convert image paths to <img> tags for print rendering.
-
-    Uses markupsafe.Markup so Jinja does not auto-escape the HTML.
-    """
-    from markupsafe import Markup
+    """Convert image paths to thumbnail <img> tags for print rendering."""
+    from .jinja_utils import render_item_image
 
     for row in doc.get("items", []):
         image = row.get("image")
         if image and not str(image).startswith("<"):
-            row.image = Markup(
-                '<img src="{0}" style="max-height:80px; max-width:120px;">'.format(image)
-            )
+            row.image = render_item_image(image)
 
 
 @frappe.whitelist()
@@ -0,0 +1,438 @@
+"""Stock Ledger Entry helpers shared by every voucher that carries total_pcs."""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import frappe
+from frappe.utils import flt, now
+
+# Voucher type -> child table whose rows are referenced by
+# ``Stock Ledger Entry.voucher_detail_no``. A voucher type is only processed
+# when its child table has a ``total_pcs`` field, so Purchase Receipt starts
+# working as soon as a ``Purchase Receipt Item-total_pcs`` Custom Field exists
+# and the hook is registered for it.
+PCS_DETAIL_DOCTYPES = {
+    "Stock Entry": "Stock Entry Detail",
+    "Delivery Note": "Delivery Note Item",
+    "Stock Reconciliation": "Stock Reconciliation Item",
+    "Purchase Receipt": "Purchase Receipt Item",
+}
+
+
+def get_pcs_detail_doctype(voucher_type: str) -> Optional[str]:
+    """Return the child doctype holding total_pcs for the voucher type, if any."""
+
+    detail_doctype = PCS_DETAIL_DOCTYPES.get(voucher_type)
+    if not detail_doctype or not frappe.get_meta(detail_doctype).has_field("total_pcs"):
+        return None
+    return detail_doctype
+
+
+def populate_total_pcs_in_stock_ledger(doc, _event: Optional[str] = None) -> None:
+    """Copy total_pcs from the voucher rows to their Stock Ledger Entries.
+
+    Called on submit, after the controller has posted the ledger. Every SLE of
+    the voucher is updated by a single ``UPDATE ... JOIN`` on
+    ``voucher_detail_no`` instead of a lookup and a write per row.
+    """
+
+    detail_doctype = get_pcs_detail_doctype(doc.doctype)
+    if not detail_doctype:
+        return
+
+    if not any(row.get("total_pcs") for row in doc.get("items", [])):
+        return
+
+    frappe.db.sql(
+        f"""
+        UPDATE `tabStock Ledger Entry` sle
+        INNER JOIN `tab{detail_doctype}` detail
+            ON detail.name = sle.voucher_detail_no
+            AND detail.item_code = sle.item_code
+        SET sle.total_pcs = detail.total_pcs
+        WHERE sle.voucher_type = %(voucher_type)s
+            AND sle.voucher_no = %(voucher_no)s
+            AND detail.parent = %(voucher_no)s
+            AND IFNULL(detail.total_pcs, 0) != 0
+        """,
+        {"voucher_type": doc.doctype, "voucher_no": doc.name},
+    )
+
+
+def _get_voucher_ledger_rows(voucher_type: str, voucher_no: str) -> list:
+    """Return the SLEs of the voucher that carry pieces, in posting order.
+
+    Reconciliation entries that count the stock down to zero are included too,
+    since they reset the balance to zero pieces.
+    """
+
+    return frappe.db.sql(
+        """
+        SELECT item_code, warehouse, actual_qty, qty_after_transaction, total_pcs
+        FROM `tabStock Ledger Entry`
+        WHERE voucher_type = %(voucher_type)s
+            AND voucher_no = %(voucher_no)s
+            AND (
+                IFNULL(total_pcs, 0) != 0
+                OR (%(voucher_type)s = 'Stock Reconciliation' AND qty_after_transaction = 0)
+            )
+        ORDER BY posting_date, posting_time, creation
+        """,
+        {"voucher_type": voucher_type, "voucher_no": voucher_no},
+        as_dict=True,
+    )
+
+
+def _upsert_pieces_bins(balances: Dict[Tuple[str, str], float], reset: bool = False) -> None:
+    """Add ``balances`` to the Pieces Bin rows, or overwrite them when ``reset``.
+
+    A single ``INSERT ... ON DUPLICATE KEY UPDATE`` on the (item_code,
+    warehouse) unique key, so concurrent vouchers never read-modify-write the
+    same balance.
+    """
+
+    if not balances:
+        return
+
+    timestamp = now()
+    user = frappe.session.user
+    values = []
+    for (item_code, warehouse), pcs in balances.items():
+        values.extend(
+            [frappe.generate_hash(length=10), item_code, warehouse, pcs, timestamp, timestamp, user, user]
+        )
+
+    placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, 0, 0)"] * len(balances))
+    update = "VALUES(pcs_qty)" if reset else "pcs_qty + VALUES(pcs_qty)"
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tabPieces Bin`
+            (name, item_code, warehouse, pcs_qty, creation, modified, owner, modified_by, docstatus, idx)
+        VALUES {placeholders}
+        ON DUPLICATE KEY UPDATE pcs_qty = {update}, modified = VALUES(modified)
+        """,
+        values,
+    )
+
+
+# SLEs strictly before / after a given (posting_date, posting_time, creation)
+_BEFORE = """(
+    posting_date < %(posting_date)s
+    OR (posting_date = %(posting_date)s AND (
+        posting_time < %(posting_time)s
+        OR (posting_time = %(posting_time)s AND creation < %(creation)s)
+    ))
+)"""
+_AFTER = """(
+    posting_date > %(posting_date)s
+    OR (posting_date = %(posting_date)s AND (
+        posting_time > %(posting_time)s
+        OR (posting_time = %(posting_time)s AND creation > %(creation)s)
+    ))
+)"""
+
+
+def _position(entry) -> dict:
+    return {"posting_date": entry.posting_date, "posting_time": entry.posting_time, "creation": entry.creation}
+
+
+def _write_pcs_stamps(stamps: List[Tuple[str, float]]) -> None:
+    """Set ``pcs_after_transaction`` for many SLEs, 1000 per statement."""
+
+    for start in range(0, len(stamps), 1000):
+        chunk = stamps[start : start + 1000]
+        cases = " ".join(["WHEN %s THEN %s"] * len(chunk))
+        frappe.db.sql(
+            f"""
+            UPDATE `tabStock Ledger Entry`
+            SET pcs_after_transaction = CASE name {cases} END
+            WHERE name IN ({", ".join(["%s"] * len(chunk))})
+            """,
+            [value for stamp in chunk for value in stamp] + [stamp[0] for stamp in chunk],
+        )
+
+
+def _get_pcs_before(item_code: str, warehouse: str, voucher_no: str, first_entry) -> float:
+    """Running pieces balance just before ``first_entry``, ignoring the voucher itself.
+
+    Entries of vouchers without pieces, and cancel reversals, are never
+    stamped, so only stamped entries are considered here and in the other
+    balance lookups.
+    """
+
+    balance = frappe.db.sql(
+        f"""
+        SELECT pcs_after_transaction
+        FROM `tabStock Ledger Entry`
+        WHERE item_code = %(item_code)s
+            AND warehouse = %(warehouse)s
+            AND is_cancelled = 0
+            AND pcs_after_transaction IS NOT NULL
+            AND voucher_no != %(voucher_no)s
+            AND {_BEFORE}
+        ORDER BY posting_date DESC, posting_time DESC, creation DESC
+        LIMIT 1
+        """,
+        dict(_position(first_entry), item_code=item_code, warehouse=warehouse, voucher_no=voucher_no),
+    )
+    return flt(balance[0][0]) if balance else 0.0
+
+
+def _shift_later_pcs(item_code: str, warehouse: str, voucher_no: str, last_entry, shift: float) -> None:
+    """Move the running balance of SLEs posted after ``last_entry`` by ``shift``.
+
+    Only a back-dated voucher has later entries. The shift stops at the next
+    Stock Reconciliation, which sets the balance absolutely.
+    """
+
+    if not shift:
+        return
+
+    params = dict(_position(last_entry), item_code=item_code, warehouse=warehouse, voucher_no=voucher_no)
+    boundary = frappe.db.sql(
+        f"""
+        SELECT posting_date, posting_time, creation
+        FROM `tabStock Ledger Entry`
+        WHERE item_code = %(item_code)s
+            AND warehouse = %(warehouse)s
+            AND is_cancelled = 0
+            AND voucher_type = 'Stock Reconciliation'
+            AND voucher_no != %(voucher_no)s
+            AND {_AFTER}
+        ORDER BY posting_date, posting_time, creation
+        LIMIT 1
+        """,
+        params,
+        as_dict=True,
+    )
+
+    condition = ""
+    if boundary:
+        params.update({f"boundary_{key}": value for key, value in _position(boundary[0]).items()})
+        condition = "AND " + _BEFORE.replace("%(", "%(boundary_")
+
+    frappe.db.sql(
+        f"""
+        UPDATE `tabStock Ledger Entry`
+        SET pcs_after_transaction = pcs_after_transaction + %(shift)s
+        WHERE item_code = %(item_code)s
+            AND warehouse = %(warehouse)s
+            AND is_cancelled = 0
+            AND voucher_no != %(voucher_no)s
+            AND pcs_after_transaction IS NOT NULL
+            AND {_AFTER}
+            {condition}
+        """,
+        dict(params, shift=shift),
+    )
+
+
+def _restamp_pcs_after_transaction(voucher_type: str, voucher_no: str, cancel: bool) -> None:
+    """Stamp each SLE of the voucher with the running pieces balance after it.
+
+    Per (item, warehouse) the balance before the voucher's first entry is
+    carried through its entries in posting order. Entries posted later are
+    then shifted by the voucher's net effect, so back-dated vouchers keep the
+    whole ledger consistent. On cancel the voucher's effect is taken out of
+    the later entries again.
+    """
+
+    entries = frappe.db.sql(
+        """
+        SELECT name, item_code, warehouse, actual_qty, qty_after_transaction, total_pcs,
+            pcs_after_transaction, posting_date, posting_time, creation
+        FROM `tabStock Ledger Entry`
+        WHERE voucher_type = %(voucher_type)s
+            AND voucher_no = %(voucher_no)s
+            AND is_cancelled = %(is_cancelled)s
+        ORDER BY posting_date, posting_time, creation
+        """,
+        # ERPNext flags the original entries as cancelled before on_cancel hooks run
+        {"voucher_type": voucher_type, "voucher_no": voucher_no, "is_cancelled": 1 if cancel else 0},
+        as_dict=True,
+    )
+
+    pairs: Dict[Tuple[str, str], list] = {}
+    for entry in entries:
+        # Reversal entries added on cancel carry no pieces and no stamp
+        if cancel and entry.pcs_after_transaction is None:
+            continue
+        pairs.setdefault((entry.item_code, entry.warehouse), []).append(entry)
+
+    stamps: List[Tuple[str, float]] = []
+    for (item_code, warehouse), pair_entries in pairs.items():
+        before = _get_pcs_before(item_code, warehouse, voucher_no, pair_entries[0])
+
+        if cancel:
+            after = flt(pair_entries[-1].pcs_after_transaction)
+            _shift_later_pcs(item_code, warehouse, voucher_no, pair_entries[-1], before - after)
+            continue
+
+        balance = before
+        for entry in pair_entries:
+            if voucher_type == "Stock Reconciliation":
+                if entry.total_pcs is not None or not flt(entry.qty_after_transaction):
+                    balance = flt(entry.total_pcs)
+            elif entry.total_pcs:
+                balance += flt(entry.total_pcs) * (1 if flt(entry.actual_qty) >= 0 else -1)
+            stamps.append((entry.name, balance))
+
+        _shift_later_pcs(item_code, warehouse, voucher_no, pair_entries[-1], balance - before)
+
+    _write_pcs_stamps(stamps)
+
+
+def _get_last_pcs_after_transaction(item_code: str, warehouse: str) -> float:
+    balance = frappe.db.sql(
+        """
+        SELECT pcs_after_transaction
+        FROM `tabStock Ledger Entry`
+        WHERE item_code = %s
+            AND warehouse = %s
+            AND is_cancelled = 0
+            AND pcs_after_transaction IS NOT NULL
+        ORDER BY posting_date DESC, posting_time DESC, creation DESC
+        LIMIT 1
+        """,
+        (item_code, warehouse),
+    )
+    return flt(balance[0][0]) if balance else 0.0
+
+
+def update_pieces_balance(doc, event: Optional[str] = None) -> None:
+    """Apply the voucher's pieces to the Pieces Bin balances on submit and cancel.
+
+    Receipts add and issues subtract their ``total_pcs``. A Stock
+    Reconciliation resets the balance to the counted pieces; cancelling it
+    restores the balance left by the latest remaining ledger entry. Each SLE
+    of a submitted voucher is stamped with its running ``pcs_after_transaction``
+    so an as-of lookup is a single indexed read.
+    """
+
+    if doc.doctype not in PCS_DETAIL_DOCTYPES:
+        return
+
+    rows = _get_voucher_ledger_rows(doc.doctype, doc.name)
+    if not rows:
+        return
+
+    cancel = event == "on_cancel"
+    is_reconciliation = doc.doctype == "Stock Reconciliation"
+    balances: Dict[Tuple[str, str], float] = {}
+
+    for row in rows:
+        key = (row.item_code, row.warehouse)
+        if is_reconciliation:
+            balances[key] = 0.0 if cancel else flt(row.total_pcs)
+            continue
+
+        # On cancel ERPNext adds reversal SLEs without total_pcs, so only the
+        # original entries are returned here and their effect is undone.
+        sign = 1 if flt(row.actual_qty) >= 0 else -1
+        if cancel:
+            sign = -sign
+        balances[key] = balances.get(key, 0.0) + sign * flt(row.total_pcs)
+
+    _restamp_pcs_after_transaction(doc.doctype, doc.name, cancel)
+
+    if is_reconciliation:
+        # A back-dated count only sets the balance up to the next entry, so the
+        # bin takes whatever the ledger ends on after restamping
+        balances = {key: _get_last_pcs_after_transaction(*key) for key in balances}
+
+    _upsert_pieces_bins(balances, reset=is_reconciliation)
+
+
+@frappe.whitelist()
+def get_pcs_balance(
+    item_code: str,
+    warehouse: str,
+    posting_date: Optional[str] = None,
+    posting_time: Optional[str] = None,
+) -> float:
+    """Return the pieces balance now, or as of the given posting date and time."""
+
+    if not posting_date:
+        return flt(
+            frappe.db.get_value(
+                "Pieces Bin", {"item_code": item_code, "warehouse": warehouse}, "pcs_qty"
+            )
+        )
+
+    balance = frappe.db.sql(
+        """
+        SELECT pcs_after_transaction
+        FROM `tabStock Ledger Entry`
+        WHERE item_code = %(item_code)s
+            AND warehouse = %(warehouse)s
+            AND is_cancelled = 0
+            AND pcs_after_transaction IS NOT NULL
+            AND (
+                posting_date < %(posting_date)s
+                OR (posting_date = %(posting_date)s AND posting_time <= %(posting_time)s)
+            )
+        ORDER BY posting_date DESC, posting_time DESC, creation DESC
+        LIMIT 1
+        """,
+        {
+            "item_code": item_code,
+            "warehouse": warehouse,
+            "posting_date": posting_date,
+            "posting_time": posting_time or "23:59:59",
+        },
+    )
+    return flt(balance[0][0]) if balance else 0.0
+
+
+def rebuild_pieces_balance(item_code: Optional[str] = None, warehouse: Optional[str] = None) -> None:
+    """Recompute Pieces Bin and every ``pcs_after_transaction`` from the ledger.
+
+    Meant for a one-off run after the total_pcs backfill, or to repair
+    balances after back-dated postings::
+
+        bench --site your-site execute variant_bulk_creation.variant_bulk_creation.stock_ledger.rebuild_pieces_balance
+    """
+
+    conditions = ["is_cancelled = 0"]
+    if item_code:
+        conditions.append("item_code = %(item_code)s")
+    if warehouse:
+        conditions.append("warehouse = %(warehouse)s")
+    where = " AND ".join(conditions)
+    params = {"item_code": item_code, "warehouse": warehouse}
+
+    pairs = frappe.db.sql(
+        f"SELECT DISTINCT item_code, warehouse FROM `tabStock Ledger Entry` WHERE {where}",
+        params,
+    )
+
+    for index, (pair_item, pair_warehouse) in enumerate(pairs, start=1):
+        entries = frappe.db.sql(
+            """
+            SELECT name, voucher_type, actual_qty, total_pcs
+            FROM `tabStock Ledger Entry`
+            WHERE item_code = %s AND warehouse = %s AND is_cancelled = 0
+            ORDER BY posting_date, posting_time, creation
+            """,
+            (pair_item, pair_warehouse),
+            as_dict=True,
+        )
+
+        balance = 0.0
+        stamps = []
+        for entry in entries:
+            if entry.voucher_type == "Stock Reconciliation" and entry.total_pcs is not None:
+                balance = flt(entry.total_pcs)
+            elif entry.total_pcs:
+                balance += flt(entry.total_pcs) * (1 if flt(entry.actual_qty) >= 0 else -1)
+            stamps.append((entry.name, balance))
+
+        _write_pcs_stamps(stamps)
+
+        _upsert_pieces_bins({(pair_item, pair_warehouse): balance}, reset=True)
+
+        if index % 100 == 0:
+            frappe.db.commit()
+
+    frappe.db.commit()
@@ -0,0 +1,381 @@
+"""Bulk Stock Reconciliation import from a count sheet in pieces.
+
+The CSV has one line per counted (template, powder code, length, sticker,
+warehouse) with the number of pieces. The import resolves every distinct
+variant tuple once against an in-memory index of existing variants, creating
+only the missing ones, converts the whole pieces column to stock quantity in
+one pass from a single weight lookup, and writes draft Stock Reconciliations
+in chunks from a background job.
+
+Each entry keeps the CSV lines it was summed from. Warehouses are checked up
+front, and when a chunk still fails to insert, its entries are tried one by
+one so only the offending lines are reported and the rest are imported.
+
+Columns (header names are case-insensitive): ``template_item``,
+``powder_code``, ``length``, ``sticker``, ``warehouse``, ``total_pcs`` and an
+optional ``valuation_rate``.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt
+from frappe.utils.csvutils import read_csv_content
+
+from .item_weight import _get_weight_factors
+from .variant_index import VariantIndex, get_template_attribute_fields
+
+REALTIME_EVENT = "vbc_stock_reconciliation_import"
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+REQUIRED_COLUMNS = ("template_item", "powder_code", "length", "sticker", "warehouse", "total_pcs")
+COLUMN_ALIASES = {
+    "template": "template_item",
+    "powder": "powder_code",
+    "pcs": "total_pcs",
+    "pieces": "total_pcs",
+    "rate": "valuation_rate",
+}
+
+
+def _get_file(file_url: str):
+    """Return the File behind ``file_url`` if the session user may read it."""
+
+    file_name = frappe.db.get_value("File", {"file_url": file_url}, "name")
+    if not file_name:
+        frappe.throw(_("File {0} was not found.").format(file_url), frappe.DoesNotExistError)
+
+    file_doc = frappe.get_doc("File", file_name)
+    frappe.has_permission("File", "read", doc=file_doc, throw=True)
+    return file_doc
+
+
+def _read_columns(file_url: str) -> Dict[str, list]:
+    """Return the CSV as ``{column: [values]}``."""
+
+    content = _get_file(file_url).get_content()
+    rows = read_csv_content(content)
+    if not rows:
+        frappe.throw(_("The file is empty."))
+
+    header = []
+    for title in rows[0]:
+        key = frappe.scrub(str(title or "").strip())
+        header.append(COLUMN_ALIASES.get(key, key))
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        frappe.throw(_("The file is missing columns: {0}").format(", ".join(missing)))
+
+    body = [row for row in rows[1:] if any(str(value or "").strip() for value in row)]
+    width = len(header)
+    columns = list(zip(*[list(row[:width]) + [""] * (width - len(row)) for row in body])) or [()] * width
+
+    return {name: [str(value or "").strip() for value in values] for name, values in zip(header, columns)}
+
+
+def _resolve_variants(columns: Dict[str, list], errors: List[dict]) -> List[Optional[str]]:
+    """Return the variant item code per line, resolving each distinct tuple once."""
+
+    from .sales_order import _materialise_variant
+
+    keys = list(
+        zip(columns["template_item"], columns["powder_code"], columns["length"], columns["sticker"])
+    )
+    field_map = get_template_attribute_fields(columns["template_item"])
+    index = VariantIndex(field_map)
+
+    resolved: Dict[tuple, str] = {}
+    failures: Dict[tuple, str] = {}
+    for key in OrderedDict.fromkeys(keys):
+        template_item, powder_code, length, sticker = key
+        fields = field_map.get(template_item) or {}
+
+        if not all(key) or len(fields) < 3:
+            failures[key] = _("Template, Powder Code, Length and Sticker are required and must match the template")
+            continue
+
+        attributes = {
+            fields["powder_code"]: powder_code,
+            fields["length"]: length,
+            fields["sticker"]: sticker,
+        }
+        item_code = index.find(template_item, attributes)
+        if item_code:
+            resolved[key] = item_code
+            continue
+
+        frappe.db.savepoint("vbc_sr_import_variant")
+        try:
+            variant = _materialise_variant(
+                template_item=template_item,
+                sticker=sticker,
+                powder_code=powder_code,
+                length=flt(length),
+            )
+        except Exception as exc:
+            frappe.db.rollback(save_point="vbc_sr_import_variant")
+            frappe.clear_last_message()
+            failures[key] = str(exc)
+            continue
+
+        index.add(template_item, attributes, variant.name)
+        resolved[key] = variant.name
+
+    item_codes: List[Optional[str]] = []
+    for line, key in enumerate(keys, start=2):
+        if key in failures:
+            errors.append({"row": line, "error": failures[key]})
+        item_codes.append(resolved.get(key))
+
+    return item_codes
+
+
+def _convert_pcs_to_qty(item_codes: List[Optional[str]], pcs: List[float], errors: List[dict]) -> List[Optional[float]]:
+    """Stock qty for every line in one pass over the columns: qty = pcs / weight_per_unit."""
+
+    weights = _get_weight_factors(code for code in item_codes if code)
+    weight_column = [weights[code].weight_per_unit if code in weights else 0.0 for code in item_codes]
+
+    qty = [flt(count / weight, 6) if weight else None for count, weight in zip(pcs, weight_column)]
+
+    for line, (code, weight) in enumerate(zip(item_codes, weight_column), start=2):
+        if code and not weight:
+            errors.append({"row": line, "error": _("Item {0} has no Weight Per Unit").format(code)})
+
+    return qty
+
+
+def _build_entries(columns: Dict[str, list], errors: List[dict]) -> List[dict]:
+    """One entry per (item, warehouse); repeated lines are summed."""
+
+    pcs = [flt(value) for value in columns["total_pcs"]]
+    rates = columns.get("valuation_rate") or [""] * len(pcs)
+    item_codes = _resolve_variants(columns, errors)
+    qty = _convert_pcs_to_qty(item_codes, pcs, errors)
+
+    entries: Dict[tuple, dict] = OrderedDict()
+    for line in range(len(pcs)):
+        item_code, warehouse = item_codes[line], columns["warehouse"][line]
+        if not item_code or qty[line] is None:
+            continue
+        if not warehouse:
+            errors.append({"row": line + 2, "error": _("Warehouse is required")})
+            continue
+
+        entry = entries.setdefault(
+            (item_code, warehouse),
+            {
+                "item_code": item_code,
+                "warehouse": warehouse,
+                "qty": 0.0,
+                "total_pcs": 0.0,
+                "template_item": columns["template_item"][line],
+                "powder_code": columns["powder_code"][line],
+                "length": flt(columns["length"][line]),
+                "sticker": columns["sticker"][line],
+                "lines": [],
+            },
+        )
+        entry["lines"].append(line + 2)
+        entry["qty"] += qty[line]
+        entry["total_pcs"] += pcs[line]
+        if rates[line]:
+            entry["valuation_rate"] = flt(rates[line])
+
+    return list(entries.values())
+
+
+def _add_entry_error(errors: List[dict], entry: dict, message) -> None:
+    for line in entry["lines"]:
+        errors.append({"row": line, "error": str(message)})
+
+
+def _validate_warehouses(entries: List[dict], company: str, errors: List[dict]) -> List[dict]:
+    """Drop entries whose warehouse is unknown, a group or of another company."""
+
+    if not entries:
+        return entries
+
+    warehouses = {
+        row.name: row
+        for row in frappe.get_all(
+            "Warehouse",
+            filters={"name": ["in", list({entry["warehouse"] for entry in entries})]},
+            fields=["name", "company", "is_group"],
+        )
+    }
+
+    valid = []
+    for entry in entries:
+        warehouse = warehouses.get(entry["warehouse"])
+        if not warehouse:
+            _add_entry_error(errors, entry, _("Warehouse {0} does not exist").format(entry["warehouse"]))
+        elif warehouse.is_group:
+            _add_entry_error(errors, entry, _("Warehouse {0} is a group warehouse").format(entry["warehouse"]))
+        elif warehouse.company != company:
+            _add_entry_error(
+                errors, entry, _("Warehouse {0} does not belong to company {1}").format(entry["warehouse"], company)
+            )
+        else:
+            valid.append(entry)
+
+    return valid
+
+
+def _make_reconciliation(entries: List[dict], company: str, posting_date: Optional[str], posting_time: Optional[str]):
+    reconciliation = frappe.new_doc("Stock Reconciliation")
+    reconciliation.company = company
+    reconciliation.purpose = "Stock Reconciliation"
+    if posting_date:
+        reconciliation.set_posting_time = 1
+        reconciliation.posting_date = posting_date
+        reconciliation.posting_time = posting_time or "00:00:00"
+    for entry in entries:
+        reconciliation.append("items", {key: value for key, value in entry.items() if key != "lines"})
+    return reconciliation
+
+
+def _drop_failing_entries(entries: List[dict], errors: List[dict], *args) -> List[dict]:
+    """Try each entry on its own and return the ones that insert, reporting the others."""
+
+    from erpnext.stock.doctype.stock_reconciliation.stock_reconciliation import (
+        EmptyStockReconciliationItemsError,
+    )
+
+    valid = []
+    for entry in entries:
+        frappe.db.savepoint("vbc_sr_import_entry")
+        try:
+            _make_reconciliation([entry], *args).insert()
+        except EmptyStockReconciliationItemsError:
+            # Unchanged stock; a chunk silently drops such rows
+            valid.append(entry)
+        except Exception as exc:
+            _add_entry_error(errors, entry, exc)
+        else:
+            valid.append(entry)
+        finally:
+            frappe.db.rollback(save_point="vbc_sr_import_entry")
+            frappe.clear_last_message()
+
+    return valid
+
+
+def _insert_chunk(chunk: List[dict], errors: List[dict], *args) -> Optional[str]:
+    """Insert one draft Stock Reconciliation for the chunk; bad lines are left out and reported."""
+
+    frappe.db.savepoint("vbc_sr_import_chunk")
+    try:
+        reconciliation = _make_reconciliation(chunk, *args)
+        reconciliation.insert()
+        return reconciliation.name
+    except Exception:
+        frappe.db.rollback(save_point="vbc_sr_import_chunk")
+        frappe.clear_last_message()
+
+    chunk = _drop_failing_entries(chunk, errors, *args)
+    if not chunk:
+        return None
+
+    frappe.db.savepoint("vbc_sr_import_chunk")
+    try:
+        reconciliation = _make_reconciliation(chunk, *args)
+        reconciliation.insert()
+        return reconciliation.name
+    except Exception as exc:
+        frappe.db.rollback(save_point="vbc_sr_import_chunk")
+        frappe.clear_last_message()
+        for entry in chunk:
+            _add_entry_error(errors, entry, exc)
+        return None
+
+
+def run_stock_reconciliation_import(
+    file_url: str,
+    company: str,
+    posting_date: Optional[str] = None,
+    posting_time: Optional[str] = None,
+    user: Optional[str] = None,
+) -> frappe._dict:
+    """Background job: create draft Stock Reconciliations from a count sheet in pieces."""
+
+    if user:
+        frappe.set_user(user)
+
+    errors: List[dict] = []
+    created: List[str] = []
+    chunk_size = cint(frappe.conf.get("vbc_sr_import_chunk_size")) or DEFAULT_CHUNK_SIZE
+
+    try:
+        entries = _validate_warehouses(_build_entries(_read_columns(file_url), errors), company, errors)
+        frappe.db.commit()
+    except Exception as exc:
+        frappe.db.rollback()
+        frappe.publish_realtime(REALTIME_EVENT, {"done": True, "error": str(exc)}, user=user)
+        raise
+
+    for start in range(0, len(entries), chunk_size):
+        name = _insert_chunk(entries[start : start + chunk_size], errors, company, posting_date, posting_time)
+        if name:
+            created.append(name)
+
+        frappe.db.commit()
+        frappe.publish_realtime(
+            REALTIME_EVENT,
+            {"processed": min(start + chunk_size, len(entries)), "total": len(entries)},
+            user=user,
+        )
+
+    errors.sort(key=lambda error: error["row"])
+    if errors:
+        frappe.log_error(
+            title="Variant Bulk Creation - Stock Reconciliation Import",
+            message=frappe.as_json(errors),
+        )
+
+    result = frappe._dict(
+        {
+            "created": created,
+            "errors": errors[:MAX_REPORTED_ERRORS],
+            "error_count": len(errors),
+            "done": True,
+        }
+    )
+    frappe.publish_realtime(REALTIME_EVENT, result, user=user)
+    return result
+
+
+@frappe.whitelist()
+def enqueue_stock_reconciliation_import(
+    file_url: str,
+    company: str,
+    posting_date: Optional[str] = None,
+    posting_time: Optional[str] = None,
+) -> None:
+    """Queue the import of a pieces count sheet into draft Stock Reconciliations."""
+
+    frappe.has_permission("Stock Reconciliation", "create", throw=True)
+    if not file_url:
+        frappe.throw(_("Attach the count sheet to import."))
+    _get_file(file_url)
+
+    frappe.enqueue(
+        "variant_bulk_creation.variant_bulk_creation.stock_reconciliation_import.run_stock_reconciliation_import",
+        queue="long",
+        timeout=3600,
+        file_url=file_url,
+        company=company,
+        posting_date=posting_date,
+        posting_time=posting_time,
+        user=frappe.session.user,
+    )
+    frappe.msgprint(
+        _("The import has been queued. You will be notified when the Stock Reconciliations are ready."),
+        alert=True,
+    )
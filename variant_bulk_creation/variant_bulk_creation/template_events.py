@@ -0,0 +1,111 @@
+"""Realtime notice to open forms when variant templates change.
+
+The Sales Order, Stock Entry, Stock Reconciliation and Variant Creation Tool
+forms cache template attributes and item weight factors on the client. When a
+template's attributes or kg/meter change, or the values of an Item Attribute
+it uses, a compact ``vbc_template_changed`` event is published after commit::
+
+    {"templates": ["PROFILE-40"], "items": [], "version": "2026-10-19 10:15:02.123456"}
+
+and the client drops only the cache entries of those templates (and of the
+listed items), so the caches can keep long lifetimes and still stay correct.
+
+Bulk variant creation sets ``frappe.flags.vbc_bulk_variants`` so the per-Item
+hook stays quiet while thousands of variants are saved; those paths call
+``publish_templates_changed`` once per commit for the templates they touched.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, List, Optional
+
+import frappe
+from frappe.utils import now
+
+REALTIME_EVENT = "vbc_template_changed"
+
+TEMPLATE_WEIGHT_FIELDS = ("weight_per_meter_with_sticker", "weight_per_meter_no_sticker")
+ITEM_WEIGHT_FIELDS = ("weight_per_unit", "weight_uom")
+
+
+def _is_suppressed(doc) -> bool:
+    return bool(frappe.flags.in_import or frappe.flags.vbc_bulk_variants or doc.flags.in_insert)
+
+
+def _publish(templates: Iterable[str], items: Iterable[str], version) -> None:
+    templates, items = sorted(set(templates)), sorted(set(items))
+    if not (templates or items):
+        return
+
+    frappe.publish_realtime(
+        REALTIME_EVENT,
+        {"templates": templates, "items": items, "version": str(version or "")},
+        after_commit=True,
+    )
+
+
+def publish_templates_changed(templates: Iterable[str]) -> None:
+    """Announce, when the current transaction commits, that variants of ``templates`` changed."""
+
+    _publish(templates, [], now())
+
+
+def _attribute_rows(doc) -> List[tuple]:
+    return [(row.attribute, row.attribute_value) for row in doc.get("attributes") or []]
+
+
+def _has_changed(doc, before, fields) -> bool:
+    return any(doc.get(field) != before.get(field) for field in fields)
+
+
+def publish_item_change(doc, _event: Optional[str] = None) -> None:
+    """Item on_update hook: announce changed template attributes, kg/meter or item weights."""
+
+    if _is_suppressed(doc):
+        return
+
+    before = doc.get_doc_before_save()
+    templates: List[str] = []
+    items: List[str] = []
+
+    if doc.has_variants:
+        if (
+            before is None
+            or _attribute_rows(doc) != _attribute_rows(before)
+            or _has_changed(doc, before, TEMPLATE_WEIGHT_FIELDS)
+        ):
+            templates.append(doc.name)
+    elif before is not None and _has_changed(doc, before, ITEM_WEIGHT_FIELDS):
+        items.append(doc.name)
+
+    _publish(templates, items, doc.modified)
+
+
+def publish_item_attribute_change(doc, _event: Optional[str] = None) -> None:
+    """Item Attribute on_update hook: announce every template using the attribute."""
+
+    if frappe.flags.in_import:
+        return
+
+    before = doc.get_doc_before_save()
+    if before is not None:
+        values = [(row.attribute_value, row.abbr) for row in doc.get("item_attribute_values") or []]
+        before_values = [(row.attribute_value, row.abbr) for row in before.get("item_attribute_values") or []]
+        if values == before_values and not _has_changed(
+            doc, before, ("numeric_values", "from_range", "to_range", "increment")
+        ):
+            return
+
+    templates = frappe.db.sql_list(
+        """
+        SELECT DISTINCT iva.parent
+        FROM `tabItem Variant Attribute` iva
+        INNER JOIN `tabItem` item ON item.name = iva.parent
+        WHERE iva.attribute = %(attribute)s
+            AND iva.parenttype = 'Item'
+            AND item.has_variants = 1
+        """,
+        {"attribute": doc.name},
+    )
+
+    _publish(templates, [], doc.modified)
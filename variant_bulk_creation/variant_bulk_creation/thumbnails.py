@@ -0,0 +1,131 @@
+"""Print-size thumbnails for item images.
+
+Print formats show product photos at a few dozen pixels, but the Item image
+is usually a full-resolution photo. ``get_thumbnail`` scales a local image
+down once per (content, size) and stores the result under
+``public/files/vbc_thumbnails`` with a content-hash file name, so every print
+of the same photo at the same size reuses one small file, and a replaced
+photo gets a new thumbnail automatically.
+
+The content hash of a source file is cached per (path, mtime, size) so a
+print does not re-read full-size photos to look it up.
+
+Set ``vbc_print_inline_images`` in site_config.json to embed thumbnails as
+base64 data URIs instead, which saves wkhtmltopdf one HTTP request per image.
+Private images are always inlined so they are never copied to public files.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Optional, Tuple
+
+import frappe
+from frappe.utils import cint
+
+THUMBNAIL_FOLDER = "vbc_thumbnails"
+HASH_CACHE_KEY = "vbc_thumbnail_source_hash"
+# Render at twice the CSS size so thumbnails stay sharp in PDFs
+SCALE = 2
+
+
+def _css_pixels(value, default: int) -> int:
+    match = re.match(r"\s*(\d+)", str(value or ""))
+    return int(match.group(1)) if match else default
+
+
+def _get_source_path(file_url: str) -> Tuple[Optional[str], bool]:
+    """Return the local path of ``file_url`` and whether it is private."""
+
+    url = file_url.split("?", 1)[0]
+    if url.startswith("/private/files/"):
+        folder, relative_path, is_private = "private", url[len("/private/files/"):], True
+    elif url.startswith("/files/"):
+        folder, relative_path, is_private = "public", url[len("/files/"):], False
+    else:
+        return None, False
+
+    # Resolve ".." and symlinks so a URL can never reach outside its own files folder
+    root = os.path.realpath(frappe.get_site_path(folder, "files"))
+    path = os.path.realpath(os.path.join(root, relative_path))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        return None, False
+
+    return path, is_private
+
+
+def _get_content_hash(path: str) -> str:
+    stat = os.stat(path)
+    cache_field = f"{path}|{stat.st_mtime_ns}|{stat.st_size}"
+
+    cached = frappe.cache().hget(HASH_CACHE_KEY, cache_field)
+    if cached:
+        return cached
+
+    digest = hashlib.sha1()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+
+    content_hash = digest.hexdigest()[:20]
+    frappe.cache().hset(HASH_CACHE_KEY, cache_field, content_hash)
+    return content_hash
+
+
+def _make_thumbnail(source_path: str, target_path: str, width: int, height: int) -> None:
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((width, height), Image.LANCZOS)
+
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        # Write to a temporary name first so concurrent prints never read half a file
+        temp_path = f"{target_path}.{frappe.generate_hash(length=6)}.tmp"
+        if target_path.endswith(".png"):
+            image.save(temp_path, format="PNG", optimize=True)
+        else:
+            image.convert("RGB").save(temp_path, format="JPEG", quality=85, optimize=True)
+        os.replace(temp_path, target_path)
+
+
+def get_thumbnail(file_url: str, max_height="80px", max_width="120px", inline: Optional[bool] = None) -> str:
+    """Return the URL (or data URI) of a thumbnail of ``file_url`` fitting the given size.
+
+    Anything that cannot be thumbnailed (external URLs, missing files,
+    unreadable images) is returned unchanged.
+    """
+
+    source_path, is_private = _get_source_path(file_url)
+    if not source_path:
+        return file_url
+
+    width = _css_pixels(max_width, 120) * SCALE
+    height = _css_pixels(max_height, 80) * SCALE
+    extension = ".png" if source_path.lower().endswith((".png", ".gif", ".webp")) else ".jpg"
+
+    try:
+        file_name = f"{_get_content_hash(source_path)}-{width}x{height}{extension}"
+        target_path = frappe.get_site_path("public", "files", THUMBNAIL_FOLDER, file_name)
+        if is_private:
+            target_path = frappe.get_site_path("private", "files", THUMBNAIL_FOLDER, file_name)
+
+        if not os.path.isfile(target_path):
+            _make_thumbnail(source_path, target_path, width, height)
+    except Exception:
+        frappe.log_error(title="Variant Bulk Creation - Thumbnail", message=frappe.get_traceback())
+        return file_url
+
+    if inline is None:
+        inline = bool(cint(frappe.conf.get("vbc_print_inline_images")))
+
+    if inline or is_private:
+        with open(target_path, "rb") as handle:
+            encoded = base64.b64encode(handle.read()).decode()
+        return "data:{0};base64,{1}".format(mimetypes.guess_type(target_path)[0] or "image/jpeg", encoded)
+
+    return f"/files/{THUMBNAIL_FOLDER}/{file_name}"
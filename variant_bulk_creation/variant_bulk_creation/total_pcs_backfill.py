@@ -0,0 +1,274 @@
+"""Resumable background backfill of total_pcs on historical Stock Ledger Entries.
+
+SLEs posted before the ledger hooks were installed have no total_pcs. The job
+walks ``tabStock Ledger Entry`` by primary key in chunks, persisting the last
+processed name as a watermark so it can stop and resume at any point. Each
+chunk is filled with set-based updates, first from the source voucher rows
+and then from ``qty x weight_per_unit`` of the variant.
+
+Start it from the console or with::
+
+    bench --site your-site execute variant_bulk_creation.variant_bulk_creation.total_pcs_backfill.start_total_pcs_backfill
+
+Tuning (site_config.json):
+
+- ``vbc_backfill_batch_size``: SLEs per chunk (default 5000)
+- ``vbc_backfill_db_load``: share of wall-clock time the job may keep the
+  database busy, between 0 and 1 (default 0.5)
+- ``vbc_backfill_time_budget``: seconds per job run before it re-enqueues
+  itself (default 1200)
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from typing import Optional
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt, now
+
+from .stock_ledger import PCS_DETAIL_DOCTYPES, get_pcs_detail_doctype
+
+WATERMARK_KEY = "vbc_total_pcs_backfill_watermark"
+PROGRESS_KEY = "vbc_total_pcs_backfill_progress"
+REALTIME_EVENT = "vbc_total_pcs_backfill"
+JOB_NAME = "vbc_total_pcs_backfill"
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_DB_LOAD = 0.5
+DEFAULT_TIME_BUDGET = 20 * 60
+
+
+def _get_settings() -> frappe._dict:
+    db_load = flt(frappe.conf.get("vbc_backfill_db_load")) or DEFAULT_DB_LOAD
+    return frappe._dict(
+        {
+            "batch_size": cint(frappe.conf.get("vbc_backfill_batch_size")) or DEFAULT_BATCH_SIZE,
+            "db_load": min(max(db_load, 0.05), 1.0),
+            "time_budget": cint(frappe.conf.get("vbc_backfill_time_budget")) or DEFAULT_TIME_BUDGET,
+        }
+    )
+
+
+def _get_progress() -> frappe._dict:
+    stored = frappe.db.get_global(PROGRESS_KEY)
+    return frappe._dict(json.loads(stored) if stored else {})
+
+
+def _save_progress(progress: frappe._dict, watermark: Optional[str]) -> None:
+    frappe.db.set_global(WATERMARK_KEY, watermark or "")
+    frappe.db.set_global(PROGRESS_KEY, json.dumps(progress, default=str))
+
+
+def _next_chunk_bound(after: str, batch_size: int) -> Optional[str]:
+    """Return the name closing the next chunk of ``batch_size`` SLEs after ``after``."""
+
+    bound = frappe.db.sql(
+        """
+        SELECT name FROM `tabStock Ledger Entry`
+        WHERE name > %s
+        ORDER BY name
+        LIMIT %s, 1
+        """,
+        (after, batch_size - 1),
+    )
+    if bound:
+        return bound[0][0]
+
+    last = frappe.db.sql(
+        "SELECT MAX(name) FROM `tabStock Ledger Entry` WHERE name > %s", (after,)
+    )
+    return last[0][0] if last and last[0][0] else None
+
+
+def _count_filled(bounds: dict) -> int:
+    return cint(
+        frappe.db.sql(
+            """
+            SELECT COUNT(*) FROM `tabStock Ledger Entry`
+            WHERE name > %(after)s
+                AND name <= %(upto)s
+                AND IFNULL(total_pcs, 0) != 0
+            """,
+            bounds,
+        )[0][0]
+    )
+
+
+def _backfill_chunk(after: str, upto: str) -> int:
+    """Fill total_pcs for SLEs with ``after < name <= upto``; return rows updated."""
+
+    bounds = {"after": after, "upto": upto}
+    filled_before = _count_filled(bounds)
+
+    for voucher_type in PCS_DETAIL_DOCTYPES:
+        detail_doctype = get_pcs_detail_doctype(voucher_type)
+        if not detail_doctype:
+            continue
+
+        frappe.db.sql(
+            f"""
+            UPDATE `tabStock Ledger Entry` sle
+            INNER JOIN `tab{detail_doctype}` detail
+                ON detail.name = sle.voucher_detail_no
+                AND detail.item_code = sle.item_code
+            SET sle.total_pcs = detail.total_pcs
+            WHERE sle.name > %(after)s
+                AND sle.name <= %(upto)s
+                AND sle.voucher_type = %(voucher_type)s
+                AND IFNULL(sle.total_pcs, 0) = 0
+                AND IFNULL(detail.total_pcs, 0) != 0
+            """,
+            dict(bounds, voucher_type=voucher_type),
+        )
+
+    # weight_per_unit only means pcs/kg on variants of templates with a kg/meter
+    # configuration, so the fallback is limited to those items.
+    frappe.db.sql(
+        """
+        UPDATE `tabStock Ledger Entry` sle
+        INNER JOIN `tabItem` item ON item.name = sle.item_code
+        INNER JOIN `tabItem` template ON template.name = item.variant_of
+        SET sle.total_pcs = ROUND(
+            ABS(
+                CASE
+                    WHEN sle.voucher_type = 'Stock Reconciliation' THEN sle.qty_after_transaction
+                    ELSE sle.actual_qty
+                END
+            ) * item.weight_per_unit,
+            3
+        )
+        WHERE sle.name > %(after)s
+            AND sle.name <= %(upto)s
+            AND IFNULL(sle.total_pcs, 0) = 0
+            AND IFNULL(item.weight_per_unit, 0) > 0
+            AND (
+                IFNULL(template.weight_per_meter_no_sticker, 0) > 0
+                OR IFNULL(template.weight_per_meter_with_sticker, 0) > 0
+            )
+        """,
+        bounds,
+    )
+
+    # Every update only fills empty total_pcs, so the growth is the rows updated
+    return _count_filled(bounds) - filled_before
+
+
+def run_total_pcs_backfill(user: Optional[str] = None) -> None:
+    """Process chunks until the ledger is exhausted or the time budget is spent.
+
+    Runs as a background job. When the budget runs out, it re-enqueues itself
+    and continues from the persisted watermark.
+    """
+
+    settings = _get_settings()
+    progress = _get_progress()
+    watermark = frappe.db.get_global(WATERMARK_KEY) or ""
+
+    if not progress.get("total"):
+        progress.total = frappe.db.count("Stock Ledger Entry")
+        progress.processed = 0
+        progress.updated = 0
+        progress.started_at = now()
+
+    progress.status = "Running"
+    started = time.monotonic()
+
+    while True:
+        chunk_started = time.monotonic()
+        upto = _next_chunk_bound(watermark, settings.batch_size)
+        if not upto:
+            progress.status = "Completed"
+            progress.completed_at = now()
+            break
+
+        progress.updated += _backfill_chunk(watermark, upto)
+        progress.processed = min(progress.processed + settings.batch_size, progress.total)
+        watermark = upto
+        _save_progress(progress, watermark)
+        frappe.db.commit()
+
+        frappe.publish_realtime(
+            REALTIME_EVENT,
+            {
+                "processed": progress.processed,
+                "total": progress.total,
+                "updated": progress.updated,
+                "percent": flt(progress.processed * 100 / progress.total, 2) if progress.total else 100,
+            },
+            user=user,
+        )
+
+        # Keep the duty cycle under the configured DB load budget
+        elapsed = time.monotonic() - chunk_started
+        time.sleep(elapsed * (1 - settings.db_load) / settings.db_load)
+
+        if time.monotonic() - started > settings.time_budget:
+            progress.status = "Queued"
+            _save_progress(progress, watermark)
+            frappe.db.commit()
+            # This job is still running, so skip the duplicate check
+            _enqueue(user, settings, deduplicate=False)
+            return
+
+    _save_progress(progress, watermark)
+    frappe.db.commit()
+    frappe.publish_realtime(REALTIME_EVENT, dict(progress, percent=100), user=user)
+
+
+def is_backfill_queued() -> bool:
+    """Whether a backfill job is queued or running for this site."""
+
+    from frappe.utils.background_jobs import get_jobs
+
+    site = frappe.local.site
+    return JOB_NAME in get_jobs(site=site, queue="long", key="job_name").get(site, [])
+
+
+def _enqueue(user: Optional[str], settings: Optional[frappe._dict] = None, deduplicate: bool = True) -> bool:
+    """Queue a backfill run unless one is already queued or running."""
+
+    if deduplicate and is_backfill_queued():
+        return False
+
+    settings = settings or _get_settings()
+    frappe.enqueue(
+        "variant_bulk_creation.variant_bulk_creation.total_pcs_backfill.run_total_pcs_backfill",
+        queue="long",
+        # A run may overshoot its budget by the last chunk and its pause
+        timeout=settings.time_budget * 3,
+        job_name=JOB_NAME,
+        user=user,
+    )
+    return True
+
+
+@frappe.whitelist()
+def start_total_pcs_backfill(reset: bool = False) -> frappe._dict:
+    """Queue the backfill; pass ``reset=1`` to start again from the first SLE."""
+
+    frappe.only_for("System Manager")
+
+    if is_backfill_queued():
+        frappe.msgprint(_("The total_pcs backfill is already queued or running."))
+        return get_total_pcs_backfill_status()
+
+    if cint(reset):
+        _save_progress(frappe._dict(), "")
+        frappe.db.commit()
+
+    _enqueue(frappe.session.user, deduplicate=False)
+    return get_total_pcs_backfill_status()
+
+
+@frappe.whitelist()
+def get_total_pcs_backfill_status() -> frappe._dict:
+    """Return the persisted progress and watermark of the backfill."""
+
+    frappe.only_for("System Manager")
+
+    progress = _get_progress()
+    progress.watermark = frappe.db.get_global(WATERMARK_KEY) or None
+    return progress
@@ -0,0 +1,119 @@
+"""Bulk lookup of existing variants by their attribute values.
+
+ERPNext's ``get_variant`` finds one variant per call with a query per
+attribute. For imports touching thousands of rows the index here loads every
+variant of the templates involved in one query and matches rows against an
+in-memory ``{(template, signature): item_code}`` map, where the signature is
+the sorted ``(attribute, normalised value)`` pairs of the variant.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import frappe
+
+Signature = Tuple[Tuple[str, str], ...]
+
+# Substrings identifying the attributes behind the transaction row fields,
+# matched the same way as in sales_order._materialise_variant
+ATTRIBUTE_FIELDS = (("sticker", "sticker"), ("powder", "powder_code"), ("length", "length"))
+
+
+def normalise_attribute_value(value) -> str:
+    """Return a canonical string for an attribute value.
+
+    Numbers compare by value, so a length typed as ``6``, ``6.0`` or ``6.00``
+    matches the variant created with any of them.
+    """
+
+    if value is None:
+        return ""
+
+    text = str(value).strip()
+    try:
+        number = Decimal(text)
+    except InvalidOperation:
+        return text
+
+    if not number.is_finite():
+        return text
+    normalised = number.normalize()
+    # normalize() turns 600 into 6E+2; quantize back to a plain integer
+    if normalised == normalised.to_integral():
+        normalised = normalised.quantize(Decimal(1))
+    return str(normalised)
+
+
+def make_signature(attributes: Dict[str, object]) -> Signature:
+    return tuple(sorted((name, normalise_attribute_value(value)) for name, value in attributes.items()))
+
+
+def get_template_attribute_fields(template_items: Iterable[str]) -> Dict[str, Dict[str, str]]:
+    """Return ``{template: {row field: attribute}}`` for sticker, powder_code and length."""
+
+    templates = sorted({template for template in template_items if template})
+    if not templates:
+        return {}
+
+    mapping: Dict[str, Dict[str, str]] = {template: {} for template in templates}
+    for row in frappe.get_all(
+        "Item Variant Attribute",
+        filters={"parent": ["in", templates], "parenttype": "Item"},
+        fields=["parent", "attribute"],
+        order_by="parent asc, idx asc",
+    ):
+        attribute_lower = (row.attribute or "").lower()
+        for keyword, fieldname in ATTRIBUTE_FIELDS:
+            if keyword in attribute_lower and fieldname not in mapping[row.parent]:
+                mapping[row.parent][fieldname] = row.attribute
+                break
+
+    return mapping
+
+
+class VariantIndex:
+    """Existing variants of a set of templates, keyed by attribute signature."""
+
+    def __init__(self, template_items: Iterable[str]):
+        self.templates = sorted({template for template in template_items if template})
+        self._index: Dict[Tuple[str, Signature], str] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.templates:
+            return
+
+        rows = frappe.db.sql(
+            """
+            SELECT item.name, item.variant_of, iva.attribute, iva.attribute_value
+            FROM `tabItem` item
+            INNER JOIN `tabItem Variant Attribute` iva
+                ON iva.parent = item.name
+                AND iva.parenttype = 'Item'
+            WHERE item.variant_of IN %(templates)s
+            ORDER BY item.name
+            """,
+            {"templates": tuple(self.templates)},
+            as_dict=True,
+        )
+
+        attributes: Dict[str, Dict[str, str]] = {}
+        variant_of: Dict[str, str] = {}
+        for row in rows:
+            attributes.setdefault(row.name, {})[row.attribute] = row.attribute_value
+            variant_of[row.name] = row.variant_of
+
+        for item_code, values in attributes.items():
+            self.add(variant_of[item_code], values, item_code)
+
+    def add(self, template_item: str, attributes: Dict[str, object], item_code: str) -> None:
+        # First one wins, as with get_variant on duplicate variants
+        self._index.setdefault((template_item, make_signature(attributes)), item_code)
+
+    def find(self, template_item: str, attributes: Dict[str, object]) -> Optional[str]:
+        return self._index.get((template_item, make_signature(attributes)))
+
+    def find_many(self, requests: List[Tuple[str, Dict[str, object]]]) -> List[Optional[str]]:
+        return [self.find(template_item, attributes) for template_item, attributes in requests]
@@ -5,71 +5,161 @@ from __future__ import annotations
 from typing import Optional
 
 import frappe
+from frappe.utils import flt
+
+from .item_weight import _get_weight_factors
+
+
+def _prorate_pcs(pcs: float, qty: float, base_qty: float) -> float:
+    """Return the share of ``pcs`` that ``qty`` represents out of ``base_qty``.
+
+    Partial Work Orders and partial manufacture entries carry pieces in
+    proportion to their quantity; without a base quantity the full value is
+    kept, and no quantity means no pieces.
+    """
+
+    if not base_qty:
+        return pcs
+    if not qty:
+        return 0.0
+    return flt(flt(pcs) * flt(qty) / flt(base_qty), 3)
+
+
+def _get_sales_order_item_pcs(doc) -> Optional[frappe._dict]:
+    """Return total_weight (pcs) and stock_qty of the Sales Order row behind the Work Order."""
+
+    fields = ["total_weight", "stock_qty"]
+
+    if doc.get("sales_order_item"):
+        return frappe.db.get_value("Sales Order Item", doc.sales_order_item, fields, as_dict=True)
+
+    return frappe.db.get_value(
+        "Sales Order Item",
+        {
+            "parent": doc.sales_order,
+            "parenttype": "Sales Order",
+            "item_code": doc.production_item,
+            "total_weight": [">", 0],
+        },
+        fields,
+        as_dict=True,
+        order_by="idx asc",
+    )
 
 
 def populate_total_pcs_from_sales_order(doc, _event: Optional[str] = None) -> None:
     """Populate total_pcs in Work Order from Sales Order.
 
     This function is called when a Work Order is created from a Sales Order.
-    It copies the total_pcs (total_weight) value from Sales Order Item to Work Order.
+    It copies the total_pcs (total_weight) of the referenced Sales Order Item,
+    pro-rated when the Work Order covers only part of the ordered quantity.
     """
 
     # Only process Work Order documents that have a sales_order reference
     if doc.doctype != "Work Order" or not doc.get("sales_order"):
         return
 
-    sales_order_name = doc.get("sales_order")
+    # Already set from a Sales Order snapshot (bulk creation)
+    if doc.flags.vbc_total_pcs_set:
+        return
 
-    # Get the Sales Order document
-    try:
-        sales_order = frappe.get_doc("Sales Order", sales_order_name)
-    except Exception:
-        # Sales Order might not exist or be accessible
+    so_item = _get_sales_order_item_pcs(doc)
+    if not so_item or not so_item.total_weight:
         return
 
-    # Find matching item in Sales Order
-    for so_item in sales_order.get("items", []):
-        if so_item.item_code == doc.production_item and so_item.get("total_weight"):
-            # total_weight in Sales Order corresponds to total pieces
-            doc.total_pcs = so_item.total_weight
-            break
+    # total_weight in Sales Order corresponds to total pieces
+    doc.total_pcs = _prorate_pcs(so_item.total_weight, doc.get("qty"), so_item.stock_qty)
 
 
 def populate_total_pcs_in_stock_entry(doc, _event: Optional[str] = None) -> None:
-    """Populate total_pcs in Stock Entry Detail from Work Order Item.
+    """Populate total_pcs in Stock Entry Detail from Work Order and Work Order Item.
 
     This function is called before a Stock Entry is saved when it's generated
-    from a Work Order. It copies the total_pcs value from Work Order Item to
-    the corresponding Stock Entry Detail.
+    from a Work Order. Pieces of the finished good and of the required items
+    are split in proportion to each row's stock quantity, so a partial
+    manufacture entry only carries the pieces it actually produces or consumes.
     """
 
     # Only process Stock Entry documents that have a work_order reference
     if doc.doctype != "Stock Entry" or not doc.get("work_order"):
         return
 
-    work_order_name = doc.get("work_order")
-
-    # Get the Work Order document
-    try:
-        work_order = frappe.get_doc("Work Order", work_order_name)
-    except Exception:
-        # Work Order might not exist or be accessible
+    if all(row.get("total_pcs") for row in doc.get("items", [])):
         return
 
-    # Create a mapping of item_code to total_pcs from Work Order
-    wo_item_pcs_map = {}
+    work_order = frappe.db.get_value(
+        "Work Order", doc.work_order, ["production_item", "qty", "total_pcs"], as_dict=True
+    )
+    if not work_order:
+        return
 
-    # Get total_pcs from the required items (finished goods)
-    for item_row in work_order.get("required_items", []):
-        if item_row.get("total_pcs"):
-            wo_item_pcs_map[item_row.item_code] = item_row.total_pcs
+    # item_code -> (total_pcs, quantity the pieces refer to)
+    pcs_sources = {
+        row.item_code: (row.total_pcs, row.required_qty)
+        for row in frappe.get_all(
+            "Work Order Item",
+            filters={"parent": doc.work_order, "parenttype": "Work Order", "total_pcs": [">", 0]},
+            fields=["item_code", "total_pcs", "required_qty"],
+        )
+    }
 
     # Also check the production item (finished good)
-    if work_order.get("total_pcs"):
-        wo_item_pcs_map[work_order.production_item] = work_order.total_pcs
+    if work_order.total_pcs:
+        pcs_sources[work_order.production_item] = (work_order.total_pcs, work_order.qty)
 
     # Copy total_pcs to Stock Entry Detail rows
     for se_item in doc.get("items", []):
-        item_code = se_item.item_code
-        if item_code in wo_item_pcs_map and not se_item.get("total_pcs"):
-            se_item.total_pcs = wo_item_pcs_map[item_code]
+        if se_item.get("total_pcs") or se_item.item_code not in pcs_sources:
+            continue
+
+        pcs, base_qty = pcs_sources[se_item.item_code]
+        stock_qty = se_item.get("transfer_qty") or flt(se_item.qty) * flt(se_item.conversion_factor or 1)
+        se_item.total_pcs = _prorate_pcs(pcs, stock_qty, base_qty)
+
+
+def update_total_pcs_produced(doc, event: Optional[str] = None) -> None:
+    """Add (on submit) or remove (on cancel) a Manufacture entry's pieces on its Work Order.
+
+    The counter is changed with a single ``UPDATE ... SET x = x + %s`` so
+    concurrent manufacture entries never overwrite each other and the Work
+    Order document is neither loaded nor locked beyond the row update itself.
+    """
+
+    if doc.doctype != "Stock Entry" or doc.get("purpose") != "Manufacture" or not doc.get("work_order"):
+        return
+
+    production_item = frappe.db.get_value("Work Order", doc.work_order, "production_item")
+    finished_rows = [
+        row
+        for row in doc.get("items", [])
+        if row.get("is_finished_item") or (row.get("t_warehouse") and row.item_code == production_item)
+    ]
+    if not finished_rows:
+        return
+
+    missing_pcs = [row.item_code for row in finished_rows if not row.get("total_pcs")]
+    weight_factors = {}
+    if missing_pcs:
+        weight_factors = _get_weight_factors(missing_pcs)
+
+    pcs = 0.0
+    for row in finished_rows:
+        if row.get("total_pcs"):
+            pcs += flt(row.total_pcs)
+        elif row.item_code in weight_factors:
+            pcs += flt(row.get("transfer_qty")) * weight_factors[row.item_code].weight_per_unit
+
+    if not pcs:
+        return
+
+    if event == "on_cancel":
+        pcs = -pcs
+
+    frappe.db.sql(
+        """
+        UPDATE `tabWork Order`
+        SET total_pcs_produced = GREATEST(IFNULL(total_pcs_produced, 0) + %s, 0)
+        WHERE name = %s
+        """,
+        (flt(pcs, 3), doc.work_order),
+    )